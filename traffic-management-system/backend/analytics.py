@@ -0,0 +1,185 @@
+import threading
+import time
+import numpy as np
+from utils.config import (VEHICLE_CLASSES, VEHICLE_CLASS_NAMES, VIOLATION_TYPES, ANALYTICS_SPEED_BINS,
+                          ANALYTICS_MINUTE_BUCKETS, ANALYTICS_HOUR_BUCKETS)
+
+class RollupRing:
+    """
+    Fixed number of time buckets, each `width` seconds long.
+    Bucket k (= timestamp // width) lives in slot k % size; a slot is zeroed when a
+    newer bucket claims it, so old data ages out without any sweep.
+    """
+    def __init__(self, width, size, fields):
+        self.width = width
+        self.size = size
+        self.keys = np.full(size, -1, dtype=np.int64) # bucket number held by each slot
+        self.data = {name: np.zeros((size,) + shape, dtype=np.int64) for name, shape in fields.items()}
+
+    def slot(self, now):
+        """Returns the slot for timestamp `now`, claiming (zeroing) it if it held an older bucket."""
+        key = int(now // self.width)
+        index = key % self.size
+        if self.keys[index] != key:
+            self.keys[index] = key
+            for arr in self.data.values():
+                arr[index] = 0
+        return index
+
+    def series(self, now, count):
+        """
+        Returns: (bucket start timestamps, {field: (count, ...) array}), oldest first.
+        Buckets with no data (or already overwritten) are zero.
+        """
+        count = max(1, min(int(count), self.size))
+        last = int(now // self.width)
+        keys = np.arange(last - count + 1, last + 1)
+        slots = keys % self.size
+        valid = self.keys[slots] == keys
+        out = {}
+        for name, arr in self.data.items():
+            values = arr[slots]
+            values[~valid] = 0
+            out[name] = values
+        return keys * self.width, out
+
+class TrafficRollups:
+    """
+    Incremental traffic analytics for one camera.
+
+    Per lane (plus "N/A" for tracks outside every lane) and per minute/hour bucket:
+      vehicles   - vehicles counted once per track, by class (bucket/lane of first sighting)
+      speeds     - histogram of per-vehicle mean speed (recorded when the track is evicted)
+      violations - violations by type
+    Memory is fixed by the ring sizes plus the state of the tracks currently in view.
+    """
+    def __init__(self, camera, lane_names, classes=VEHICLE_CLASSES, speed_bins=ANALYTICS_SPEED_BINS,
+                 minute_buckets=ANALYTICS_MINUTE_BUCKETS, hour_buckets=ANALYTICS_HOUR_BUCKETS):
+        self.camera = camera
+        # Lane index -1 ("outside every lane") maps to the last row
+        self.lane_names = list(lane_names) + ["N/A"]
+        self.classes = list(classes)
+        self.class_index = {cls: i for i, cls in enumerate(self.classes)}
+        self.speed_bins = np.asarray(speed_bins, dtype=np.float64)
+        fields = {
+            "vehicles": (len(self.lane_names), len(self.classes)),
+            "speeds": (len(self.lane_names), len(self.speed_bins)),
+            "violations": (len(self.lane_names), len(VIOLATION_TYPES)),
+        }
+        self.rings = {
+            "minute": RollupRing(60, minute_buckets, fields),
+            "hour": RollupRing(3600, hour_buckets, fields),
+        }
+        self.live = {} # {track_id: [lane_index, speed_sum, speed_samples]}
+        self.lock = threading.Lock()
+
+    def _add(self, field, lane_index, column, now):
+        for ring in self.rings.values():
+            ring.data[field][ring.slot(now), lane_index, column] += 1
+
+    def observe(self, track_ids, classes, lane_indices, speeds=None, now=None):
+        """
+        Feeds one detection frame.
+        speeds: optional {track_id: km/h}; samples at or below 2 km/h (static noise) are ignored.
+        Returns: number of vehicles seen for the first time.
+        """
+        now = time.time() if now is None else now
+        speeds = speeds or {}
+        new_vehicles = 0
+        with self.lock:
+            for track_id, cls, lane_index in zip(track_ids, classes, lane_indices):
+                state = self.live.get(track_id)
+                if state is None:
+                    column = self.class_index.get(int(cls))
+                    if column is None:
+                        continue
+                    state = self.live[track_id] = [int(lane_index), 0.0, 0]
+                    self._add("vehicles", state[0], column, now)
+                    new_vehicles += 1
+                speed = speeds.get(track_id, 0)
+                if speed > 2:
+                    state[1] += speed
+                    state[2] += 1
+        return new_vehicles
+
+    def forget_tracks(self, track_ids, now=None):
+        """Closes tracks that left the scene (called by TrackRegistry): records their mean speed."""
+        now = time.time() if now is None else now
+        with self.lock:
+            for track_id in track_ids:
+                state = self.live.pop(track_id, None)
+                if state is None or state[2] == 0:
+                    continue
+                mean_speed = state[1] / state[2]
+                column = max(0, int(np.searchsorted(self.speed_bins, mean_speed, side='right')) - 1)
+                self._add("speeds", state[0], column, now)
+
+    def close_all(self, now=None):
+        """Closes every open track (end of a stream session; the next one restarts track IDs)."""
+        with self.lock:
+            track_ids = list(self.live)
+        self.forget_tracks(track_ids, now)
+
+    def record_violation(self, lane_index, violation_type, now=None):
+        """Counts one violation of violation_type (see VIOLATION_TYPES) in lane_index."""
+        now = time.time() if now is None else now
+        with self.lock:
+            self._add("violations", int(lane_index), VIOLATION_TYPES.index(violation_type), now)
+
+    def reset(self):
+        """Drops all buckets and live track state (history cleared)."""
+        with self.lock:
+            self.live.clear()
+            for ring in self.rings.values():
+                ring.keys[:] = -1
+
+    def summary(self, resolution="minute", buckets=None, now=None):
+        """
+        Time series for the dashboard; cost depends only on the number of buckets requested.
+        Returns: dict with bucket start times and per-lane vehicle counts by class,
+                 speed histograms and violations by type.
+        """
+        now = time.time() if now is None else now
+        ring = self.rings[resolution]
+        with self.lock:
+            starts, data = ring.series(now, buckets or ring.size)
+
+        class_names = [VEHICLE_CLASS_NAMES.get(cls, str(cls)) for cls in self.classes]
+        lanes = {}
+        for i, lane in enumerate(self.lane_names):
+            vehicles = data["vehicles"][:, i, :]
+            violations = data["violations"][:, i, :]
+            lanes[lane] = {
+                "vehicles": {name: vehicles[:, j].tolist() for j, name in enumerate(class_names)},
+                "speed_histogram": data["speeds"][:, i, :].tolist(),
+                "violations": {name: violations[:, j].tolist() for j, name in enumerate(VIOLATION_TYPES)},
+                "totals": {
+                    "vehicles": int(vehicles.sum()),
+                    "violations": int(violations.sum()),
+                },
+            }
+        return {
+            "camera": self.camera,
+            "resolution": resolution,
+            "bucket_seconds": ring.width,
+            "bucket_starts": starts.tolist(),
+            "speed_bins_kmh": self.speed_bins.tolist(),
+            "lanes": lanes,
+        }
+
+# Per-camera rollups, kept across stream reconnects: {camera: TrafficRollups}
+_rollups = {}
+_rollups_lock = threading.Lock()
+
+def get_rollups(camera, lane_names=None):
+    """Returns the camera's rollups, creating them on first use (lane_names required then)."""
+    with _rollups_lock:
+        rollups = _rollups.get(camera)
+        if rollups is None and lane_names is not None:
+            rollups = _rollups[camera] = TrafficRollups(camera, lane_names)
+        return rollups
+
+def all_rollups():
+    """Returns: {camera: TrafficRollups} for every camera that has streamed."""
+    with _rollups_lock:
+        return dict(_rollups)
@@ -1,21 +1,47 @@
 # app.py
-from flask import Flask, render_template, Response, jsonify, send_from_directory
+from flask import Flask, render_template, Response, jsonify, send_from_directory, request
 import cv2
+import numpy as np
 import time
 import os
+import threading
 import uuid
 import datetime
-from ultralytics import YOLO
-from utils.config import VIDEO_SOURCE, PROJECT_ROOT, MODEL_PATH, VEHICLE_CLASSES
+from utils.config import VIDEO_SOURCE, PROJECT_ROOT, MODEL_PATH, VEHICLE_CLASSES, INFERENCE_CACHE_ENABLED, MODEL_PRELOAD_ENABLED
+from utils.config import REID_ENABLED, PACE_TO_SOURCE_FPS, MAX_READ_FAILURES
+from utils.config import SCHEDULER_ENABLED, SCHEDULER_BUDGET_FRACTION, SCHEDULER_SPEED_MARGIN, SCHEDULER_STOP_LINE_MARGIN
+from utils.config import CLUSTER_ROLE, CLUSTER_WORKER_ID, CLUSTER_TRANSPORT
+from utils.config import MOSAIC_WIDTH, MOSAIC_HEIGHT, MOSAIC_FPS, MOSAIC_MAX_WIDTH, MOSAIC_MAX_FPS
+from utils.config import CASCADE_LOW_CONF, CASCADE_SMALL_HEIGHT, CASCADE_TILE_SIZE, CASCADE_MAX_TILES, CASCADE_NMS_IOU
+from utils.camera_config import get_camera_config
+from utils import metrics
+from utils import storage, system_state
+from utils.model_loader import get_model, preload_models
+from utils.cpu_budget import get_cpu_budget
 
 # Import the new modules we built
 from speed_calculation import SpeedTracker
-from violation import ViolationDetector, LANE_1_LIMIT, LANE_2_LIMIT, LANE_DIVIDER_X
-from plate_generator import PlateManager
-from helmet_detector import HelmetDetector
-from traffic_light import TrafficLight
+from core.speed_estimator import SpeedEstimator
+from violation import ViolationDetector
+from plate_generator import PlateManager, PLATE_MODEL_PATH
+from helmet_detector import HelmetDetector, HELMET_MODEL_PATH
+from traffic_light import TrafficLight, VisionTrafficLight
 from red_light_detector import RedLightDetector
+from clip_recorder import ClipRecorder
+from track_registry import TrackRegistry
+from inference_cache import InferenceCache, source_frame_index
+from cascade_detector import CascadeDetector
+from analytics import get_rollups, all_rollups
+from frame_store import get_latest_frame
+from mosaic import get_mosaic_stream
+from camera_pipeline import FramePacer, get_pipeline, all_pipelines
+from cluster import Coordinator, Worker, merge_stats, relay_stream
+from cluster_transport import get_transport
+from reid import ReIdentifier
+from inference_scheduler import InferenceScheduler, helmet_priority, plate_priority
 import database
+import snapshot
+import challan
 
 # Define paths for frontend
 TEMPLATE_DIR = os.path.join(PROJECT_ROOT, 'frontend', 'templates')
@@ -25,6 +51,9 @@ app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
 
 # Constants
 VIDEO_DIR = os.path.join(PROJECT_ROOT, "videos")
+# Frame versions restart with every process: ETags carry this token so a restarted
+# server (or another worker process) never matches a cached frame's ETag
+PROCESS_TOKEN = uuid.uuid4().hex[:8]
 
 def get_available_videos():
     """List all valid video files in the videos directory."""
@@ -34,15 +63,36 @@ def get_available_videos():
         return []
     return [f for f in os.listdir(VIDEO_DIR) if f.lower().endswith(valid_extensions)]
 
+# Cluster mode: the coordinator serves cameras that live on its workers
+coordinator = Coordinator(get_transport(CLUSTER_TRANSPORT)) if CLUSTER_ROLE == "coordinator" else None
+
+def get_cameras():
+    """Cameras this server can show: its own videos, or (coordinator) those of its live workers."""
+    return coordinator.cameras() if coordinator else get_available_videos()
+
 # Global Statistics
 stats = {
     "total_vehicles": 0,
     "violations": 0,
     "current_speed_avg": 0,
-    "recent_violations": []
+    "recent_violations": [],
+    "clip_buffer_bytes": {},
+    "tracks": {},
+    "scheduler": {}
 }
 
+def start_model_preload(background=True):
+    """
+    Loads and warms the vehicle, helmet and plate models (in a background thread by default).
+    The first stream then picks up warm instances instead of loading them itself.
+    """
+    specs = [(MODEL_PATH, (384, 640, 3)), (HELMET_MODEL_PATH, (64, 64, 3))]
+    if os.path.exists(PLATE_MODEL_PATH):
+        specs.append((PLATE_MODEL_PATH, (160, 160, 3)))
+    return preload_models(specs, background=background)
+
 def generate_frames(video_file):
+    stream_start = time.perf_counter()
     video_path = os.path.join(VIDEO_DIR, video_file)
     cap = cv2.VideoCapture(video_path)
     
@@ -52,13 +102,66 @@ def generate_frames(video_file):
 
     # Initialize PER-STREAM instances to ensure isolated tracking state
     # YOLO persistence relies on the model instance (or explicit session reset, but new instance is safest)
-    local_model = YOLO(MODEL_PATH)
-    local_speed_tracker = SpeedTracker()
-    local_violation_detector = ViolationDetector()
-    local_plate_manager = PlateManager()
-    local_helmet_detector = HelmetDetector()
-    local_traffic_light = TrafficLight()
-    local_red_light_detector = RedLightDetector(stop_line_y=500) # Defined 500 as virtual stop line
+    local_model = get_model(MODEL_PATH)
+
+    # Per-camera settings (lanes, limits, stop zones, calibration), compiled once
+    camera_config = get_camera_config(video_file)
+
+    # Source timing: speeds use the clip's own FPS; file sources are paced to it
+    # (live sources are paced by the device), so playback runs at real time instead of spinning
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    is_file_source = os.path.isfile(video_path)
+    source_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if is_file_source else 0
+    pacer = FramePacer(source_fps) if PACE_TO_SOURCE_FPS and is_file_source else None
+
+    # Speed Model: homography (if this camera is calibrated) or flat meters-per-pixel
+    # The perspective matrix is computed once here, not per frame.
+    local_speed_estimator = None
+    calibration = camera_config.calibration
+    if calibration:
+        local_speed_estimator = SpeedEstimator(calibration['source_points'], calibration['real_width'], calibration['real_height'])
+        # Bird's-eye coordinates are `scale` pixels per meter
+        local_speed_tracker = SpeedTracker(meters_per_pixel=1.0 / local_speed_estimator.scale, fps=source_fps)
+        print(f"[SPEED] {video_file}: using homography speed model")
+    else:
+        local_speed_tracker = SpeedTracker(fps=source_fps)
+    # Evidence clip ring buffer (pre-event history for this camera)
+    local_clip_recorder = ClipRecorder(source_fps=source_fps)
+    # Opt-in: replay model outputs recorded in an earlier run of this clip
+    local_inference_cache = InferenceCache(video_path) if INFERENCE_CACHE_ENABLED else None
+    local_violation_detector = ViolationDetector(clip_recorder=local_clip_recorder, camera_config=camera_config)
+    local_plate_manager = PlateManager(inference_cache=local_inference_cache)
+    local_helmet_detector = HelmetDetector(clip_recorder=local_clip_recorder, inference_cache=local_inference_cache)
+    # Signal state: read from the signal head ROI if configured, simulated cycle otherwise
+    if camera_config.traffic_light:
+        local_traffic_light = VisionTrafficLight(**camera_config.traffic_light)
+        print(f"[SIGNAL] {video_file}: reading signal state from ROI {local_traffic_light.roi}")
+    else:
+        local_traffic_light = TrafficLight()
+    # Virtual stop line (default y=500) unless this camera has per-approach stop zones
+    local_red_light_detector = RedLightDetector(stop_line_y=camera_config.stop_line_y, approaches=camera_config.stop_zones)
+
+    # Last encoded frame, served to dashboard thumbnails without another stream
+    local_latest_frame = get_latest_frame(video_file, create=True)
+
+    # Per-lane minute/hour analytics for this camera (kept across reconnects)
+    local_rollups = get_rollups(video_file, camera_config.lane_names)
+    # Tracks a previous session left open (it crashed): track IDs restart with this session
+    local_rollups.close_all()
+
+    # Re-identification: tracker IDs that fragment after an occlusion resume their old ID
+    local_reid = ReIdentifier() if REID_ENABLED else None
+
+    # Overload: per-track helmet/plate calls run by priority within the frame budget
+    local_scheduler = InferenceScheduler(video_file, SCHEDULER_BUDGET_FRACTION / source_fps if SCHEDULER_ENABLED else None)
+
+    # Track Lifecycle: evict per-track state of vehicles that left the scene
+    local_track_registry = TrackRegistry()
+    for component in (local_speed_tracker, local_violation_detector, local_plate_manager,
+                      local_helmet_detector, local_red_light_detector, local_rollups, local_reid, local_scheduler):
+        if component is not None:
+            local_track_registry.subscribe(component)
+    reset_epoch = system_state.get_reset_epoch()
     
     # Performance State
     frame_count = 0
@@ -68,72 +171,170 @@ def generate_frames(video_file):
     # Structure: [{'box': [x1, y1, x2, y2], 'id': int, 'cls': int}]
     last_detections = [] 
     
-    # Downscaling metrics (Calculated once)
+    # Downscaling target for YOLO input width
     TARGET_WIDTH = 640
-    scale_factor = 1.0
+
+    # Multi-scale cascade (per camera): coarse pass + full-res tiles, own ByteTrack instance
+    local_cascade = None
+    if camera_config.cascade:
+        local_cascade = CascadeDetector(local_model, base_width=TARGET_WIDTH, conf=0.5, classes=VEHICLE_CLASSES)
+        print(f"[DETECT] {video_file}: multi-scale cascade enabled")
+
+    if local_inference_cache:
+        cascade_params = [CASCADE_LOW_CONF, CASCADE_SMALL_HEIGHT, CASCADE_TILE_SIZE, CASCADE_MAX_TILES, CASCADE_NMS_IOU] if local_cascade else None
+        local_inference_cache.register("vehicle", MODEL_PATH, {
+            "conf": 0.5, "classes": VEHICLE_CLASSES, "tracker": "bytetrack.yaml",
+            "skip_frames": SKIP_FRAMES, "target_width": TARGET_WIDTH, "road_roi": camera_config.road_roi,
+            "cascade": cascade_params})
+
+    def track_vehicles(frame):
+        """
+        Runs the tracker on the downscaled road-ROI crop of the frame.
+        Without an ROI the crop is the whole frame. A narrower crop gets more
+        pixels per meter of road for the same YOLO input width.
+        Returns: [[x1, y1, x2, y2, track_id, cls], ...] in original frame coordinates,
+                 only for tracks whose centroid lies inside the ROI polygon.
+        """
+        height, width = frame.shape[:2]
+        rx1, ry1, rx2, ry2 = camera_config.roi_bounds(width, height)
+        crop = frame[ry1:ry2, rx1:rx2]
+
+        if local_cascade:
+            # 1. Cascade: downscaled pass, full-res tiles for small/uncertain objects, NMS, tracker
+            vehicle_inference.inc()
+            with stage_timers["track"].time():
+                boxes, track_ids, cls_ids = local_cascade.track(crop)
+            if local_cascade.last_tile_count:
+                fine_inference.inc(local_cascade.last_tile_count)
+        else:
+            # 1. Crop + Downscale for YOLO (Performance)
+            with stage_timers["resize"].time():
+                crop_w, crop_h = rx2 - rx1, ry2 - ry1
+                scale_factor = TARGET_WIDTH / crop_w if crop_w > TARGET_WIDTH else 1.0
+                if scale_factor < 1.0:
+                    small_frame = cv2.resize(crop, (int(crop_w * scale_factor), int(crop_h * scale_factor)))
+                else:
+                    small_frame = crop
+
+            vehicle_inference.inc()
+            with stage_timers["track"].time():
+                results = local_model.track(small_frame, persist=True, conf=0.5, classes=VEHICLE_CLASSES, verbose=False, tracker="bytetrack.yaml")
+            if results[0].boxes.id is None:
+                return []
+
+            boxes = results[0].boxes.xyxy.cpu().numpy()
+            track_ids = results[0].boxes.id.int().cpu().numpy()
+            cls_ids = results[0].boxes.cls.int().cpu().numpy()
+            if scale_factor < 1.0:
+                boxes = boxes / scale_factor
+
+        # 2. Map boxes back to original frame coordinates
+        boxes = (boxes + (rx1, ry1, rx1, ry1)).astype(int)
+
+        # 3. Drop detections whose centroid is outside the road ROI (before helmet/plate work)
+        centroids = np.stack([(boxes[:, 0] + boxes[:, 2]) // 2, (boxes[:, 1] + boxes[:, 3]) // 2], axis=1)
+        keep = camera_config.in_roi(centroids)
+        return [[*map(int, box), int(track_id), int(cls)]
+                for box, track_id, cls in zip(boxes[keep], track_ids[keep], cls_ids[keep])]
     
     # We need a unique lane identifier for the logs
     lane_id = video_file
 
+    # Metrics: resolve label children once so the hot path is just a bisect + add
+    stage_timers = {name: metrics.STAGE_LATENCY.labels(lane_id, name) for name in
+                    ("decode", "resize", "track", "helmet", "plate", "speed", "signal", "red_light", "overspeed", "encode", "frame")}
+    frames_counter = metrics.FRAMES_TOTAL.labels(lane_id)
+    fps_gauge = metrics.CAMERA_FPS.labels(lane_id)
+    vehicle_inference = metrics.INFERENCE_CALLS.labels("vehicle")
+    fine_inference = metrics.INFERENCE_CALLS.labels("vehicle_tile")
+    fps_window_start, fps_window_frames = time.time(), 0
+    first_frame_pending = True
+    read_failures = 0
+
     while cap.isOpened():
-        success, frame = cap.read()
+        if pacer:
+            pacer.wait()
+        frame_start = time.perf_counter()
+        # Position in the source: inference cache key (repeats on every loop of a file)
+        source_index = source_frame_index(cap)
+        with stage_timers["decode"].time():
+            success, frame = cap.read()
         if not success:
+            # Reaching the end of a file is a normal loop, not a dropped frame
+            at_end = is_file_source and source_index >= source_frames - 1
+            metrics.FRAMES_DROPPED.labels(lane_id, "eof_loop" if at_end else "read_failed").inc()
+            read_failures += 1
+            if read_failures >= MAX_READ_FAILURES:
+                # Unreadable source (not a loop): end the stream, the pipeline reopens it later
+                print(f"[ERROR] {video_file}: {read_failures} consecutive failed reads, closing source.")
+                break
             cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # Loop video
+            # Next pass starts in the same detection phase as the first (same frames hit the cache)
+            frame_count += -frame_count % SKIP_FRAMES
             continue
             
+        read_failures = 0
         frame_count += 1
-        
-        # Calculate scale factor once
-        height, width = frame.shape[:2]
-        if scale_factor == 1.0 and width > TARGET_WIDTH:
-             scale_factor = TARGET_WIDTH / width
-             
-        # 1. Downscale for YOLO (Performance)
-        if scale_factor < 1.0:
-            small_frame = cv2.resize(frame, (int(width * scale_factor), int(height * scale_factor)))
-        else:
-            small_frame = frame
+        frames_counter.inc()
+        local_scheduler.begin_frame(frame_count, frame_start, frames=SKIP_FRAMES if frame_count % SKIP_FRAMES == 0 else 1)
+        fps_window_frames += 1
+        if time.time() - fps_window_start >= 1.0:
+            fps_gauge.set(round(fps_window_frames / (time.time() - fps_window_start), 1))
+            fps_window_start, fps_window_frames = time.time(), 0
 
-        # 2. Track (Frame Skipping)
+        # History cleared? Drop per-track state (checked once per frame, not per detector call)
+        if reset_epoch != system_state.get_reset_epoch():
+            reset_epoch = system_state.get_reset_epoch()
+            local_track_registry.clear()
+            local_violation_detector.reset()
+            local_helmet_detector.reset()
+            local_rollups.reset()
+            local_scheduler.reset()
+            print(f"[SYSTEM] {lane_id}: per-track state reset (epoch {reset_epoch}).")
+        
+        # 1-2. Crop/Downscale + Track (Frame Skipping)
         current_detections = []
         
         if frame_count % SKIP_FRAMES == 0:
-            # Run Heavy Detection
-            results = local_model.track(small_frame, persist=True, conf=0.5, classes=VEHICLE_CLASSES, verbose=False, tracker="bytetrack.yaml")
-            
-            if results[0].boxes.id is not None:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                track_ids = results[0].boxes.id.int().cpu().numpy()
-                cls_ids = results[0].boxes.cls.int().cpu().numpy()
-                
-                # Rescale boxes back to original frames
-                for box, track_id, cls in zip(boxes, track_ids, cls_ids):
-                    # Scale back
-                    if scale_factor < 1.0:
-                         box = box / scale_factor
-                         
-                    x1, y1, x2, y2 = map(int, box)
-                    
-                    # Run Helmet Detection (Synced with Detection Frame)
-                    # Throttle: Run every 2nd detection cycle (approx every 6 frames if SKIP=3)
-                    # We store the result to reuse it for skipped frames too
-                    h_status = "UNKNOWN"
-                    is_h_violation = False
-                    head_bbox = None
-                    
-                    # Logic: Only check if it's a bike
-                    if int(cls) in [1, 3]:
-                        # Optional: Further throttle if needed, but per-detection-frame is safest
-                        h_status, is_h_violation, head_bbox = local_helmet_detector.detect(int(track_id), frame, (x1, y1, x2, y2), plate=None)
-                    
-                    current_detections.append({
-                        'box': [x1, y1, x2, y2],
-                        'id': int(track_id),
-                        'cls': int(cls),
-                        'helmet': (h_status, is_h_violation, head_bbox)
-                    })
+            # Run Heavy Detection (or replay it from the inference cache)
+            if local_inference_cache:
+                tracked = local_inference_cache.lookup("vehicle", source_index, lambda: track_vehicles(frame))
+            else:
+                tracked = track_vehicles(frame)
+
+            # Stitch fragmented IDs (canonical IDs from here on)
+            if local_reid:
+                tracked = local_reid.update(frame, tracked, frame_count)
+                if local_reid.last_merged:
+                    local_speed_tracker.resume_tracks(local_reid.last_merged)
+                    metrics.REID_MERGES.labels(lane_id).inc(len(local_reid.last_merged))
+
+            # Run Helmet Detection (Synced with Detection Frame) for bikes only, by priority;
+            # deferred/shed calls reuse the track's last result (never as a new violation)
+            # We store the result to reuse it for skipped frames too
+            with stage_timers["helmet"].time():
+                helmet_results = local_scheduler.run("helmet", [
+                    (track_id, helmet_priority(local_helmet_detector, track_id),
+                     lambda track_id=track_id, bbox=(x1, y1, x2, y2): local_helmet_detector.detect(track_id, frame, bbox, plate=None, frame_index=source_index))
+                    for x1, y1, x2, y2, track_id, cls in tracked if cls in [1, 3]],
+                    fallback=lambda track_id, last: (last[0], False, last[2]) if last else ("UNKNOWN", False, None))
+
+            for x1, y1, x2, y2, track_id, cls in tracked:
+                current_detections.append({
+                    'box': [x1, y1, x2, y2],
+                    'id': track_id,
+                    'cls': cls,
+                    'helmet': helmet_results.get(track_id, ("UNKNOWN", False, None))
+                })
             
             last_detections = current_detections
+
+            # Evict state of tracks unseen for TRACK_TTL_FRAMES
+            local_track_registry.update(frame_count, [det['id'] for det in current_detections])
+            stats.setdefault("tracks", {})[lane_id] = local_track_registry.get_stats()
+            if local_reid:
+                stats["tracks"][lane_id]["reid_merged"] = local_reid.merged_total
+            metrics.LIVE_TRACKS.labels(lane_id).set(stats["tracks"][lane_id]["live"])
         else:
             # Reuse previous detections
             current_detections = last_detections
@@ -141,19 +342,73 @@ def generate_frames(video_file):
         annotated_frame = frame.copy()
         
         # Draw Lane Info and Traffic Light Elements
-        cv2.line(annotated_frame, (LANE_DIVIDER_X, 0), (LANE_DIVIDER_X, 720), (255, 255, 0), 2)
-        cv2.putText(annotated_frame, f"L1 ({LANE_1_LIMIT})", (100, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-        cv2.putText(annotated_frame, f"L2 ({LANE_2_LIMIT})", (740, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+        camera_config.draw_lanes(annotated_frame)
         cv2.putText(annotated_frame, f"Cam: {lane_id}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        if local_speed_estimator:
+            local_speed_estimator.draw_projected_roi(annotated_frame)
         
+        # Signal state (sampled from the raw frame, before any overlay is drawn on it)
+        with stage_timers["signal"].time():
+            current_light_state = local_traffic_light.update(frame, frame_count)
+
         # Draw Traffic Light
         annotated_frame = local_traffic_light.draw(annotated_frame)
         local_red_light_detector.draw_overlay(annotated_frame)
-        current_light_state = local_traffic_light.get_state()
 
         current_speeds_frame = []
 
-        for det in current_detections:
+        # 1. Calculate Speed for all tracks at once (only on new detection frames)
+        frame_speeds = {}
+        if frame_count % SKIP_FRAMES == 0 and current_detections:
+            # Time elapsed = SKIP_FRAMES * (1/FPS), in source time (independent of processing speed)
+            dt = SKIP_FRAMES / source_fps
+            ids = [det['id'] for det in current_detections]
+            with stage_timers["speed"].time():
+                if local_speed_estimator:
+                    # Foot points (bottom center) of all tracks -> road plane in one transform call
+                    foot_points = [((d['box'][0] + d['box'][2]) // 2, d['box'][3]) for d in current_detections]
+                    positions = local_speed_estimator.transform_points(foot_points)
+                else:
+                    positions = [((d['box'][0] + d['box'][2]) // 2, (d['box'][1] + d['box'][3]) // 2) for d in current_detections]
+                speeds = local_speed_tracker.calculate_speeds(ids, positions, time_elapsed=dt)
+            frame_speeds = dict(zip(ids, speeds.tolist()))
+
+        # 2.6 Red Light crossing test for all tracks at once
+        with stage_timers["red_light"].time():
+            rl_results = local_red_light_detector.detect_frame(
+                [det['id'] for det in current_detections],
+                [det['box'] for det in current_detections],
+                current_light_state)
+
+        # Lane membership for all tracks (single lookup in the precompiled lane map)
+        lane_indices = camera_config.lane_indices(
+            [((d['box'][0] + d['box'][2]) // 2, (d['box'][1] + d['box'][3]) // 2) for d in current_detections])
+
+        # Analytics rollups: new vehicles by class/lane, per-track speed samples (detection frames only)
+        if frame_count % SKIP_FRAMES == 0 and current_detections:
+            stats["total_vehicles"] += local_rollups.observe(
+                [det['id'] for det in current_detections], [det['cls'] for det in current_detections],
+                lane_indices, frame_speeds)
+
+        # Number plates for all tracks, by priority: tracks that may produce a violation on this
+        # frame (near their lane limit, approaching the stop line while not GREEN) always run
+        approaching = (local_red_light_detector.approaching([det['box'] for det in current_detections], SCHEDULER_STOP_LINE_MARGIN)
+                       if current_light_state != "GREEN" and current_detections else [False] * len(current_detections))
+        plate_requests = []
+        for det, lane_index, near_line in zip(current_detections, lane_indices, approaching):
+            track_id = det['id']
+            limit = camera_config.lane_limits[lane_index] if lane_index >= 0 else None
+            speed = frame_speeds.get(track_id, local_speed_tracker.get_last_speed(track_id))
+            critical = bool(near_line) or rl_results[track_id][1] or (limit is not None and speed >= limit * SCHEDULER_SPEED_MARGIN)
+            plate_requests.append((track_id, plate_priority(local_plate_manager, track_id, critical),
+                                   lambda track_id=track_id, box=tuple(det['box']): local_plate_manager.detect_and_assign(track_id, frame, box, frame_index=source_index)))
+        with stage_timers["plate"].time():
+            plate_results = local_scheduler.run("plate", plate_requests,
+                fallback=lambda track_id, last: (local_plate_manager.plate_data.get(str(track_id), {}).get('text'), last[1] if last else None))
+        if frame_count % SKIP_FRAMES == 0:
+            stats.setdefault("scheduler", {})[lane_id] = local_scheduler.get_stats()
+
+        for det, lane_index in zip(current_detections, lane_indices):
             x1, y1, x2, y2 = det['box']
             track_id = det['id']
             cls = det['cls']
@@ -161,16 +416,12 @@ def generate_frames(video_file):
             cx = (x1 + x2) // 2
             cy = (y1 + y2) // 2
                 
-            # 0. Get/Assign Number Plate (Run Detection/Localization)
-            plate, plate_bbox = local_plate_manager.detect_and_assign(track_id, frame, (x1, y1, x2, y2))
+            # 0. Number Plate (scheduled above)
+            plate, plate_bbox = plate_results[track_id]
             
-            # 1. Calculate Speed
-            # Only update speed if we are processing a new frame set (not reused)
-            if frame_count % SKIP_FRAMES == 0:
-                 # Time elapsed = SKIP_FRAMES * (1/FPS)
-                 # Assuming 30 FPS fixed in tracker default
-                 dt = SKIP_FRAMES * (1.0 / 30.0) 
-                 speed = local_speed_tracker.calculate_speed(track_id, (cx, cy), time_elapsed=dt)
+            # 1. Speed (batch result on detection frames)
+            if track_id in frame_speeds:
+                 speed = frame_speeds[track_id]
             else:
                  # Reuse last known speed for visualization on skipped frames
                  speed = local_speed_tracker.get_last_speed(track_id)
@@ -179,15 +430,20 @@ def generate_frames(video_file):
                 current_speeds_frame.append(speed)
             
             # 2. Check Speed Violation
-            is_violation, lane_name, limit = local_violation_detector.check_violation(track_id, speed, (cx, cy), frame, (x1, y1, x2, y2), plate=plate)
+            already_violated = track_id in local_violation_detector.violated_vehicles
+            with stage_timers["overspeed"].time():
+                is_violation, lane_name, limit = local_violation_detector.check_violation(track_id, speed, (cx, cy), frame, (x1, y1, x2, y2), plate=plate, lane_index=int(lane_index))
+            if is_violation and not already_violated:
+                metrics.VIOLATIONS_TOTAL.labels(lane_id, "Overspeed").inc()
+                local_rollups.record_violation(lane_index, "Overspeed")
             
             # 2.5 Check Helmet Violation (Motorcycles only)
             # Retrieved from synchronized detection loop
             helmet_status, is_helmet_violation, head_bbox = det.get('helmet', ("UNKNOWN", False, None))
 
             # 2.6 Check Red Light Violation
-            # Check for all vehicle types
-            rl_status, is_rl_violation = local_red_light_detector.detect(track_id, (x1, y1, x2, y2), current_light_state)
+            # Check for all vehicle types (evaluated above for the whole frame)
+            rl_status, is_rl_violation = rl_results[track_id]
 
             # 3. Visualize
             color = (0, 255, 0)
@@ -227,6 +483,7 @@ def generate_frames(video_file):
                 from challan import generate_challan
                 
                 snapshot_path = capture_snapshot(frame, track_id, speed_val, (x1,y1,x2,y2))
+                local_clip_recorder.trigger(snapshot_path)
                 
                 # Generate Challan
                 c_data = {
@@ -259,9 +516,15 @@ def generate_frames(video_file):
                         stats["recent_violations"].pop()
 
             if is_rl_violation:
+                metrics.VIOLATIONS_TOTAL.labels(lane_id, "Red Light").inc()
+                local_rollups.record_violation(lane_index, "Red Light")
                 log_violation("Red Light", speed)
                 
             if is_helmet_violation:
+                # Helmet results are reused on skipped frames; count them once per detection frame
+                if frame_count % SKIP_FRAMES == 0:
+                    metrics.VIOLATIONS_TOTAL.labels(lane_id, "No Helmet").inc()
+                    local_rollups.record_violation(lane_index, "No Helmet")
                 stats["violations"] += 1
                 new_log = {
                     "time": datetime.datetime.now().strftime("%H:%M:%S"),
@@ -308,11 +571,36 @@ def generate_frames(video_file):
             frame_avg = sum(current_speeds_frame) / len(current_speeds_frame)
             stats["current_speed_avg"] = round((stats["current_speed_avg"] * 0.9) + (frame_avg * 0.1), 1)
 
+        # Feed evidence clip buffer (sampled + encoded at clip resolution inside)
+        local_clip_recorder.push(annotated_frame)
+        stats.setdefault("clip_buffer_bytes", {})[lane_id] = local_clip_recorder.memory_usage()
+
+        metrics.QUEUE_DEPTH.labels(lane_id, "clip_pending").set(len(local_clip_recorder.pending))
+
         # Encode
-        ret, buffer = cv2.imencode('.jpg', annotated_frame)
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+        with stage_timers["encode"].time():
+            ret, buffer = cv2.imencode('.jpg', annotated_frame)
+            frame_bytes = buffer.tobytes()
+        local_latest_frame.publish(annotated_frame, frame_bytes)
+        stage_timers["frame"].observe(time.perf_counter() - frame_start)
+        if first_frame_pending:
+            # Cold-start cost seen by the client: model loading + first (slow) inference
+            first_frame_pending = False
+            ttff = time.perf_counter() - stream_start
+            metrics.TIME_TO_FIRST_FRAME.labels(lane_id).set(round(ttff, 3))
+            print(f"[STARTUP] {video_file}: first frame after {ttff:.2f}s")
+        try:
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+        except GeneratorExit:
+            # Stream closed (idle pipeline released or server shutdown): persist buffered cache entries
+            # and close this session's tracks in the shared rollups
+            if local_inference_cache:
+                local_inference_cache.flush()
+            local_rollups.close_all()
+            raise
+    cap.release()
+    local_rollups.close_all() # source closed
 
 @app.route('/')
 def index():
@@ -320,72 +608,198 @@ def index():
 
 @app.route('/api/lanes')
 def get_lanes():
-    return jsonify(get_available_videos())
+    return jsonify(get_cameras())
 
 @app.route('/video_feed/<filename>')
 def video_feed(filename):
     # Security check: ensure filename is just a name, not a path traversal
     safe_name = os.path.basename(filename)
-    if safe_name not in get_available_videos():
+    if safe_name not in get_cameras():
          return "Video not found", 404
-         
-    return Response(generate_frames(safe_name), mimetype='multipart/x-mixed-replace; boundary=frame')
+    if coordinator:
+        # Frames arrive from the worker running this camera
+        return Response(relay_stream(safe_name), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+    # Viewers of the same camera share one pipeline (suspended again when the last one leaves)
+    pipeline = get_pipeline(safe_name, generate_frames)
+    return Response(pipeline.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/pipelines')
+def get_pipelines():
+    """State (running/suspended/stopped), viewer count and enforcement duty of every camera pipeline."""
+    return jsonify({camera: pipeline.get_status() for camera, pipeline in all_pipelines().items()})
+
+@app.route('/video_feed/mosaic')
+def video_feed_mosaic():
+    """
+    Latest frames of several cameras tiled into one MJPEG stream.
+    Query: cameras=a.mp4,b.mp4 (default: all), width, height, fps.
+    """
+    available = get_cameras()
+    requested = request.args.get("cameras")
+    cameras = [os.path.basename(c) for c in requested.split(",")] if requested else sorted(available)
+    cameras = [c for c in cameras if c in available]
+    if not cameras:
+        return "No cameras selected", 404
+    width = min(max(request.args.get("width", MOSAIC_WIDTH, type=int), 160), MOSAIC_MAX_WIDTH)
+    height = min(max(request.args.get("height", MOSAIC_HEIGHT, type=int), 90), MOSAIC_MAX_WIDTH)
+    fps = min(max(request.args.get("fps", MOSAIC_FPS, type=int), 1), MOSAIC_MAX_FPS)
+
+    # The mosaic keeps its cameras' pipelines running while it has viewers
+    sources = [] if coordinator else [get_pipeline(camera, generate_frames) for camera in cameras]
+    stream = get_mosaic_stream(cameras, width, height, fps, sources=sources)
+    return Response(stream.frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/frame/<camera>/latest.jpg')
+def latest_frame(camera):
+    """
+    Most recent frame of a running stream, from memory (no inference or extra encode).
+    Query: width=N for a cached thumbnail. Supports If-None-Match / If-Modified-Since.
+    """
+    latest = get_latest_frame(os.path.basename(camera))
+    if latest is None:
+        return "No frame yet for this camera", 404
+    width = request.args.get("width", type=int)
+    jpeg, version, timestamp = latest.get(width)
+    if jpeg is None:
+        return "No frame yet for this camera", 404
+
+    response = Response(jpeg, mimetype='image/jpeg')
+    response.set_etag(f"{PROCESS_TOKEN}-{version}-{width or 'full'}")
+    response.last_modified = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    response.cache_control.no_cache = True # always revalidate; unchanged frames cost a 304
+    return response.make_conditional(request)
 
 @app.route('/api/stats')
 def get_stats():
     # Refresh stats from DB
     all_violations = database.get_all_violations()
     stats["violations"] = len(all_violations)
+    if coordinator:
+        # Traffic counters come from the workers' heartbeats
+        return jsonify(merge_stats(stats, coordinator.worker_stats()))
     return jsonify(stats)
 
+@app.route('/api/resources')
+def get_resources():
+    """CPU core budget: cores and intra-op threads per running camera pipeline."""
+    budget = get_cpu_budget()
+    return jsonify(budget.allocation() if budget else {"enabled": False})
+
+@app.route('/api/cluster')
+def get_cluster():
+    """Role of this server and, on a coordinator, the live workers and their cameras."""
+    return jsonify({"role": CLUSTER_ROLE, "workers": coordinator.get_status() if coordinator else {}})
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Prometheus text-format metrics (per-camera frame rate, stage latency, inference calls, ...)."""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def analytics_overview():
+    """Returns: {camera: {lane: totals}} over the last hour (minute rollups) of this node's cameras."""
+    overview = {}
+    for camera, rollups in all_rollups().items():
+        summary = rollups.summary("minute")
+        overview[camera] = {lane: data["totals"] for lane, data in summary["lanes"].items()}
+    return overview
+
+@app.route('/api/analytics')
+def get_analytics_overview():
+    """Vehicle and violation totals per camera and lane over the last hour (minute rollups)."""
+    if coordinator:
+        # Rollups live on the workers; their totals arrive with the heartbeats
+        return jsonify(merge_stats({"analytics": {}}, coordinator.worker_stats())["analytics"])
+    return jsonify(analytics_overview())
+
+@app.route('/api/analytics/<camera>')
+def get_analytics(camera):
+    """
+    Per-lane time series for one camera.
+    Query: resolution=minute|hour (default minute), buckets=N (default: whole ring).
+    """
+    rollups = all_rollups().get(os.path.basename(camera))
+    if rollups is None:
+        return jsonify({"error": "No analytics for this camera yet"}), 404
+    resolution = request.args.get("resolution", "minute")
+    if resolution not in rollups.rings:
+        return jsonify({"error": "resolution must be 'minute' or 'hour'"}), 400
+    buckets = request.args.get("buckets", type=int)
+    return jsonify(rollups.summary(resolution, buckets))
+
 @app.route('/api/violations')
 def get_violations_api():
     return jsonify(database.get_all_violations())
 
 @app.route('/download/challan/<filename>')
 def download_challan(filename):
-    # Securely serve the file from the challans directory
-    challan_dir = os.path.join(PROJECT_ROOT, "challans")
+    # Securely serve the file from the current generation of the challans directory
+    challan_dir = storage.generation_dir(challan.CHALLAN_DIR)
     return send_from_directory(challan_dir, filename, as_attachment=True)
 
-@app.route('/api/clear_history', methods=['POST'])
-def clear_history():
-    """Clears all system history: violations, files, stats."""
-    import glob
-    from utils import system_state
-    
-    # 1. Clear Database
-    database.clear_all_data()
-    
-    # 2. Clear Files (Challans & Snapshots)
-    # Define directories
-    challan_dir = os.path.join(PROJECT_ROOT, "challans")
-    snapshot_dir = os.path.join(PROJECT_ROOT, "snapshots")
-    
-    # Remove files safely
-    for folder in [challan_dir, snapshot_dir]:
-        if os.path.exists(folder):
-            files = glob.glob(os.path.join(folder, "*"))
-            for f in files:
-                try:
-                    os.remove(f)
-                except Exception as e:
-                    print(f"Error deleting {f}: {e}")
-                    
-    # 3. Reset Global Stats
+def purge_old_evidence():
+    """Deletes evidence/DB generations other than the current one in a background thread."""
+    return storage.purge_in_background([challan.CHALLAN_DIR, snapshot.SNAPSHOT_DIR], [database.DB_FILE])
+
+def reset_stats():
+    """Zeroes the dashboard stats and rollups and starts a new reset epoch. Returns: the epoch."""
     global stats
     stats = {
         "total_vehicles": 0,
         "violations": 0,
         "current_speed_avg": 0,
-        "recent_violations": []
+        "recent_violations": [],
+        "clip_buffer_bytes": {},
+        "tracks": {},
+        "scheduler": {}
     }
+
+    for rollups in all_rollups().values():
+        rollups.reset()
+
+    return system_state.advance_reset_epoch()
+
+def run_worker():
+    """Worker node: pipelines for the cameras the coordinator assigns; violations go to the coordinator."""
+    worker = Worker(CLUSTER_WORKER_ID, get_transport(CLUSTER_TRANSPORT), get_available_videos(),
+                    pipeline_for=lambda camera: get_pipeline(camera, generate_frames),
+                    stats_fn=lambda: dict(stats, analytics=analytics_overview()), on_reset=reset_stats)
+    database.set_violation_sink(worker.send_violation)
+    worker.run()
+
+@app.route('/api/clear_history', methods=['POST'])
+def clear_history():
+    """
+    Clears all system history: violations, files, stats.
+    Returns immediately: new writes go to a fresh storage generation and the
+    old files are deleted in the background.
+    """
+    # 1. Switch Storage Generation (new empty DB partition + evidence dirs)
+    generation = storage.advance_generation()
+
+    # 2. Reset Global Stats and signal reset to running pipelines (workers see it in their assignment)
+    epoch = reset_stats()
+
+    # 3. Delete the previous generation(s) in the background
+    purge_old_evidence()
     
-    # 4. Signal Reset to Detectors
-    system_state.set_reset_time()
-    
-    print("[SYSTEM] History cleared successfully.")
-    return jsonify({"status": "success", "message": "History cleared"})
+    print(f"[SYSTEM] History cleared (storage generation {generation}, reset epoch {epoch}).")
+    return jsonify({"status": "success", "message": "History cleared", "generation": generation, "epoch": epoch})
 
 if __name__ == '__main__':
+    purge_old_evidence() # leftovers of a purge interrupted by a restart
+    if CLUSTER_ROLE == "worker":
+        if MODEL_PRELOAD_ENABLED:
+            start_model_preload()
+        run_worker()
+        raise SystemExit
+    if coordinator:
+        threading.Thread(target=coordinator.run, daemon=True, name="cluster-coordinator").start()
+    else:
+        if MODEL_PRELOAD_ENABLED:
+            start_model_preload()
+        # Cameras with enforcement duty record violations even when nobody is watching
+        for camera in get_available_videos():
+            if get_camera_config(camera).enforce:
+                get_pipeline(camera, generate_frames).set_enforce(True)
     app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,140 @@
+"""
+Bulk challan re-render / backfill.
+
+Re-renders the challan PDF of every stored violation across a process pool,
+e.g. after the layout, fine amount or location text in challan.generate_challan
+changed. A record is skipped when its PDF exists and was rendered from the same
+content fingerprint: record fields + snapshot file + challan.py source.
+
+Completed renders are appended to a manifest next to the PDFs as they finish,
+so an interrupted run picks up where it stopped.
+
+Usage (from backend/):
+    python backfill_challans.py                 # render what is missing or out of date
+    python backfill_challans.py --workers 8
+    python backfill_challans.py --dry-run       # only count what would be rendered
+    python backfill_challans.py --force         # ignore the manifest
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import challan
+import database
+from utils import storage
+
+MANIFEST_NAME = "render_manifest.jsonl"
+# Record fields that end up on the PDF
+RENDERED_FIELDS = ("id", "plate", "timestamp", "speed", "limit", "lane", "violation_type", "snapshot_path")
+
+def template_fingerprint():
+    """Hash of challan.py: any change to the layout/fine/location text invalidates every PDF."""
+    with open(challan.__file__, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+def record_key(record):
+    """Stable identity of a violation record."""
+    return f"{record.get('id')}|{record.get('timestamp')}|{record.get('violation_type', '')}"
+
+def record_fingerprint(record, template):
+    """Content fingerprint of one challan: rendered fields, snapshot file (size/mtime) and template."""
+    fields = {name: record.get(name) for name in RENDERED_FIELDS}
+    snapshot_path = record.get('snapshot_path')
+    if snapshot_path and os.path.exists(snapshot_path):
+        st = os.stat(snapshot_path)
+        fields["snapshot_file"] = [st.st_size, int(st.st_mtime)]
+    payload = json.dumps(fields, sort_keys=True, default=str) + template
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def load_manifest(path):
+    """Returns: {record_key: (fingerprint, pdf_path)} from earlier (possibly interrupted) runs."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # partially written last line of an interrupted run
+            done[entry["key"]] = (entry["fingerprint"], entry["path"])
+    return done
+
+def pending_records(manifest, template, force=False):
+    """Yields (key, fingerprint, record) for records whose PDF is missing or out of date."""
+    for record in database.iter_violations():
+        key = record_key(record)
+        fingerprint = record_fingerprint(record, template)
+        previous = manifest.get(key)
+        if not force and previous and previous[0] == fingerprint and os.path.exists(previous[1]):
+            continue
+        yield key, fingerprint, record
+
+def _init_worker(challan_dir):
+    if challan_dir:
+        challan.CHALLAN_DIR = challan_dir
+
+def _render(task):
+    """Worker: renders one challan. Returns: (key, fingerprint, path, error)."""
+    key, fingerprint, record = task
+    data = dict(record)
+    data.setdefault('limit', 0)
+    data.setdefault('lane', "N/A")
+    try:
+        return key, fingerprint, challan.generate_challan(data), None
+    except Exception as e:
+        return key, fingerprint, None, str(e)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render / backfill challan PDFs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--output-dir", help="Write PDFs here instead of the current challan directory")
+    parser.add_argument("--force", action="store_true", help="Re-render every record")
+    parser.add_argument("--dry-run", action="store_true", help="Report how many records need rendering")
+    parser.add_argument("--chunksize", type=int, default=4, help="Records handed to a worker at a time")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or storage.generation_dir(challan.CHALLAN_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    template = template_fingerprint()
+
+    total = sum(1 for _ in database.iter_violations())
+    tasks = pending_records(manifest, template, args.force)
+    if args.dry_run:
+        todo = sum(1 for _ in tasks)
+        print(f"[BACKFILL] {todo} of {total} challans need rendering ({total - todo} up to date).")
+        return
+
+    rendered = failed = 0
+    start = last_report = time.time()
+    with Pool(args.workers, initializer=_init_worker, initargs=(args.output_dir,)) as pool, \
+            open(manifest_path, 'a') as manifest_file:
+        for key, fingerprint, path, error in pool.imap_unordered(_render, tasks, chunksize=args.chunksize):
+            if error:
+                failed += 1
+                print(f"[BACKFILL] Failed {key}: {error}")
+            else:
+                rendered += 1
+                # One line per finished PDF, flushed: an interrupted run resumes from here
+                manifest_file.write(json.dumps({"key": key, "fingerprint": fingerprint, "path": path}) + "\n")
+                manifest_file.flush()
+            now = time.time()
+            if now - last_report >= 1.0:
+                last_report = now
+                print(f"[BACKFILL] {rendered + failed} rendered ({total} records) | {rendered / (now - start):.1f} challans/s")
+
+    elapsed = time.time() - start
+    skipped = total - rendered - failed
+    print(f"[BACKFILL] {rendered} rendered, {skipped} up to date, {failed} failed in {elapsed:.1f}s "
+          f"({rendered / elapsed if elapsed else 0:.1f} challans/s, {args.workers} workers)")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
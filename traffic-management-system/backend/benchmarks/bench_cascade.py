@@ -0,0 +1,143 @@
+"""
+Multi-scale cascade benchmark: CPU cost and small-object recall.
+
+Runs three detection modes over the same frames:
+  downscaled - single pass at TARGET_WIDTH (current default)
+  cascade    - CascadeDetector (downscaled pass + full-res tiles where needed)
+  full_res   - single pass at the native frame width
+The full-resolution detections serve as the reference; recall is measured on
+the reference objects shorter than CASCADE_SMALL_HEIGHT (distant vehicles and
+two-wheelers), matched by class with IoU >= 0.5.
+
+Usage (from backend/):
+    python benchmarks/bench_cascade.py --video ../videos/traffic.mp4 --frames 100
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import VIDEO_SOURCE, MODEL_PATH, VEHICLE_CLASSES, CASCADE_SMALL_HEIGHT
+from cascade_detector import CascadeDetector
+
+TARGET_WIDTH = 640
+TWO_WHEELERS = [1, 3]
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def matched(ref_boxes, ref_cls, boxes, cls, iou=0.5):
+    """Number of reference boxes found (same class, IoU >= iou)."""
+    ious = iou_matrix(ref_boxes, boxes)
+    same = ref_cls[:, None] == cls[None, :]
+    return int(np.count_nonzero(((ious >= iou) & same).any(axis=1))) if ious.size else 0
+
+def single_pass(model, frame, width):
+    h, w = frame.shape[:2]
+    scale = width / w if w > width else 1.0
+    img = cv2.resize(frame, (int(w * scale), int(h * scale))) if scale < 1.0 else frame
+    res = model.predict(img, imgsz=max(img.shape[:2]), conf=0.5, classes=VEHICLE_CLASSES, verbose=False)[0]
+    return res.boxes.xyxy.cpu().numpy() / scale, res.boxes.cls.cpu().numpy()
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-scale cascade cost/recall benchmark")
+    parser.add_argument("--video", default=VIDEO_SOURCE)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--stride", type=int, default=3, help="Use every Nth frame (detection frames)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    model = YOLO(MODEL_PATH)
+    cascade = CascadeDetector(model, base_width=TARGET_WIDTH, tracker=object()) # detect() only
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise SystemExit(f"Error: Could not open video {args.video}")
+
+    modes = ("downscaled", "cascade", "full_res")
+    times = {m: [] for m in modes}
+    found = {m: 0 for m in modes}
+    found_two_wheelers = {m: 0 for m in modes}
+    reference_small = reference_small_tw = 0
+    tiles = []
+    frame_index = used = 0
+
+    while used < args.frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frame_index += 1
+        if frame_index % args.stride:
+            continue
+        used += 1
+
+        t0 = time.perf_counter()
+        ref_boxes, ref_cls = single_pass(model, frame, frame.shape[1])
+        times["full_res"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        down_boxes, down_cls = single_pass(model, frame, TARGET_WIDTH)
+        times["downscaled"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        cas_boxes, _, cas_cls = cascade.detect(frame)
+        times["cascade"].append(time.perf_counter() - t0)
+        tiles.append(cascade.last_tile_count)
+
+        small = (ref_boxes[:, 3] - ref_boxes[:, 1]) < CASCADE_SMALL_HEIGHT
+        tw = small & np.isin(ref_cls, TWO_WHEELERS)
+        reference_small += int(small.sum())
+        reference_small_tw += int(tw.sum())
+        for mode, (boxes, cls) in (("full_res", (ref_boxes, ref_cls)), ("downscaled", (down_boxes, down_cls)),
+                                   ("cascade", (cas_boxes, cas_cls))):
+            found[mode] += matched(ref_boxes[small], ref_cls[small], boxes, cls)
+            found_two_wheelers[mode] += matched(ref_boxes[tw], ref_cls[tw], boxes, cls)
+    cap.release()
+
+    result = {
+        "video": os.path.basename(args.video),
+        "frames": used,
+        "reference_small_objects": reference_small,
+        "reference_small_two_wheelers": reference_small_tw,
+        "mean_tiles_per_frame": round(float(np.mean(tiles)), 2) if tiles else 0.0,
+        "modes": {},
+    }
+    print(f"{'mode':<11} | {'mean ms':>8} | {'p95 ms':>8} | {'small recall':>12} | {'2-wheeler recall':>16}")
+    print("-" * 68)
+    for mode in modes:
+        arr = np.asarray(times[mode]) * 1000.0
+        stats = {
+            "mean_ms": round(float(arr.mean()), 2) if arr.size else 0.0,
+            "p95_ms": round(float(np.percentile(arr, 95)), 2) if arr.size else 0.0,
+            "small_recall": round(found[mode] / reference_small, 3) if reference_small else None,
+            "small_two_wheeler_recall": round(found_two_wheelers[mode] / reference_small_tw, 3) if reference_small_tw else None,
+        }
+        result["modes"][mode] = stats
+        print(f"{mode:<11} | {stats['mean_ms']:>8.1f} | {stats['p95_ms']:>8.1f} | {str(stats['small_recall']):>12} | {str(stats['small_two_wheeler_recall']):>16}")
+
+    payload = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+CPU core budget benchmark: total FPS of N concurrent streams.
+
+Runs N camera pipelines (the same clip under N names, enforcement duty, no pacing)
+in a fresh interpreter per mode and counts frames over a fixed window:
+  free    - TMS_CPU_BUDGET=0: every stream's torch/OpenCV pools use every core
+  budget  - TMS_CPU_BUDGET=1: pipelines pinned to disjoint core slices (utils/cpu_budget.py)
+
+Usage (from backend/):
+    python benchmarks/bench_cpu_budget.py --video ../videos/traffic.mp4 --streams 8 --seconds 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from utils.config import VIDEO_SOURCE
+
+# Executed in the child interpreter; prints one JSON line
+CHILD = r"""
+import json, os, sys, tempfile, time
+sys.path.insert(0, {backend!r})
+import app
+from camera_pipeline import get_pipeline
+from utils.cpu_budget import get_cpu_budget
+
+sys.path.insert(0, os.path.join({backend!r}, "benchmarks"))
+from bench_pipeline import redirect_evidence_output
+redirect_evidence_output(tempfile.mkdtemp(prefix="bench_cpu_budget_"))
+app.PACE_TO_SOURCE_FPS = False # measure throughput, not real-time playback
+
+# N camera names for the same clip
+video_dir = tempfile.mkdtemp(prefix="bench_cpu_budget_videos_")
+cameras = []
+for i in range({streams!r}):
+    name = f"cam{{i + 1}}" + os.path.splitext({video!r})[1]
+    os.symlink({video!r}, os.path.join(video_dir, name))
+    cameras.append(name)
+app.VIDEO_DIR = video_dir
+
+pipelines = [get_pipeline(camera, app.generate_frames) for camera in cameras]
+for pipeline in pipelines:
+    pipeline.set_enforce(True)
+# Warm-up: every stream has produced frames (models loaded) before the window starts
+deadline = time.time() + 300
+while any(p.version < 10 for p in pipelines) and time.time() < deadline:
+    time.sleep(0.5)
+start_frames = [p.version for p in pipelines]
+start = time.perf_counter()
+time.sleep({seconds!r})
+elapsed = time.perf_counter() - start
+fps = [(p.version - f) / elapsed for p, f in zip(pipelines, start_frames)]
+budget = get_cpu_budget()
+print(json.dumps({{"total_fps": sum(fps), "min_stream_fps": min(fps), "max_stream_fps": max(fps),
+                   "allocation": budget.allocation() if budget else None}}))
+os._exit(0) # pipeline threads never return
+"""
+
+def run_child(video, streams, seconds, budget):
+    code = CHILD.format(backend=BACKEND_DIR, video=os.path.abspath(video), streams=streams, seconds=seconds)
+    env = dict(os.environ, TMS_CPU_BUDGET="1" if budget else "0")
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=BACKEND_DIR, env=env)
+    if proc.returncode != 0:
+        raise SystemExit(f"Child run failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU core budget benchmark (concurrent streams)")
+    parser.add_argument("--video", default=VIDEO_SOURCE)
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=30.0, help="Measurement window per mode")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    result = {"video": os.path.basename(args.video), "streams": args.streams, "cores": os.cpu_count(),
+              "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "modes": {}}
+    for mode, budget in (("free", False), ("budget", True)):
+        result["modes"][mode] = run_child(args.video, args.streams, args.seconds, budget)
+
+    print(f"{'mode':<7} | {'total FPS':>9} | {'min stream':>10} | {'max stream':>10}")
+    print("-" * 46)
+    for mode, r in result["modes"].items():
+        print(f"{mode:<7} | {r['total_fps']:>9.1f} | {r['min_stream_fps']:>10.1f} | {r['max_stream_fps']:>10.1f}")
+    free, budget = result["modes"]["free"]["total_fps"], result["modes"]["budget"]["total_fps"]
+    if free:
+        print(f"[BENCH] Budget vs free-for-all: {budget / free:.2f}x total FPS")
+
+    payload = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
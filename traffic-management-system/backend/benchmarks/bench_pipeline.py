@@ -0,0 +1,222 @@
+"""
+Stage-level performance benchmark for the violation pipeline.
+
+Runs a fixed local clip through app.generate_frames itself (same scheduler, re-id,
+cascade, speed model, signal, clip recorder and frame store as a live camera, no
+pacing) and reports per-stage p50/p95/p99 latency from the tms_stage_latency_seconds
+histograms, FPS and peak RSS as JSON. Percentiles are interpolated within histogram
+buckets (utils/metrics.py LATENCY_BUCKETS). The first --warmup frames (model loading,
+first inference) are left out. Results can be compared against a stored baseline so
+regressions stand out.
+
+Evidence output (snapshots, challans, plate crops, violation DB) is redirected
+to a temporary directory so benchmark runs never touch the real store.
+
+The table goes to stderr, the JSON to stdout (or --output).
+
+Usage (from backend/):
+    python benchmarks/bench_pipeline.py --video ../videos/traffic.mp4 --frames 300
+    python benchmarks/bench_pipeline.py --save-baseline        # store current run as baseline
+    python benchmarks/bench_pipeline.py --fail-on-regression   # exit 1 if slower than baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import VIDEO_SOURCE
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Stage names of app.generate_frames ("frame" is the whole frame, decode to encode)
+STAGES = ["decode", "resize", "track", "helmet", "plate", "speed", "signal", "red_light", "overspeed", "encode", "frame"]
+
+def stage_snapshot(camera):
+    """Returns: {stage: (bucket counts, sum, count)} of this camera's stage histograms."""
+    from utils import metrics
+    snapshot = {}
+    for name in STAGES:
+        child = metrics.STAGE_LATENCY.labels(camera, name)
+        with child.lock:
+            snapshot[name] = (list(child.counts), child.sum, child.count)
+    return snapshot
+
+def bucket_percentile(bounds, counts, q):
+    """q-th percentile (0-100) interpolated linearly inside its histogram bucket."""
+    total = sum(counts)
+    rank = total * q / 100.0
+    cumulative, lower = 0, 0.0
+    for bound, n in zip(tuple(bounds) + (bounds[-1],), counts):
+        if n and cumulative + n >= rank:
+            return lower + (bound - lower) * (rank - cumulative) / n
+        cumulative += n
+        lower = bound
+    return bounds[-1]
+
+def summarize(before, after):
+    """Per-stage stats (ms) of the observations between two snapshots."""
+    from utils import metrics
+    bounds = metrics.STAGE_LATENCY.bounds
+    result = {}
+    for name in STAGES:
+        counts = [b - a for a, b in zip(before[name][0], after[name][0])]
+        count = after[name][2] - before[name][2]
+        if count <= 0:
+            continue
+        result[name] = {
+            "count": count,
+            "mean_ms": round((after[name][1] - before[name][1]) / count * 1000.0, 3),
+            "p50_ms": round(bucket_percentile(bounds, counts, 50) * 1000.0, 3),
+            "p95_ms": round(bucket_percentile(bounds, counts, 95) * 1000.0, 3),
+            "p99_ms": round(bucket_percentile(bounds, counts, 99) * 1000.0, 3),
+        }
+    return result
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+def redirect_evidence_output(out_dir):
+    """Points snapshot/challan/plate/DB writers at a scratch directory."""
+    import snapshot
+    import challan
+    import database
+    import plate_generator
+    from utils import storage
+    storage.use_generation_file(os.path.join(out_dir, "storage_generation.json"))
+    snapshot.SNAPSHOT_DIR = os.path.join(out_dir, "snapshots")
+    challan.CHALLAN_DIR = os.path.join(out_dir, "challans")
+    plate_generator.PLATE_DIR = os.path.join(out_dir, "plates")
+    database.DB_FILE = os.path.join(out_dir, "violations.json")
+
+def run_pipeline(video_path, max_frames, warmup):
+    """
+    Streams max_frames frames of app.generate_frames (after `warmup` frames).
+    Returns: (frames, elapsed seconds, stage stats)
+    """
+    import app
+    app.VIDEO_DIR = os.path.dirname(os.path.abspath(video_path))
+    app.PACE_TO_SOURCE_FPS = False # measure throughput, not real-time playback
+    camera = os.path.basename(video_path)
+
+    frames = app.generate_frames(camera)
+    try:
+        # A clip that cannot be opened (or read) ends the generator early
+        for _ in range(warmup):
+            next(frames, None)
+        before = stage_snapshot(camera)
+        start = time.perf_counter()
+        count = sum(1 for _ in zip(range(max_frames), frames))
+        elapsed = time.perf_counter() - start
+        after = stage_snapshot(camera)
+    finally:
+        frames.close()
+    if count == 0:
+        raise SystemExit(f"Error: no frames read from {video_path}")
+    return count, elapsed, summarize(before, after)
+
+def compare(result, baseline, tolerance):
+    """
+    Compares p50/p95 per stage and overall FPS against a baseline.
+    Returns: list of regression descriptions.
+    """
+    regressions = []
+    for name, stats in result["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if base[key] > 0 and stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}.{key}: {stats[key]:.2f} ms vs baseline {base[key]:.2f} ms "
+                                   f"(+{(stats[key] / base[key] - 1) * 100:.0f}%)")
+    base_fps = baseline.get("fps")
+    if base_fps and result["fps"] < base_fps * (1 - tolerance):
+        regressions.append(f"fps: {result['fps']:.1f} vs baseline {base_fps:.1f}")
+    return regressions
+
+def print_table(result, baseline, file=sys.stderr):
+    print(f"{'stage':<11} | {'calls':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'base p50':>8}", file=file)
+    print("-" * 66, file=file)
+    for name in STAGES:
+        stats = result["stages"].get(name)
+        if not stats:
+            continue
+        base = (baseline or {}).get("stages", {}).get(name, {}).get("p50_ms")
+        base_txt = f"{base:>8.2f}" if base is not None else f"{'-':>8}"
+        print(f"{name:<11} | {stats['count']:>6} | {stats['p50_ms']:>8.2f} | {stats['p95_ms']:>8.2f} | {stats['p99_ms']:>8.2f} | {base_txt}", file=file)
+    print(f"FPS: {result['fps']:.1f} | Frames: {result['frames']} | Peak RSS: {result['peak_rss_mb']} MB", file=file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Violation pipeline stage benchmark")
+    parser.add_argument("--video", default=VIDEO_SOURCE, help="Fixed local clip to benchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=1, help="Frames left out of the stats (model loading, first inference)")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout only)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before flagging (0.10 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_evidence_") as out_dir:
+        redirect_evidence_output(out_dir)
+        frames, elapsed, stages = run_pipeline(args.video, args.frames, args.warmup)
+
+    result = {
+        "video": os.path.basename(args.video),
+        "frames": frames,
+        "elapsed_s": round(elapsed, 3),
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    print_table(result, baseline)
+    regressions = compare(result, baseline, args.tolerance) if baseline else []
+    result["regressions"] = regressions
+    for r in regressions:
+        print(f"[REGRESSION] {r}", file=sys.stderr)
+
+    payload = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(payload)
+        print(f"[BENCH] Baseline saved to {args.baseline}", file=sys.stderr)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Re-identification benchmark: ID fragmentation and the per-ID work it causes.
+
+Runs the vehicle tracker over a clip once (every --stride frames, like the
+server's SKIP_FRAMES), then replays the tracker output with and without the
+ReIdentifier. Every distinct ID costs the pipeline:
+  - a SpeedTracker warm-up (10 samples with speed 0)
+  - a plate localization + crop write in PlateManager
+  - helmet classification from scratch (two-wheelers)
+  - potentially a second challan for the same vehicle
+so the distinct-ID counts below bound those costs.
+
+Usage (from backend/):
+    python benchmarks/bench_reid.py --video ../videos/traffic.mp4 --frames 900
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import VIDEO_SOURCE, MODEL_PATH, VEHICLE_CLASSES
+from reid import ReIdentifier
+from track_registry import TrackRegistry
+
+TARGET_WIDTH = 640
+TWO_WHEELERS = [1, 3]
+SPEED_WARMUP_SAMPLES = 10
+
+def tracked_frames(video, frames, stride):
+    """Yields (frame_index, frame, rows) for detection frames; rows = [[x1, y1, x2, y2, id, cls]]."""
+    from ultralytics import YOLO
+    model = YOLO(MODEL_PATH)
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f"Error: Could not open video {video}")
+    frame_index = 0
+    while frame_index < frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frame_index += 1
+        if frame_index % stride:
+            continue
+        h, w = frame.shape[:2]
+        scale = TARGET_WIDTH / w if w > TARGET_WIDTH else 1.0
+        small = cv2.resize(frame, (int(w * scale), int(h * scale))) if scale < 1.0 else frame
+        res = model.track(small, persist=True, conf=0.5, classes=VEHICLE_CLASSES, verbose=False, tracker="bytetrack.yaml")[0]
+        rows = []
+        if res.boxes.id is not None:
+            boxes = (res.boxes.xyxy.cpu().numpy() / scale).astype(int)
+            for box, tid, cls in zip(boxes, res.boxes.id.int().cpu().numpy(), res.boxes.cls.int().cpu().numpy()):
+                rows.append([*map(int, box), int(tid), int(cls)])
+        yield frame_index, frame, rows
+    cap.release()
+
+class Replay:
+    """Counts distinct IDs (and the per-ID work) seen by the rest of the pipeline."""
+    def __init__(self, use_reid):
+        self.reid = ReIdentifier() if use_reid else None
+        self.registry = TrackRegistry()
+        if self.reid:
+            self.registry.subscribe(self.reid)
+        self.ids, self.two_wheeler_ids, self.samples = set(), set(), {}
+        self.cost = 0.0
+        self.frames = 0
+
+    def feed(self, frame_index, frame, rows):
+        self.frames += 1
+        if self.reid:
+            start = time.perf_counter()
+            rows = self.reid.update(frame, rows, frame_index)
+            self.cost += time.perf_counter() - start
+        for row in rows:
+            self.ids.add(row[4])
+            self.samples[row[4]] = self.samples.get(row[4], 0) + 1
+            if row[5] in TWO_WHEELERS:
+                self.two_wheeler_ids.add(row[4])
+        self.registry.update(frame_index, [row[4] for row in rows])
+
+    def result(self):
+        return {
+            "distinct_ids": len(self.ids),
+            "distinct_two_wheeler_ids": len(self.two_wheeler_ids),
+            "speed_warmup_samples": int(sum(min(n, SPEED_WARMUP_SAMPLES) for n in self.samples.values())),
+            "merges": self.reid.merged_total if self.reid else 0,
+            "reid_ms_per_frame": round(self.cost * 1000.0 / max(1, self.frames), 3),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-identification fragmentation benchmark")
+    parser.add_argument("--video", default=VIDEO_SOURCE)
+    parser.add_argument("--frames", type=int, default=900)
+    parser.add_argument("--stride", type=int, default=3, help="Detection every Nth frame (SKIP_FRAMES)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    # Both replays see the same tracker output, frame by frame (frames are not kept in memory)
+    replays = {"tracker_ids": Replay(False), "reid": Replay(True)}
+    for frame_index, frame, rows in tracked_frames(args.video, args.frames, args.stride):
+        for replay in replays.values():
+            replay.feed(frame_index, frame, [list(row) for row in rows])
+    result = {"video": os.path.basename(args.video), "detection_frames": replays["reid"].frames,
+              "modes": {mode: replay.result() for mode, replay in replays.items()}}
+
+    print(f"{'mode':<12} | {'IDs':>5} | {'2-wheeler IDs':>13} | {'warm-up samples':>15} | {'merges':>6} | {'ms/frame':>8}")
+    print("-" * 75)
+    for mode, r in result["modes"].items():
+        print(f"{mode:<12} | {r['distinct_ids']:>5} | {r['distinct_two_wheeler_ids']:>13} | "
+              f"{r['speed_warmup_samples']:>15} | {r['merges']:>6} | {r['reid_ms_per_frame']:>8.3f}")
+
+    payload = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
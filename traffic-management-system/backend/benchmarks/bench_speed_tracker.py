@@ -0,0 +1,61 @@
+"""
+Microbenchmark: scalar SpeedTracker.calculate_speed vs batch calculate_speeds.
+
+Usage (from backend/):
+    python benchmarks/bench_speed_tracker.py [--frames 200]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from speed_calculation import SpeedTracker
+
+TRACK_COUNTS = [10, 50, 100, 500, 1000]
+
+def make_trajectories(n_tracks, n_frames, seed=0):
+    """Returns (ids, centroids[n_frames, n_tracks, 2]) with small random motion."""
+    rng = np.random.default_rng(seed)
+    ids = rng.choice(np.arange(1, n_tracks * 10), size=n_tracks, replace=False)
+    start = rng.integers(0, 1280, size=(n_tracks, 2))
+    steps = rng.integers(-6, 7, size=(n_frames, n_tracks, 2))
+    return ids, start + np.cumsum(steps, axis=0)
+
+def run_scalar(ids, centroids):
+    tracker = SpeedTracker()
+    out = []
+    t0 = time.perf_counter()
+    for frame in centroids:
+        out.append([tracker.calculate_speed(int(t), (int(c[0]), int(c[1]))) for t, c in zip(ids, frame)])
+    return time.perf_counter() - t0, np.array(out, dtype=np.float64)
+
+def run_batch(ids, centroids):
+    tracker = SpeedTracker()
+    out = []
+    t0 = time.perf_counter()
+    for frame in centroids:
+        out.append(tracker.calculate_speeds(ids, frame))
+    return time.perf_counter() - t0, np.array(out)
+
+def main():
+    parser = argparse.ArgumentParser(description="SpeedTracker scalar vs batch microbenchmark")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'tracks':>7} | {'scalar us/frame':>15} | {'batch us/frame':>14} | {'speedup':>7} | identical")
+    print("-" * 64)
+    for n in TRACK_COUNTS:
+        ids, centroids = make_trajectories(n, args.frames)
+        t_scalar, s_scalar = run_scalar(ids, centroids)
+        t_batch, s_batch = run_batch(ids, centroids)
+        identical = np.array_equal(s_scalar, s_batch)
+        per_scalar = t_scalar / args.frames * 1e6
+        per_batch = t_batch / args.frames * 1e6
+        print(f"{n:>7} | {per_scalar:>15.1f} | {per_batch:>14.1f} | {per_scalar / per_batch:>6.1f}x | {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold-start benchmark: import time and time-to-first-frame.
+
+Each measurement runs in a fresh interpreter so nothing (ultralytics, torch,
+model weights) is already imported. Modes:
+  lazy     - first client arrives, generate_frames loads every model itself
+  preload  - server start kicks off the background preload/warmup, the first
+             client arrives --client-delay seconds later
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --video ../videos/traffic.mp4
+    python benchmarks/bench_startup.py --runs 3 --client-delay 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from utils.config import VIDEO_SOURCE
+
+# Executed in the child interpreter; prints one JSON line
+CHILD = r"""
+import json, os, sys, tempfile, time
+t0 = time.perf_counter()
+sys.path.insert(0, {backend!r})
+import app
+t_import = time.perf_counter() - t0
+heavy = [m for m in ("ultralytics", "torch", "reportlab", "qrcode") if m in sys.modules]
+
+sys.path.insert(0, os.path.join({backend!r}, "benchmarks"))
+from bench_pipeline import redirect_evidence_output
+redirect_evidence_output(tempfile.mkdtemp(prefix="bench_startup_"))
+app.VIDEO_DIR = os.path.dirname({video!r})
+
+if {preload!r}:
+    app.start_model_preload()
+    time.sleep({delay!r})
+
+t_request = time.perf_counter()
+next(app.generate_frames(os.path.basename({video!r})))
+t_first = time.perf_counter()
+print(json.dumps({{"import_s": t_import, "heavy_modules_after_import": heavy,
+                   "request_to_first_frame_s": t_first - t_request,
+                   "process_to_first_frame_s": t_first - t0}}))
+"""
+
+def run_child(video, preload, delay):
+    code = CHILD.format(backend=BACKEND_DIR, video=os.path.abspath(video), preload=preload, delay=delay)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=BACKEND_DIR)
+    if proc.returncode != 0:
+        raise SystemExit(f"Child run failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start / time-to-first-frame benchmark")
+    parser.add_argument("--video", default=VIDEO_SOURCE)
+    parser.add_argument("--runs", type=int, default=1, help="Fresh processes per mode (best run is reported)")
+    parser.add_argument("--client-delay", type=float, default=3.0,
+                        help="Seconds between server start and the first client in preload mode")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    result = {"video": os.path.basename(args.video), "client_delay_s": args.client_delay,
+              "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "modes": {}}
+    for mode, preload in (("lazy", False), ("preload", True)):
+        runs = [run_child(args.video, preload, args.client_delay) for _ in range(args.runs)]
+        best = min(runs, key=lambda r: r["request_to_first_frame_s"])
+        result["modes"][mode] = {k: round(v, 3) if isinstance(v, float) else v for k, v in best.items()}
+
+    print(f"{'mode':<8} | {'import s':>8} | {'request->frame s':>16} | heavy modules after import")
+    print("-" * 70)
+    for mode, r in result["modes"].items():
+        print(f"{mode:<8} | {r['import_s']:>8.2f} | {r['request_to_first_frame_s']:>16.2f} | {', '.join(r['heavy_modules_after_import']) or '-'}")
+
+    payload = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Soak test for per-track state growth with TrackRegistry eviction.
+
+Simulates a camera seeing a continuous stream of new vehicles (fresh ByteTrack
+IDs) and reports traced memory and live state sizes over simulated time.
+With eviction enabled memory stays flat; with --no-evict it grows linearly.
+
+Usage (from backend/):
+    python benchmarks/soak_track_state.py --hours 24 --detect-fps 10
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from speed_calculation import SpeedTracker
+from red_light_detector import RedLightDetector
+from track_registry import TrackRegistry
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-track state soak test")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--detect-fps", type=float, default=10, help="Detection frames per second")
+    parser.add_argument("--in-view", type=int, default=20, help="Vehicles visible at once")
+    parser.add_argument("--dwell", type=float, default=6, help="Seconds each vehicle stays in view")
+    parser.add_argument("--no-evict", action="store_true")
+    args = parser.parse_args()
+
+    speed_tracker = SpeedTracker()
+    red_light = RedLightDetector(stop_line_y=500)
+    registry = TrackRegistry()
+    if not args.no_evict:
+        registry.subscribe(speed_tracker)
+        registry.subscribe(red_light)
+
+    total_frames = int(args.hours * 3600 * args.detect_fps)
+    frames_per_id = max(1, int(args.dwell * args.detect_fps / args.in_view))
+    report_every = max(1, total_frames // 24)
+    skip = max(1, int(30 / args.detect_fps)) # Registry counts source frames (30 FPS)
+
+    rng = np.random.default_rng(0)
+    live = list(range(args.in_view))
+    next_id = args.in_view
+
+    tracemalloc.start()
+    print(f"{'sim hours':>9} | {'traced MB':>9} | {'live':>5} | {'evicted':>8} | {'speed state':>11}")
+    for frame in range(1, total_frames + 1):
+        if frame % frames_per_id == 0:
+            live = live[1:] + [next_id]
+            next_id += 1
+
+        centroids = rng.integers(0, 720, size=(len(live), 2))
+        speed_tracker.calculate_speeds(live, centroids, time_elapsed=1.0 / args.detect_fps)
+        for track_id, (cx, cy) in zip(live, centroids):
+            red_light.detect(track_id, (cx - 5, cy - 5, cx + 5, cy + 5), "GREEN")
+        registry.update(frame * skip, live)
+
+        if frame % report_every == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            st = registry.get_stats()
+            hours = frame / args.detect_fps / 3600
+            print(f"{hours:>9.1f} | {current / 1e6:>9.2f} | {st['live']:>5} | {st['evicted']:>8} | {len(speed_tracker.state_table):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Helmet classifier sweep: CPU latency vs validation accuracy.
+
+Trains (or fine-tunes) one classifier per (base model, input size) on
+helmet_cls_dataset/, then measures each variant:
+  balanced accuracy - mean per-class recall on the validation split (the dataset is
+                      imbalanced: plain accuracy rewards always answering "helmet")
+  min recall        - worst per-class recall
+  latency           - median / p95 single-crop CPU inference at the variant's input size
+and prints the Pareto front (no other variant is both faster and more accurate).
+Classes without images in val/ get a stratified hold-out of their train/ images
+(removed from training; runs/helmet_sweep/dataset/). If a class still has no
+validation images, nothing is recommended or exported.
+The current models/helmet_classifier.pt is measured alongside as "current" (it may
+have been trained on held-out images, so its score can be optimistic).
+
+Usage (from backend/):
+    python benchmarks/sweep_helmet.py --models yolov8n-cls.pt yolov8s-cls.pt --sizes 64 96 128 224
+    python benchmarks/sweep_helmet.py --no-train --accuracy-floor 0.9     # re-measure trained variants
+    python benchmarks/sweep_helmet.py --no-train --export n_96 --format onnx
+Exported weights are copied to models/; set HELMET_MODEL_FILE / HELMET_INPUT_SIZE in
+utils/config.py to the printed values to use them.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import PROJECT_ROOT, HELMET_INPUT_SIZE
+from helmet_detector import HELMET_MODEL_PATH
+
+DATASET_DIR = os.path.join(PROJECT_ROOT, "helmet_cls_dataset")
+SWEEP_DIR = os.path.join(PROJECT_ROOT, "runs", "helmet_sweep")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def variant_name(base, size):
+    """yolov8n-cls.pt @ 96 -> 'n_96' (custom bases keep their file stem)."""
+    stem = os.path.splitext(os.path.basename(base))[0]
+    scale = stem[len("yolov8"):-len("-cls")] if stem.startswith("yolov8") and stem.endswith("-cls") else stem
+    return f"{scale}_{size}"
+
+def list_images(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [p for p in sorted(glob.glob(os.path.join(directory, "*"))) if p.lower().endswith(IMAGE_EXTENSIONS)]
+
+def link_or_copy(src, dst):
+    try:
+        os.symlink(os.path.abspath(src), dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def split_dataset(holdout_fraction, dataset_dir=DATASET_DIR, sweep_dataset_dir=os.path.join(SWEEP_DIR, "dataset")):
+    """
+    Validation split of the sweep. Classes with no images in val/ get every k-th image
+    of their train/ images (k = 1 / holdout_fraction, deterministic) held out of training.
+    Returns: (dataset dir to train on, {class: [validation image paths]}, [classes with a hold-out])
+    """
+    classes = sorted(d for d in os.listdir(os.path.join(dataset_dir, "train"))
+                     if os.path.isdir(os.path.join(dataset_dir, "train", d)))
+    val = {c: list_images(os.path.join(dataset_dir, "val", c)) for c in classes}
+    held_out = [c for c in classes if not val[c]]
+    if not held_out:
+        return dataset_dir, val, []
+
+    step = max(2, int(round(1.0 / holdout_fraction)))
+    shutil.rmtree(sweep_dataset_dir, ignore_errors=True)
+    for c in classes:
+        train = list_images(os.path.join(dataset_dir, "train", c))
+        if c in held_out and len(train) >= 2:
+            val[c] = train[::step]
+            train = [p for p in train if p not in val[c]]
+        for split, paths in (("train", train), ("val", val[c])):
+            os.makedirs(os.path.join(sweep_dataset_dir, split, c), exist_ok=True)
+            for path in paths:
+                link_or_copy(path, os.path.join(sweep_dataset_dir, split, c, os.path.basename(path)))
+    return sweep_dataset_dir, val, held_out
+
+def train_variant(base, size, epochs, name, data):
+    """Trains one variant (ultralytics classify) on the `data` dataset dir. Returns: path of best.pt."""
+    from ultralytics import YOLO
+    model = YOLO(base)
+    model.train(data=data, imgsz=size, epochs=epochs, project=SWEEP_DIR, name=name,
+                exist_ok=True, device="cpu", verbose=False, plots=False)
+    return os.path.join(SWEEP_DIR, name, "weights", "best.pt")
+
+def load_val_set(val_paths):
+    """val_paths: {class: [paths]}. Returns: [(BGR image, class name)]."""
+    samples = []
+    for label, paths in sorted(val_paths.items()):
+        for path in paths:
+            img = cv2.imread(path)
+            if img is not None:
+                samples.append((img, label))
+    return samples
+
+def evaluate(model, size, samples, classes):
+    """
+    Per-class recall on the val samples (same preprocessing as HelmetDetector).
+    Returns: (balanced accuracy, min recall, {class: recall}); classes without samples count as 0.
+    """
+    per_class = {c: [0, 0] for c in classes}
+    for img, label in samples:
+        res = model(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), imgsz=size, verbose=False)[0]
+        per_class[label][0] += 1
+        per_class[label][1] += str(res.names[res.probs.top1]) == label
+    recall = {c: round(ok / seen, 3) if seen else 0.0 for c, (seen, ok) in per_class.items()}
+    return round(float(np.mean(list(recall.values()))), 3), min(recall.values()), recall
+
+def measure_latency(model, size, runs, crop_shape=(48, 40, 3)):
+    """Median / p95 ms of one head-crop inference on CPU."""
+    crop = np.random.randint(0, 255, crop_shape, dtype=np.uint8)
+    for _ in range(5):
+        model(crop, imgsz=size, verbose=False)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model(crop, imgsz=size, verbose=False)
+        times.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+def count_params(model):
+    """Returns: parameter count of a PyTorch model, None for exported backends (ONNX, OpenVINO, ...)."""
+    parameters = getattr(model.model, "parameters", None)
+    return sum(p.numel() for p in parameters()) if callable(parameters) else None
+
+def pareto_front(rows):
+    """Names of rows not dominated by a faster-and-at-least-as-accurate (or equal-speed, more accurate) row."""
+    front = []
+    for r in rows:
+        dominated = any(o is not r and o["latency_ms"] <= r["latency_ms"] and o["balanced_accuracy"] >= r["balanced_accuracy"]
+                        and (o["latency_ms"] < r["latency_ms"] or o["balanced_accuracy"] > r["balanced_accuracy"]) for o in rows)
+        if not dominated:
+            front.append(r["name"])
+    return front
+
+def export_variant(row, fmt):
+    """Copies (and optionally converts) a variant into models/. Returns: the model file name."""
+    target = os.path.join(MODELS_DIR, f"helmet_classifier_{row['name']}.pt")
+    shutil.copyfile(row["weights"], target)
+    if fmt != "pt":
+        from ultralytics import YOLO
+        exported = YOLO(target).export(format=fmt, imgsz=row["size"])
+        target = exported if os.path.dirname(exported) == MODELS_DIR else shutil.move(exported, MODELS_DIR)
+    return os.path.basename(target)
+
+def main():
+    parser = argparse.ArgumentParser(description="Helmet classifier latency/accuracy sweep")
+    parser.add_argument("--models", nargs="+", default=["yolov8n-cls.pt"],
+                        help="Base weights to train from (e.g. yolov8n-cls.pt yolov8s-cls.pt, or models/helmet_classifier.pt to fine-tune)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[64, 96, 128, 160, 224])
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--no-train", action="store_true", help="Only measure variants trained by an earlier run")
+    parser.add_argument("--runs", type=int, default=50, help="Timed inferences per variant")
+    parser.add_argument("--threads", type=int, default=1, help="torch CPU threads (the server shares cores between cameras)")
+    parser.add_argument("--accuracy-floor", type=float, default=0.9, help="Minimum balanced accuracy and per-class recall")
+    parser.add_argument("--holdout-fraction", type=float, default=0.25,
+                        help="Share of train/ images held out for classes with no val/ images")
+    parser.add_argument("--export", metavar="VARIANT", help="Copy/export this variant (e.g. n_96) into models/")
+    parser.add_argument("--format", default="pt", help="Export format: pt, onnx, torchscript, openvino, ...")
+    parser.add_argument("--output", default=os.path.join(SWEEP_DIR, "sweep.json"))
+    args = parser.parse_args()
+
+    import torch
+    torch.set_num_threads(args.threads)
+    from ultralytics import YOLO
+
+    data_dir, val_paths, held_out = split_dataset(args.holdout_fraction)
+    if held_out:
+        print(f"[SWEEP] No val/ images for {held_out}: holding out {args.holdout_fraction:.0%} of their train/ images ({data_dir})")
+    classes = sorted(val_paths)
+    samples = load_val_set(val_paths)
+    missing = [c for c in classes if not any(label == c for _, label in samples)]
+    if missing:
+        print(f"[SWEEP] Error: still no validation images for {missing}; no variant will be recommended or exported")
+
+    # 1. Variants: current model at its own size + every (base, size) pair
+    variants = [("current", HELMET_MODEL_PATH, None)]
+    for base in args.models:
+        for size in args.sizes:
+            name = variant_name(base, size)
+            weights = os.path.join(SWEEP_DIR, name, "weights", "best.pt")
+            if not args.no_train:
+                weights = train_variant(base, size, args.epochs, name, data_dir)
+            if os.path.exists(weights):
+                variants.append((name, weights, size))
+            else:
+                print(f"[SWEEP] Skipping {name}: no trained weights at {weights}")
+
+    # 2. Measure
+    rows = []
+    for name, weights, size in variants:
+        model = YOLO(weights)
+        # "current" runs at the production size: HELMET_INPUT_SIZE, else the model's own (.pt only)
+        size = size or HELMET_INPUT_SIZE or int((getattr(model, "overrides", None) or {}).get("imgsz") or 224)
+        balanced, min_recall, recall = evaluate(model, size, samples, classes)
+        latency, p95 = measure_latency(model, size, args.runs)
+        rows.append({"name": name, "weights": weights, "size": size, "balanced_accuracy": balanced,
+                     "min_recall": min_recall, "recall": recall, "latency_ms": round(latency, 2), "p95_ms": round(p95, 2),
+                     "params": count_params(model)})
+
+    # 3. Pareto table (fastest first)
+    front = pareto_front(rows)
+    rows.sort(key=lambda r: r["latency_ms"])
+    print(f"{'variant':<10} | {'size':>4} | {'params':>9} | {'median ms':>9} | {'p95 ms':>7} | {'bal. acc':>8} | {'min rec':>7} | pareto | recall")
+    print("-" * 105)
+    for r in rows:
+        mark = "*" if r["name"] in front else ""
+        print(f"{r['name']:<10} | {r['size']:>4} | {r['params'] if r['params'] is not None else '-':>9} | {r['latency_ms']:>9.2f} | {r['p95_ms']:>7.2f} | "
+              f"{r['balanced_accuracy']:>8.3f} | {r['min_recall']:>7.3f} | {mark:^6} | {r['recall']}")
+
+    eligible = [r for r in rows if r["name"] in front and not missing
+                and r["balanced_accuracy"] >= args.accuracy_floor and r["min_recall"] >= args.accuracy_floor]
+    pick = eligible[0] if eligible else None
+    if pick:
+        print(f"[SWEEP] Cheapest variant with balanced accuracy and every class recall >= {args.accuracy_floor}: "
+              f"{pick['name']} ({pick['latency_ms']} ms, balanced accuracy {pick['balanced_accuracy']})")
+    elif not missing:
+        print(f"[SWEEP] No variant reaches balanced accuracy / per-class recall {args.accuracy_floor}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({"accuracy_floor": args.accuracy_floor, "threads": args.threads, "held_out": held_out,
+                   "unvalidated_classes": missing, "pareto": front,
+                   "recommended": pick["name"] if pick else None, "variants": rows}, f, indent=4)
+    print(f"[SWEEP] Results written to {args.output}")
+
+    # 4. Export the chosen variant
+    if args.export:
+        if missing:
+            raise SystemExit(f"Refusing to export: no validation images for {missing}")
+        row = next((r for r in rows if r["name"] == args.export), None)
+        if row is None:
+            raise SystemExit(f"Unknown variant {args.export}; measured: {[r['name'] for r in rows]}")
+        model_file = export_variant(row, args.format)
+        print(f"[SWEEP] Exported {row['name']} -> models/{model_file}")
+        print("Set in utils/config.py:")
+        print(f'    HELMET_MODEL_FILE = "{model_file}"')
+        print(f"    HELMET_INPUT_SIZE = {row['size']}")
+
+if __name__ == "__main__":
+    main()
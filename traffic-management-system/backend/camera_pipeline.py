@@ -0,0 +1,190 @@
+"""
+Shared, suspendable camera pipelines.
+
+One background thread per camera drives the frame generator (app.generate_frames)
+and hands each encoded frame to every attached viewer (/video_feed, mosaic).
+The thread only pulls frames while the camera has viewers or enforcement duty
+(violations are recorded without anyone watching). Otherwise it parks with the
+generator paused at its yield: no decode, no inference, and the capture, models
+and per-track state stay loaded, so the next viewer gets frames immediately.
+After PIPELINE_IDLE_CLOSE_SECONDS of suspension the generator is closed
+(capture released, caches flushed) and restarted on the next attach.
+Running pipelines hold a slice of the CPU core budget (utils/cpu_budget.py).
+"""
+import threading
+import time
+import cv2
+import numpy as np
+from utils.config import PIPELINE_IDLE_CLOSE_SECONDS, PIPELINE_RETRY_SECONDS
+from utils import metrics
+from utils.cpu_budget import get_cpu_budget
+
+_placeholder = None
+
+def placeholder_chunk():
+    """
+    MJPEG part shown while a pipeline has no new frame (source not open / failing).
+    Viewers get it as a keep-alive: the server only notices a closed connection when
+    it writes, so without it a departed viewer would never be detached.
+    """
+    global _placeholder
+    if _placeholder is None:
+        image = np.zeros((360, 640, 3), dtype=np.uint8)
+        cv2.putText(image, "No signal - reconnecting", (150, 185), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (128, 128, 128), 2)
+        _placeholder = (b'--frame\r\n'
+                        b'Content-Type: image/jpeg\r\n\r\n' + cv2.imencode('.jpg', image)[1].tobytes() + b'\r\n')
+    return _placeholder
+
+class FramePacer:
+    """Sleeps to hold a loop at `fps`. A loop that fell behind (or was suspended) restarts its schedule instead of bursting."""
+    def __init__(self, fps):
+        self.interval = 1.0 / fps
+        self.next_due = None
+
+    def wait(self):
+        now = time.perf_counter()
+        if self.next_due is None or now - self.next_due > self.interval:
+            self.next_due = now
+        elif self.next_due > now:
+            time.sleep(self.next_due - now)
+        self.next_due += self.interval
+
+class CameraPipeline:
+    def __init__(self, camera, source, idle_close_seconds=PIPELINE_IDLE_CLOSE_SECONDS, budget=None):
+        self.camera = camera
+        self.source = source   # source(camera) -> generator of encoded frames
+        self.idle_close_seconds = idle_close_seconds
+        self.budget = budget   # CpuBudget shared by all pipelines (None = no pinning)
+        self.viewers = 0
+        self.enforce = False
+        self.state = "stopped" # stopped | running | suspended
+        self.chunk = None
+        self.version = 0
+        self.thread = None
+        self.cond = threading.Condition()
+        self.viewers_gauge = metrics.PIPELINE_VIEWERS.labels(camera)
+
+    def _active(self):
+        return self.viewers > 0 or self.enforce
+
+    def _start(self):
+        """Starts the pipeline thread if it is not running (caller holds cond)."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True, name=f"pipeline-{self.camera}")
+            self.thread.start()
+        self.cond.notify_all()
+
+    def attach(self):
+        with self.cond:
+            self.viewers += 1
+            self.viewers_gauge.set(self.viewers)
+            self._start()
+
+    def detach(self):
+        with self.cond:
+            self.viewers -= 1
+            self.viewers_gauge.set(self.viewers)
+
+    def set_enforce(self, enforce):
+        """Enforcement duty: keep processing (and recording violations) without viewers."""
+        with self.cond:
+            self.enforce = bool(enforce)
+            if self.enforce:
+                self._start()
+
+    def _wait_until_active(self, frames):
+        """Parks the thread while nobody needs frames. Returns: the generator (None if it was closed)."""
+        with self.cond:
+            if self._active():
+                return frames
+            self.state = "suspended"
+            suspended_at = time.monotonic()
+            if self.budget:
+                self.budget.unregister(self.camera) # its cores go to the running pipelines
+            print(f"[PIPELINE] {self.camera}: suspended (no viewers, no enforcement duty)")
+            while not self._active():
+                idle = time.monotonic() - suspended_at
+                if frames is not None and idle >= self.idle_close_seconds:
+                    break
+                self.cond.wait(timeout=max(0.1, self.idle_close_seconds - idle) if frames is not None else None)
+            else:
+                self.state = "running"
+                if self.budget:
+                    self.budget.register(self.camera)
+                print(f"[PIPELINE] {self.camera}: resumed")
+                return frames
+        # Idle for long: release the capture (GeneratorExit flushes caches), then wait for a viewer
+        frames.close()
+        print(f"[PIPELINE] {self.camera}: closed after {self.idle_close_seconds}s idle")
+        with self.cond:
+            self.state = "stopped"
+            self.cond.wait_for(self._active)
+            self.state = "running"
+            if self.budget:
+                self.budget.register(self.camera)
+        return None
+
+    def _run(self):
+        frames = None
+        budget_version = None
+        with self.cond:
+            self.state = "running"
+        if self.budget:
+            self.budget.register(self.camera)
+        while True:
+            frames = self._wait_until_active(frames)
+            # Core slice changed (a pipeline started or suspended): re-pin this thread
+            if self.budget and budget_version != self.budget.version:
+                budget_version = self.budget.apply(self.camera)
+            if frames is None:
+                frames = self.source(self.camera)
+            try:
+                chunk = next(frames)
+            except StopIteration:
+                # Source could not be opened or ended for good: retry later rather than spin
+                frames = None
+                time.sleep(PIPELINE_RETRY_SECONDS)
+                continue
+            except Exception as e:
+                print(f"[PIPELINE] {self.camera}: pipeline failed ({e}), restarting")
+                frames = None
+                time.sleep(PIPELINE_RETRY_SECONDS)
+                continue
+            with self.cond:
+                self.chunk = chunk
+                self.version += 1
+                self.cond.notify_all()
+
+    def stream(self, keepalive_seconds=1.0):
+        """Generator for one viewer: yields every new frame while attached (a placeholder while there is none)."""
+        self.attach()
+        seen = self.version
+        try:
+            while True:
+                with self.cond:
+                    if self.cond.wait_for(lambda: self.version != seen, timeout=keepalive_seconds):
+                        chunk, seen = self.chunk, self.version
+                    else:
+                        chunk = None
+                yield chunk if chunk is not None else placeholder_chunk()
+        finally:
+            self.detach()
+
+    def get_status(self):
+        with self.cond:
+            return {"state": self.state, "viewers": self.viewers, "enforce": self.enforce, "frames": self.version}
+
+# {camera: CameraPipeline}
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def get_pipeline(camera, source):
+    with _pipelines_lock:
+        pipeline = _pipelines.get(camera)
+        if pipeline is None:
+            pipeline = _pipelines[camera] = CameraPipeline(camera, source, budget=get_cpu_budget())
+        return pipeline
+
+def all_pipelines():
+    with _pipelines_lock:
+        return dict(_pipelines)
@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+from utils.config import (VEHICLE_CLASSES, CASCADE_LOW_CONF, CASCADE_SMALL_HEIGHT, CASCADE_TILE_SIZE,
+                          CASCADE_MAX_TILES, CASCADE_NMS_IOU)
+
+def select_tiles(boxes, frame_shape, tile_size=CASCADE_TILE_SIZE, max_tiles=CASCADE_MAX_TILES):
+    """
+    Picks full-resolution tiles covering the flagged boxes.
+    boxes: (N, 4) flagged boxes (x1, y1, x2, y2) in frame coordinates, most important first.
+    Returns: list of (x1, y1, x2, y2) tiles, at most max_tiles, clamped to the frame.
+    """
+    h, w = frame_shape[:2]
+    tw, th = min(tile_size, w), min(tile_size, h)
+    margin_x, margin_y = tw // 4, th // 4
+    tiles = []
+    for x1, y1, x2, y2 in np.asarray(boxes).reshape(-1, 4):
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        # Already well inside an existing tile?
+        if any(tx1 + margin_x <= cx <= tx2 - margin_x and ty1 + margin_y <= cy <= ty2 - margin_y
+               for tx1, ty1, tx2, ty2 in tiles):
+            continue
+        if len(tiles) == max_tiles:
+            break
+        tx1 = int(min(max(0, cx - tw / 2), w - tw))
+        ty1 = int(min(max(0, cy - th / 2), h - th))
+        tiles.append((tx1, ty1, tx1 + tw, ty1 + th))
+    return tiles
+
+def merge_detections(boxes, scores, classes, iou_threshold=CASCADE_NMS_IOU):
+    """
+    Class-wise NMS over coarse + fine detections.
+    Returns: indices of the kept detections.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    # Offset each class into its own coordinate range so one NMS call never merges across classes
+    offset = np.asarray(classes, dtype=np.float64)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offset
+    xywh = np.column_stack([shifted[:, 0], shifted[:, 1], shifted[:, 2] - shifted[:, 0], shifted[:, 3] - shifted[:, 1]])
+    keep = cv2.dnn.NMSBoxes(xywh.tolist(), np.asarray(scores, dtype=np.float64).tolist(), 0.0, iou_threshold)
+    return np.asarray(keep, dtype=np.int64).reshape(-1)
+
+class CascadeDetector:
+    """
+    Two-scale vehicle detector feeding ByteTrack.
+
+    1. Coarse pass on the frame downscaled to base_width, at a low confidence threshold.
+    2. Boxes that are small (shorter than small_height in the original frame) or below
+       conf get a second look: full-resolution tiles around them are run as one batch.
+    3. Coarse + fine detections are merged with class-wise NMS and handed to the tracker.
+
+    Only the tiles around distant/uncertain objects pay for full resolution, so the cost
+    stays close to the downscaled pass on typical frames.
+    """
+    def __init__(self, model, base_width=640, conf=0.5, classes=VEHICLE_CLASSES, tracker=None,
+                 low_conf=CASCADE_LOW_CONF, small_height=CASCADE_SMALL_HEIGHT,
+                 tile_size=CASCADE_TILE_SIZE, max_tiles=CASCADE_MAX_TILES):
+        self.model = model
+        self.base_width = base_width
+        self.conf = conf
+        self.classes = classes
+        self.low_conf = low_conf
+        self.small_height = small_height
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tracker = tracker or self._make_tracker()
+        self.last_tile_count = 0
+
+    @staticmethod
+    def _make_tracker():
+        """ByteTrack with the same settings model.track(tracker="bytetrack.yaml") uses."""
+        import yaml
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.utils import IterableSimpleNamespace
+        from ultralytics.utils.checks import check_yaml
+        with open(check_yaml("bytetrack.yaml"), 'r') as f:
+            cfg = IterableSimpleNamespace(**yaml.safe_load(f))
+        return BYTETracker(args=cfg)
+
+    @staticmethod
+    def _unpack(result):
+        boxes = result.boxes
+        return (boxes.xyxy.cpu().numpy().astype(np.float64), boxes.conf.cpu().numpy().astype(np.float64),
+                boxes.cls.cpu().numpy().astype(np.float64))
+
+    def detect(self, frame):
+        """
+        Runs the coarse pass and, where needed, the full-resolution tile pass.
+        Returns: (boxes (N, 4), scores (N,), classes (N,)) in frame coordinates after NMS.
+        """
+        h, w = frame.shape[:2]
+
+        # 1. Coarse pass (downscaled)
+        scale = self.base_width / w if w > self.base_width else 1.0
+        small = cv2.resize(frame, (int(w * scale), int(h * scale))) if scale < 1.0 else frame
+        result = self.model.predict(small, conf=self.low_conf, classes=self.classes, verbose=False)[0]
+        boxes, scores, classes = self._unpack(result)
+        boxes /= scale
+
+        # 2. Flag small or low-confidence objects (least confident first)
+        flagged = (scores < self.conf) | ((boxes[:, 3] - boxes[:, 1]) < self.small_height)
+        order = np.argsort(scores[flagged])
+        tiles = select_tiles(boxes[flagged][order], frame.shape, self.tile_size, self.max_tiles) if scale < 1.0 else []
+        self.last_tile_count = len(tiles)
+
+        # Coarse detections stay in the pool; NMS keeps the more confident of overlapping coarse/fine boxes
+        all_boxes, all_scores, all_classes = [boxes], [scores], [classes]
+
+        # 3. Fine pass: full-resolution tiles, one batched call
+        if tiles:
+            crops = [frame[ty1:ty2, tx1:tx2] for tx1, ty1, tx2, ty2 in tiles]
+            results = self.model.predict(crops, imgsz=self.tile_size, conf=self.conf, classes=self.classes, verbose=False)
+            for (tx1, ty1, tx2, ty2), res in zip(tiles, results):
+                fb, fs, fc = self._unpack(res)
+                if len(fb) == 0:
+                    continue
+                # Objects cut by an inner tile edge are left to the coarse pass
+                edge = 2
+                cut = (((fb[:, 0] <= edge) & (tx1 > 0)) | ((fb[:, 1] <= edge) & (ty1 > 0)) |
+                       ((fb[:, 2] >= tx2 - tx1 - edge) & (tx2 < w)) | ((fb[:, 3] >= ty2 - ty1 - edge) & (ty2 < h)))
+                fb = fb[~cut] + (tx1, ty1, tx1, ty1)
+                all_boxes.append(fb)
+                all_scores.append(fs[~cut])
+                all_classes.append(fc[~cut])
+
+        boxes = np.concatenate(all_boxes)
+        scores = np.concatenate(all_scores)
+        classes = np.concatenate(all_classes)
+
+        # 4. Merge overlapping coarse/fine boxes, then apply the final confidence threshold
+        keep = merge_detections(boxes, scores, classes)
+        keep = keep[scores[keep] >= self.conf]
+        return boxes[keep], scores[keep], classes[keep]
+
+    def track(self, frame):
+        """
+        Detects (cascade) and updates the tracker.
+        Returns: (boxes (N, 4) float, track_ids (N,) int, classes (N,) int) in frame coordinates.
+        """
+        from ultralytics.engine.results import Boxes
+        boxes, scores, classes = self.detect(frame)
+        data = np.column_stack([boxes, scores, classes]) if len(boxes) else np.zeros((0, 6))
+        tracks = self.tracker.update(Boxes(data, frame.shape[:2]), frame)
+        if len(tracks) == 0:
+            return np.zeros((0, 4)), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        tracks = np.asarray(tracks)
+        # Rows: [x1, y1, x2, y2, track_id, score, cls, idx]
+        return tracks[:, :4], tracks[:, 4].astype(int), tracks[:, 6].astype(int)
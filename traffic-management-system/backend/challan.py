@@ -1,25 +1,24 @@
 import os
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
-import qrcode
 import datetime
+import time
+import threading
 from utils.config import PROJECT_ROOT
+from utils import metrics
+from utils import storage
 
 # output directory
 CHALLAN_DIR = os.path.join(PROJECT_ROOT, "challans")
 
-def generate_qr_code(data):
+def generate_qr_code(data, output_dir):
     """Generates a QR code image as a temporary file."""
+    import qrcode # Imported on first challan, keeps module import cheap
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
     qr.add_data(data)
     qr.make(fit=True)
     img = qr.make_image(fill="black", back_color="white")
     
-    # Save to a temp path
-    temp_path = os.path.join(CHALLAN_DIR, "temp_qr.png")
+    # Save to a temp path (unique per process/thread: challans can be rendered concurrently)
+    temp_path = os.path.join(output_dir, f"temp_qr_{os.getpid()}_{threading.get_ident()}.png")
     img.save(temp_path)
     return temp_path
 
@@ -35,14 +34,21 @@ def generate_challan(violation_data):
         'snapshot_path': str (absolute path)
     }
     """
-    if not os.path.exists(CHALLAN_DIR):
-        os.makedirs(CHALLAN_DIR)
+    render_start = time.perf_counter()
+    # reportlab is only needed once a violation is confirmed
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    # Current storage generation (see utils/storage.py)
+    challan_dir = storage.generation_dir(CHALLAN_DIR)
+    if not os.path.exists(challan_dir):
+        os.makedirs(challan_dir)
 
     # Generate filename
     v_id = violation_data['id']
     ts_str = violation_data['timestamp'].replace(":", "").replace(" ", "_")
     filename = f"Challan_{v_id}_{ts_str}.pdf"
-    filepath = os.path.join(CHALLAN_DIR, filename)
+    filepath = os.path.join(challan_dir, filename)
 
     c = canvas.Canvas(filepath, pagesize=A4)
     width, height = A4
@@ -105,7 +111,7 @@ def generate_challan(violation_data):
 
     # 4. QR Code (Payment Link demo)
     qr_data = f"PAY: {v_id} | AMT: 100 | {ts_str}"
-    qr_path = generate_qr_code(qr_data)
+    qr_path = generate_qr_code(qr_data, challan_dir)
     
     c.drawImage(qr_path, 50, 150, width=100, height=100)
     c.setFont("Helvetica-Bold", 10)
@@ -122,5 +128,6 @@ def generate_challan(violation_data):
     if os.path.exists(qr_path):
         os.remove(qr_path)
         
+    metrics.CHALLAN_RENDER.observe(time.perf_counter() - render_start)
     print(f"[CHALLAN GENERATED] {filepath}")
     return filepath
@@ -0,0 +1,158 @@
+import cv2
+import os
+import threading
+import numpy as np
+from collections import deque
+from utils.config import (CLIP_PRE_SECONDS, CLIP_POST_SECONDS, CLIP_FPS, CLIP_WIDTH,
+                          CLIP_JPEG_QUALITY, CLIP_MAX_BUFFER_MB)
+
+def clip_path_for(snapshot_path):
+    """Evidence clip of a violation: next to its snapshot, same base name (.mp4)."""
+    return os.path.splitext(snapshot_path)[0] + ".mp4"
+
+class ClipRecorder:
+    """
+    Per-camera ring buffer of recently encoded frames.
+
+    Frames are stored as JPEG bytes at the clip resolution, so keeping a few
+    seconds of history costs a bounded amount of memory and building a clip
+    never requires re-decoding the source video. Pending clips share those bytes
+    with the ring (and with each other); memory is counted per frame held, and
+    the cap drops the oldest held frame first, from the ring and clips alike.
+    """
+    def __init__(self, source_fps=30, pre_seconds=CLIP_PRE_SECONDS, post_seconds=CLIP_POST_SECONDS,
+                 clip_fps=CLIP_FPS, width=CLIP_WIDTH, max_bytes=CLIP_MAX_BUFFER_MB * 1024 * 1024):
+        self.clip_fps = clip_fps
+        self.width = width
+        self.max_bytes = max_bytes
+
+        # Sample the source down to the clip frame rate (e.g. 30 FPS -> every 3rd frame)
+        self.sample_every = max(1, int(round(source_fps / float(clip_fps))))
+        self.pre_frames = max(1, int(pre_seconds * clip_fps))
+        self.post_frames = max(1, int(post_seconds * clip_fps))
+
+        self.frames = deque(maxlen=self.pre_frames) # JPEG bytes, oldest first
+        self.buffer_bytes = 0
+        self.next_seq = 0 # sequence number of the next ring frame (ring holds [next_seq - len, next_seq))
+        self.pending = [] # Clips still collecting post-event frames: [{'path', 'frames', 'start', 'remaining'}]
+        self.frame_index = 0
+
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), CLIP_JPEG_QUALITY]
+
+    def push(self, frame):
+        """
+        Adds a frame to the ring buffer (sampled to the clip FPS).
+        Cheap enough to call every frame: skipped frames return immediately.
+        """
+        self.frame_index += 1
+        if self.frame_index % self.sample_every != 0:
+            return
+
+        # 1. Resize to clip resolution and encode once
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)))
+        ok, buf = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            return
+        jpg = buf.tobytes()
+
+        # 2. Append to ring buffer (deque drops the oldest frame when full)
+        if len(self.frames) == self.frames.maxlen:
+            self.buffer_bytes -= len(self.frames[0])
+        self.frames.append(jpg)
+        self.buffer_bytes += len(jpg)
+        self.next_seq += 1
+
+        # 3. Feed clips waiting for post-event frames
+        for clip in list(self.pending):
+            clip['frames'].append(jpg)
+            clip['remaining'] -= 1
+            if clip['remaining'] <= 0:
+                self.pending.remove(clip)
+                self._write_async(clip)
+
+        # 4. Enforce memory cap (drop oldest history first)
+        while self.memory_usage() > self.max_bytes and (self.frames or any(c['frames'] for c in self.pending)):
+            self._drop_oldest()
+
+    def trigger(self, snapshot_path):
+        """
+        Starts an evidence clip for a violation.
+        The clip is stored next to the snapshot with the same base name (.mp4).
+        Returns:
+            str: Path the clip will be written to, or None if no snapshot path.
+        """
+        if not snapshot_path:
+            return None
+
+        clip_path = clip_path_for(snapshot_path)
+        # Two violations of one track in the same second share the snapshot name: one clip covers both
+        if any(clip['path'] == clip_path for clip in self.pending):
+            return clip_path
+        self.pending.append({
+            'path': clip_path,
+            'frames': list(self.frames), # same bytes objects as the ring, not copies
+            'start': self.next_seq - len(self.frames),
+            'remaining': self.post_frames
+        })
+        return clip_path
+
+    def memory_usage(self):
+        """
+        Returns bytes currently held (ring buffer + clips still collecting), each frame counted once.
+        Every clip holds a contiguous run of frames up to the newest one, so frames no longer in
+        the ring are exactly the head of the oldest pending clip.
+        """
+        ring_start = self.next_seq - len(self.frames)
+        history = [clip for clip in self.pending if clip['start'] < ring_start]
+        if not history:
+            return self.buffer_bytes
+        oldest = min(history, key=lambda clip: clip['start'])
+        return self.buffer_bytes + sum(len(f) for f in oldest['frames'][:ring_start - oldest['start']])
+
+    def _drop_oldest(self):
+        """Drops the oldest frame held, from the ring and from every clip holding it."""
+        ring_start = self.next_seq - len(self.frames)
+        starts = [clip['start'] for clip in self.pending if clip['frames']]
+        oldest = min(starts + ([ring_start] if self.frames else []))
+        if self.frames and ring_start == oldest:
+            self.buffer_bytes -= len(self.frames.popleft())
+        for clip in self.pending:
+            if clip['frames'] and clip['start'] == oldest:
+                clip['frames'].pop(0)
+                clip['start'] += 1
+
+    def _write_async(self, clip):
+        """Hands the finished clip to a background thread so the frame loop never blocks on disk."""
+        writer = threading.Thread(target=self._write_clip, args=(clip['path'], clip['frames']), daemon=True)
+        writer.start()
+
+    def _write_clip(self, path, frames):
+        """Writes to a temporary name and renames when done: an existing clip path is a finished clip."""
+        if not frames:
+            return
+        # Unique per writer: a clip re-triggered for the same path must not share the temporary file
+        tmp_path = f"{os.path.splitext(path)[0]}.{os.getpid()}_{threading.get_ident()}.part.mp4"
+        writer = None
+        try:
+            for jpg in frames:
+                img = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if img is None:
+                    continue
+                if writer is None:
+                    h, w = img.shape[:2]
+                    writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*'mp4v'), self.clip_fps, (w, h))
+                writer.write(img)
+            if writer is not None:
+                writer.release()
+                writer = None
+                os.replace(tmp_path, path)
+            print(f"[CLIP SAVED] {path} ({len(frames)} frames)")
+        except Exception as e:
+            print(f"[ERROR] Failed to write clip {path}: {e}")
+        finally:
+            if writer is not None:
+                writer.release()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
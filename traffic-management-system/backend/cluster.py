@@ -0,0 +1,312 @@
+"""
+Coordinator / worker roles for spreading cameras over several nodes.
+
+  worker       runs camera pipelines (enforcement duty, no UI) for the cameras
+               assigned to it and publishes over the transport:
+                 - violation records, with their snapshot, challan and clip files
+                   attached (local copies are deleted once handed to the transport)
+                 - a heartbeat: its cameras and its stats dict (with its
+                   cameras' analytics totals)
+                 - the latest frame of each camera (downscaled, CLUSTER_FRAME_FPS)
+  coordinator  owns the violation store and serves the Flask UI; assigns cameras
+               to live workers, stores their violations, and republishes their
+               frames in the local frame store (thumbnails, mosaic, /video_feed).
+
+Select the role with TMS_ROLE=coordinator|worker (utils/config.py).
+"""
+import base64
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from utils.config import (CLUSTER_HEARTBEAT_SECONDS, CLUSTER_WORKER_TIMEOUT, CLUSTER_FRAME_FPS,
+                          CLUSTER_FRAME_WIDTH, CLUSTER_EVENT_BATCH, CLUSTER_CLIP_WAIT_SECONDS)
+from utils import storage, system_state
+from frame_store import get_latest_frame
+from clip_recorder import clip_path_for
+from camera_pipeline import placeholder_chunk
+import database
+import snapshot
+import challan
+
+# Record fields holding evidence files, and the directory they are restored to on the coordinator
+# (clips live next to their snapshot)
+EVIDENCE_FIELDS = {"snapshot_path": lambda: snapshot.SNAPSHOT_DIR, "challan_path": lambda: challan.CHALLAN_DIR,
+                   "clip_path": lambda: snapshot.SNAPSHOT_DIR}
+
+def pack_violation(record):
+    """Worker side: record + base64 evidence files, so the coordinator needs no shared disk."""
+    files = {}
+    for field in EVIDENCE_FIELDS:
+        path = record.get(field)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                files[field] = [os.path.basename(path), base64.b64encode(f.read()).decode("ascii")]
+    return {"record": record, "files": files}
+
+def unpack_violation(payload):
+    """Coordinator side: writes attached files into the current storage generation. Returns: the record."""
+    record = dict(payload["record"])
+    for field, (name, data) in payload.get("files", {}).items():
+        directory = storage.generation_dir(EVIDENCE_FIELDS[field]())
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, os.path.basename(name))
+        with open(path, 'wb') as f:
+            f.write(base64.b64decode(data))
+        record[field] = path
+    return record
+
+def discard_evidence(record):
+    """Deletes a record's local evidence files (worker side, after they were sent)."""
+    for field in EVIDENCE_FIELDS:
+        path = record.get(field)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"[CLUSTER] Could not delete {path} ({e})")
+
+def merge_stats(local, worker_stats):
+    """Dashboard stats of the whole cluster: worker counters summed, recent violations interleaved."""
+    merged = dict(local)
+    if not worker_stats:
+        return merged
+    merged["total_vehicles"] = sum(s.get("total_vehicles", 0) for s in worker_stats)
+    speeds = [s.get("current_speed_avg", 0) for s in worker_stats if s.get("current_speed_avg")]
+    merged["current_speed_avg"] = round(sum(speeds) / len(speeds), 1) if speeds else 0
+    recent = [v for s in worker_stats for v in s.get("recent_violations", [])]
+    merged["recent_violations"] = sorted(recent, key=lambda v: v.get("time", ""), reverse=True)[:10]
+    for key in ("tracks", "clip_buffer_bytes", "scheduler", "analytics"):
+        merged[key] = {k: v for s in worker_stats for k, v in s.get(key, {}).items()}
+    return merged
+
+class Worker:
+    """
+    pipeline_for(camera) -> pipeline with set_enforce(); stats_fn() -> stats dict;
+    on_reset() is called when the coordinator cleared the history.
+    """
+    def __init__(self, worker_id, transport, cameras, pipeline_for, stats_fn, on_reset=None,
+                 frame_fps=CLUSTER_FRAME_FPS, frame_width=CLUSTER_FRAME_WIDTH, clip_wait_seconds=CLUSTER_CLIP_WAIT_SECONDS):
+        self.worker_id = worker_id
+        self.transport = transport
+        self.cameras = list(cameras)   # cameras this node can open
+        self.pipeline_for = pipeline_for
+        self.stats_fn = stats_fn
+        self.on_reset = on_reset
+        self.frame_interval = 1.0 / frame_fps
+        self.frame_width = frame_width
+        self.assigned = set()
+        self.epoch = None
+        self.sent_versions = {}   # {camera: frame store version last sent}
+        self.last_heartbeat = 0.0
+        self.clip_wait_seconds = clip_wait_seconds
+        self.outbox = []          # [(queued at, record)] waiting for their evidence clip
+        self.outbox_lock = threading.Lock()
+
+    def send_violation(self, record):
+        """
+        Violation sink for database.save_violation on worker nodes (called on pipeline threads).
+        Queued only: the worker loop sends it once its evidence clip is written (post-event
+        frames come later), or without it after clip_wait_seconds.
+        """
+        with self.outbox_lock:
+            self.outbox.append((time.time(), dict(record)))
+
+    def flush_outbox(self, now=None):
+        """Sends queued records whose clip is finished (or overdue); deletes the local evidence files."""
+        now = time.time() if now is None else now
+        with self.outbox_lock:
+            ready, waiting = [], []
+            for queued_at, record in self.outbox:
+                clip = clip_path_for(record["snapshot_path"]) if record.get("snapshot_path") else None
+                if clip and os.path.exists(clip):
+                    record["clip_path"] = clip
+                    ready.append(record)
+                elif not clip or now - queued_at >= self.clip_wait_seconds:
+                    ready.append(record)
+                else:
+                    waiting.append((queued_at, record))
+            self.outbox = waiting
+        for i, record in enumerate(ready):
+            try:
+                self.transport.send_event("violation", pack_violation(record), self.worker_id)
+            except Exception:
+                with self.outbox_lock: # retried on the next step
+                    self.outbox[:0] = [(now, r) for r in ready[i:]]
+                raise
+            # The transport holds a copy now: the coordinator owns the evidence
+            discard_evidence(record)
+
+    def discard_outbox(self):
+        """Drops queued records and their files (history cleared on the coordinator)."""
+        with self.outbox_lock:
+            records, self.outbox = [r for _, r in self.outbox], []
+        for record in records:
+            if record.get("snapshot_path"):
+                record.setdefault("clip_path", clip_path_for(record["snapshot_path"]))
+            discard_evidence(record)
+
+    def heartbeat(self):
+        self.transport.put_status(self.worker_id, {"cameras": self.cameras, "assigned": sorted(self.assigned),
+                                                   "stats": self.stats_fn()})
+
+    def apply_assignment(self):
+        """Starts/stops enforcement on cameras (re)assigned to this worker."""
+        assignment = self.transport.get_assignment(self.worker_id) or {"cameras": [], "epoch": self.epoch}
+        epoch = assignment.get("epoch")
+        if self.epoch is not None and epoch != self.epoch:
+            print(f"[CLUSTER] {self.worker_id}: history cleared on the coordinator (epoch {epoch})")
+            self.discard_outbox()
+            if self.on_reset:
+                self.on_reset()
+        self.epoch = epoch
+        wanted = set(assignment["cameras"])
+        for camera in wanted - self.assigned:
+            print(f"[CLUSTER] {self.worker_id}: starting {camera}")
+            self.pipeline_for(camera).set_enforce(True)
+        for camera in self.assigned - wanted:
+            print(f"[CLUSTER] {self.worker_id}: releasing {camera}")
+            self.pipeline_for(camera).set_enforce(False)
+            self.sent_versions.pop(camera, None)
+        self.assigned = wanted
+
+    def publish_frames(self):
+        """Sends each assigned camera's latest frame once (downscaled JPEG from the frame store cache)."""
+        for camera in self.assigned:
+            latest = get_latest_frame(camera)
+            if latest is None:
+                continue
+            jpeg, version, _ = latest.get(self.frame_width)
+            if jpeg is not None and self.sent_versions.get(camera) != version:
+                self.transport.put_frame(camera, jpeg, self.worker_id, version)
+                self.sent_versions[camera] = version
+
+    def step(self, now=None):
+        now = time.time() if now is None else now
+        if now - self.last_heartbeat >= CLUSTER_HEARTBEAT_SECONDS:
+            self.last_heartbeat = now
+            self.apply_assignment()
+            self.heartbeat()
+        self.flush_outbox(now)
+        self.publish_frames()
+
+    def run(self):
+        print(f"[CLUSTER] Worker {self.worker_id} serving {len(self.cameras)} cameras")
+        while True:
+            start = time.perf_counter()
+            try:
+                self.step()
+            except Exception as e:
+                print(f"[CLUSTER] {self.worker_id}: transport error ({e})")
+            time.sleep(max(0.0, self.frame_interval - (time.perf_counter() - start)))
+
+class Coordinator:
+    def __init__(self, transport, worker_timeout=CLUSTER_WORKER_TIMEOUT):
+        self.transport = transport
+        self.worker_timeout = worker_timeout
+        self.assignment = {}      # {worker: [cameras]}
+        self.epoch = None
+        self.seen_frames = {}     # {camera: (sender, version)}
+        self.workers = {}         # {worker: heartbeat payload} of live workers
+        self.stored = 0
+
+    def live_workers(self, now=None):
+        now = time.time() if now is None else now
+        return {worker: payload for worker, (updated, payload) in self.transport.get_status().items()
+                if now - updated <= self.worker_timeout}
+
+    def assign(self, now=None):
+        """
+        Keeps cameras on their current worker while it is alive; cameras of dead
+        workers and new cameras go to the least-loaded live worker that has them.
+        """
+        self.workers = self.live_workers(now)
+        assignment = {worker: [c for c in self.assignment.get(worker, []) if c in payload["cameras"]]
+                      for worker, payload in self.workers.items()}
+        placed = {c for cameras in assignment.values() for c in cameras}
+        for camera in sorted({c for payload in self.workers.values() for c in payload["cameras"]} - placed):
+            candidates = [w for w, payload in self.workers.items() if camera in payload["cameras"]]
+            worker = min(candidates, key=lambda w: (len(assignment[w]), w))
+            assignment[worker].append(camera)
+
+        epoch = system_state.get_reset_epoch()
+        if assignment != self.assignment or epoch != self.epoch:
+            for worker, cameras in assignment.items():
+                if sorted(cameras) != sorted(self.assignment.get(worker, [])):
+                    print(f"[CLUSTER] {worker}: {sorted(cameras)}")
+            self.transport.set_assignment({w: {"cameras": sorted(c), "epoch": epoch} for w, c in assignment.items()})
+            self.assignment, self.epoch = assignment, epoch
+        return assignment
+
+    def drain_events(self):
+        """Stores queued violation records. Returns: number stored."""
+        events = self.transport.fetch_events(CLUSTER_EVENT_BATCH)
+        for event_id, kind, sender, payload in events:
+            if kind == "violation":
+                record = unpack_violation(payload)
+                record.setdefault("node", sender)
+                database.save_violation(record)
+                self.stored += 1
+        # Acked after storing: a coordinator crash in between re-delivers (at least once)
+        self.transport.ack_events([e[0] for e in events])
+        return len(events)
+
+    def pull_frames(self):
+        """Republishes workers' latest frames in the local frame store."""
+        for camera, sender, version, jpeg in self.transport.frames_since(self.seen_frames):
+            self.seen_frames[camera] = (sender, version)
+            image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            if image is not None:
+                get_latest_frame(camera, create=True).publish(image, jpeg)
+
+    def cameras(self):
+        """Returns: every camera some live worker can serve."""
+        return sorted({c for payload in self.workers.values() for c in payload["cameras"]})
+
+    def worker_stats(self):
+        return [payload.get("stats", {}) for payload in self.workers.values()]
+
+    def get_status(self):
+        return {worker: {"cameras": self.assignment.get(worker, []), "available": payload["cameras"]}
+                for worker, payload in self.workers.items()}
+
+    def run(self, interval=1.0 / CLUSTER_FRAME_FPS):
+        print("[CLUSTER] Coordinator running")
+        last_assign = 0.0
+        while True:
+            start = time.perf_counter()
+            try:
+                if time.time() - last_assign >= CLUSTER_HEARTBEAT_SECONDS:
+                    last_assign = time.time()
+                    self.assign()
+                while self.drain_events() == CLUSTER_EVENT_BATCH:
+                    pass
+                self.pull_frames()
+            except Exception as e:
+                print(f"[CLUSTER] Coordinator transport error ({e})")
+            time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+def relay_stream(camera, fps=CLUSTER_FRAME_FPS, keepalive_seconds=1.0):
+    """
+    Coordinator /video_feed: MJPEG of the frames a worker publishes for `camera`.
+    Without a new frame for keepalive_seconds a placeholder is sent, so a departed
+    viewer is noticed (the write fails) even while the worker is silent.
+    """
+    seen = None
+    last_sent = time.time()
+    while True:
+        chunk = None
+        latest = get_latest_frame(camera)
+        if latest is not None:
+            jpeg, version, _ = latest.get()
+            if jpeg is not None and version != seen:
+                seen = version
+                chunk = (b'--frame\r\n'
+                         b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        if chunk is None and time.time() - last_sent >= keepalive_seconds:
+            chunk = placeholder_chunk()
+        if chunk is not None:
+            last_sent = time.time()
+            yield chunk
+        time.sleep(1.0 / fps)
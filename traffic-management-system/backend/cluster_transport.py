@@ -0,0 +1,156 @@
+"""
+Transports between the coordinator and worker nodes (see cluster.py).
+
+Four kinds of traffic, with different delivery semantics:
+  events      - violation records: queued, delivered at least once (deleted on ack)
+  frames      - latest JPEG per camera: last value wins, nothing queues up
+  status      - one heartbeat payload per worker: last value wins
+  assignment  - cameras per worker, written by the coordinator
+Implementations:
+  memory://             MemoryTransport, one process (tests, single-node runs)
+  sqlite:///path/to.db  SQLiteTransport, processes on one machine / a shared volume
+A network broker only has to implement the same methods.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class MemoryTransport:
+    """In-process transport: the reference implementation of the interface."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []       # [(id, kind, sender, payload)]
+        self.next_event_id = 1
+        self.frames = {}       # {camera: (sender, version, jpeg)}
+        self.status = {}       # {worker: (updated, payload)}
+        self.assignment = {}   # {worker: payload}
+
+    def send_event(self, kind, payload, sender):
+        with self.lock:
+            self.events.append((self.next_event_id, kind, sender, payload))
+            self.next_event_id += 1
+
+    def fetch_events(self, limit=100):
+        """Returns: up to `limit` unacknowledged events, oldest first."""
+        with self.lock:
+            return list(self.events[:limit])
+
+    def ack_events(self, ids):
+        ids = set(ids)
+        with self.lock:
+            self.events = [e for e in self.events if e[0] not in ids]
+
+    def put_frame(self, camera, jpeg, sender, version):
+        with self.lock:
+            self.frames[camera] = (sender, version, jpeg)
+
+    def frames_since(self, seen):
+        """seen: {camera: (sender, version)} already consumed. Returns: [(camera, sender, version, jpeg)] that changed."""
+        with self.lock:
+            return [(camera, sender, version, jpeg) for camera, (sender, version, jpeg) in self.frames.items()
+                    if seen.get(camera) != (sender, version)]
+
+    def put_status(self, worker, payload):
+        with self.lock:
+            self.status[worker] = (time.time(), payload)
+
+    def get_status(self):
+        """Returns: {worker: (last heartbeat time, payload)}."""
+        with self.lock:
+            return dict(self.status)
+
+    def set_assignment(self, assignment):
+        """assignment: {worker: {"cameras": [...], "epoch": n}} (replaces the previous one)."""
+        with self.lock:
+            self.assignment = dict(assignment)
+
+    def get_assignment(self, worker):
+        with self.lock:
+            return self.assignment.get(worker)
+
+class SQLiteTransport:
+    """
+    Transport over one SQLite file (WAL mode): several processes on one machine can share it.
+    Payloads are JSON; frames are stored as BLOBs, one row per camera.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, sender TEXT, payload TEXT);
+        CREATE TABLE IF NOT EXISTS frames (camera TEXT PRIMARY KEY, sender TEXT, version INTEGER, jpeg BLOB);
+        CREATE TABLE IF NOT EXISTS status (worker TEXT PRIMARY KEY, updated REAL, payload TEXT);
+        CREATE TABLE IF NOT EXISTS assignment (worker TEXT PRIMARY KEY, payload TEXT);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def send_event(self, kind, payload, sender):
+        self._execute("INSERT INTO events (kind, sender, payload) VALUES (?, ?, ?)", (kind, sender, json.dumps(payload)))
+
+    def fetch_events(self, limit=100):
+        rows = self._execute("SELECT id, kind, sender, payload FROM events ORDER BY id LIMIT ?", (limit,))
+        return [(row[0], row[1], row[2], json.loads(row[3])) for row in rows]
+
+    def ack_events(self, ids):
+        ids = list(ids)
+        if ids:
+            self._execute(f"DELETE FROM events WHERE id IN ({','.join('?' * len(ids))})", ids)
+
+    def put_frame(self, camera, jpeg, sender, version):
+        self._execute("INSERT OR REPLACE INTO frames (camera, sender, version, jpeg) VALUES (?, ?, ?, ?)",
+                      (camera, sender, version, sqlite3.Binary(jpeg)))
+
+    def frames_since(self, seen):
+        # Versions first; BLOBs are only read for cameras that changed
+        changed = [(camera, sender, version) for camera, sender, version in
+                   self._execute("SELECT camera, sender, version FROM frames") if seen.get(camera) != (sender, version)]
+        out = []
+        for camera, sender, version in changed:
+            rows = self._execute("SELECT sender, version, jpeg FROM frames WHERE camera = ?", (camera,))
+            if rows:
+                out.append((camera, rows[0][0], rows[0][1], bytes(rows[0][2])))
+        return out
+
+    def put_status(self, worker, payload):
+        self._execute("INSERT OR REPLACE INTO status (worker, updated, payload) VALUES (?, ?, ?)",
+                      (worker, time.time(), json.dumps(payload)))
+
+    def get_status(self):
+        return {worker: (updated, json.loads(payload))
+                for worker, updated, payload in self._execute("SELECT worker, updated, payload FROM status")}
+
+    def set_assignment(self, assignment):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM assignment")
+                self.conn.executemany("INSERT INTO assignment (worker, payload) VALUES (?, ?)",
+                                      [(worker, json.dumps(payload)) for worker, payload in assignment.items()])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get_assignment(self, worker):
+        rows = self._execute("SELECT payload FROM assignment WHERE worker = ?", (worker,))
+        return json.loads(rows[0][0]) if rows else None
+
+def get_transport(url):
+    """memory:// or sqlite:///path/to/cluster.db. Returns: a transport instance."""
+    if url.startswith("memory://"):
+        return MemoryTransport()
+    if url.startswith("sqlite:///"):
+        return SQLiteTransport(url[len("sqlite:///"):])
+    raise ValueError(f"Unknown cluster transport: {url}")
@@ -36,6 +36,17 @@ class SpeedEstimator:
         transformed = cv2.perspectiveTransform(p, self.matrix)[0][0]
         return transformed
 
+    def transform_points(self, points):
+        """
+        Transforms N points in a single cv2.perspectiveTransform call.
+        points: (N, 2) array-like of (x, y) image coordinates
+        Returns: (N, 2) float64 array in bird's-eye coordinates (scale px per meter)
+        """
+        p = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        if p.shape[0] == 0:
+            return np.zeros((0, 2), dtype=np.float64)
+        return cv2.perspectiveTransform(p, self.matrix).reshape(-1, 2).astype(np.float64)
+
     def estimate_speed(self, tracks, fps=30):
         """
         tracks: list of (track_id, x1, y1, x2, y2, cls) from detector
@@ -43,14 +54,13 @@ class SpeedEstimator:
         """
         current_speeds = {}
         
-        for track in tracks:
-            track_id, x1, y1, x2, y2, cls = track
-            
-            # Use bottom center point of the bounding box for speed
-            cx = (x1 + x2) // 2
-            cy = y2
-            
-            transformed_pos = self.transform_point((cx, cy))
+        # Use bottom center point of the bounding box for speed
+        # (all points transformed in one call)
+        foot_points = [((x1 + x2) // 2, y2) for _, x1, y1, x2, y2, _ in tracks]
+        transformed_points = self.transform_points(foot_points)
+        
+        for track, transformed_pos in zip(tracks, transformed_points):
+            track_id = track[0]
             
             if track_id in self.previous_positions:
                 prev_x, prev_y, _ = self.previous_positions[track_id]
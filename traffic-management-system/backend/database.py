@@ -1,15 +1,29 @@
 import json
 import os
 from utils.config import PROJECT_ROOT
+from utils import storage
 
 DB_FILE = os.path.join(PROJECT_ROOT, "violations.json")
 
+# Worker nodes hand records to the coordinator instead of writing them (see cluster.py)
+_violation_sink = None
+
+def set_violation_sink(sink):
+    """sink(record) receives every saved violation instead of the local file (None = local file)."""
+    global _violation_sink
+    _violation_sink = sink
+
+def current_db_file():
+    """DB partition of the current storage generation (see utils/storage.py)."""
+    return storage.partition_file(DB_FILE)
+
 def load_violations():
     """Reads the violation list from the JSON file."""
-    if not os.path.exists(DB_FILE):
+    db_file = current_db_file()
+    if not os.path.exists(db_file):
         return []
     try:
-        with open(DB_FILE, 'r') as f:
+        with open(db_file, 'r') as f:
             return json.load(f)
     except (json.JSONDecodeError, IOError):
         return []
@@ -19,6 +33,10 @@ def save_violation(record):
     Appends a new violation record to the JSON file.
     record: dict containing violation details
     """
+    if _violation_sink is not None:
+        _violation_sink(record)
+        print(f"[DATABASE] Forwarded violation for ID {record.get('id')}")
+        return
     data = load_violations()
     data.insert(0, record) # Prepend to show newest first
     
@@ -26,16 +44,21 @@ def save_violation(record):
     if len(data) > 1000:
         data = data[:1000]
         
-    with open(DB_FILE, 'w') as f:
+    with open(current_db_file(), 'w') as f:
         json.dump(data, f, indent=4)
     print(f"[DATABASE] Saved violation for ID {record.get('id')}")
 
+def iter_violations():
+    """Yields violation records (newest first) from the current partition."""
+    for record in load_violations():
+        yield record
+
 def get_all_violations():
     """Returns all violations."""
     return load_violations()
 
 def clear_all_data():
-    """Clears all violation data from the JSON file."""
-    with open(DB_FILE, 'w') as f:
+    """Clears all violation data from the current partition (history reset uses a new generation instead)."""
+    with open(current_db_file(), 'w') as f:
         json.dump([], f, indent=4)
     print("[DATABASE] All violation data cleared.")
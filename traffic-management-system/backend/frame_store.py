@@ -0,0 +1,65 @@
+import threading
+import time
+import cv2
+from utils.config import THUMBNAIL_WIDTHS, THUMBNAIL_JPEG_QUALITY
+
+class LatestFrame:
+    """
+    Most recent annotated frame of one camera, as published by its pipeline.
+    The full-size JPEG is the one the MJPEG stream already encoded; downscaled
+    variants are encoded on first request and cached until the next frame.
+    """
+    def __init__(self, camera):
+        self.camera = camera
+        self.version = 0
+        self.timestamp = 0.0
+        self.jpeg = None
+        self.image = None      # annotated BGR frame (source for thumbnails)
+        self.thumbnails = {}   # {width: jpeg bytes} for the current version
+        self.lock = threading.Lock()
+
+    def publish(self, image, jpeg):
+        """Stores a new frame; no copy or encode happens here."""
+        with self.lock:
+            self.version += 1
+            self.timestamp = time.time()
+            self.image = image
+            self.jpeg = jpeg
+            self.thumbnails = {}
+
+    def get(self, width=None):
+        """
+        width: requested thumbnail width (snapped to the nearest THUMBNAIL_WIDTHS entry); None = full size.
+        Returns: (jpeg bytes, version, timestamp), or (None, 0, 0.0) before the first frame.
+        """
+        with self.lock:
+            image, jpeg, version, timestamp = self.image, self.jpeg, self.version, self.timestamp
+            if width is not None:
+                width = min(THUMBNAIL_WIDTHS, key=lambda w: abs(w - width))
+            if jpeg is None or width is None or width >= image.shape[1]:
+                return jpeg, version, timestamp
+            cached = self.thumbnails.get(width)
+        if cached is not None:
+            return cached, version, timestamp
+
+        # Encode outside the lock so the pipeline can keep publishing
+        height = int(image.shape[0] * width / image.shape[1])
+        small = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_JPEG_QUALITY])
+        thumbnail = buffer.tobytes() if ok else jpeg
+        with self.lock:
+            if self.version == version:
+                self.thumbnails[width] = thumbnail
+        return thumbnail, version, timestamp
+
+# {camera: LatestFrame}
+_frames = {}
+_frames_lock = threading.Lock()
+
+def get_latest_frame(camera, create=False):
+    """Returns the camera's LatestFrame (created on demand when create=True, else None if unknown)."""
+    with _frames_lock:
+        latest = _frames.get(camera)
+        if latest is None and create:
+            latest = _frames[camera] = LatestFrame(camera)
+        return latest
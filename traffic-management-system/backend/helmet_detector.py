@@ -1,21 +1,21 @@
 import cv2
 import os
-import time
 import numpy as np
-from ultralytics import YOLO
-from utils.config import PROJECT_ROOT
+from utils.config import PROJECT_ROOT, HELMET_MODEL_FILE, HELMET_INPUT_SIZE
+from utils import metrics
+from utils import model_loader
 from snapshot import capture_snapshot
 from challan import generate_challan
 from database import save_violation
 import datetime
 
-# Load model path
-HELMET_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "helmet_classifier.pt")
+# Load model path (variant selected in config, see benchmarks/sweep_helmet.py)
+HELMET_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", HELMET_MODEL_FILE)
 
 class HelmetDetector:
-    def __init__(self):
+    def __init__(self, clip_recorder=None, inference_cache=None):
         print(f"Loading Helmet Classifier from: {HELMET_MODEL_PATH}")
-        self.model = YOLO(HELMET_MODEL_PATH)
+        self.model = model_loader.get_model(HELMET_MODEL_PATH) # Warm instance if preloaded at startup
         
         # Tracking State
         self.violated_vehicles = set() # Set of track_ids that have already been fined
@@ -24,29 +24,50 @@ class HelmetDetector:
         # Configuration
         self.FRAMES_THRESHOLD = 5 # Require 5 consecutive frames of "No Helmet"
         
-        # System Reset Logic
-        self.last_check_time = time.time()
+        # Stabilization state {track_id: {'status': 'UNKNOWN', 'count': 0, 'confirmed': 'UNKNOWN'}}
+        self.helmet_stability = {}
 
-    def detect(self, track_id, frame, bbox, plate=None):
+        # Optional: evidence clip ring buffer for this camera
+        self.clip_recorder = clip_recorder
+
+        # Optional: on-disk cache of classifier outputs (re-processing recorded clips)
+        self.inference_cache = inference_cache
+        if inference_cache:
+            inference_cache.register("helmet", HELMET_MODEL_PATH, {"imgsz": HELMET_INPUT_SIZE})
+
+    def forget_tracks(self, track_ids):
+        """Drops per-track state for tracks that left the scene (called by TrackRegistry)."""
+        for track_id in track_ids:
+            self.helmet_history.pop(track_id, None)
+            self.helmet_stability.pop(track_id, None)
+            self.violated_vehicles.discard(track_id)
+
+    def reset(self):
+        """Drops all per-track state (history cleared; see system_state reset epoch)."""
+        self.violated_vehicles.clear()
+        self.helmet_history.clear()
+        self.helmet_stability.clear()
+
+    def _classify(self, crop):
+        """Runs the classifier on a BGR head crop. Returns: [label, confidence]."""
+        crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        metrics.INFERENCE_CALLS.labels("helmet").inc()
+        if HELMET_INPUT_SIZE:
+            results = self.model(crop_rgb, imgsz=HELMET_INPUT_SIZE, verbose=False)
+        else:
+            results = self.model(crop_rgb, verbose=False)
+        probs = results[0].probs
+        return [str(results[0].names[probs.top1]), float(probs.top1conf.item())]
+
+    def detect(self, track_id, frame, bbox, plate=None, frame_index=None):
         """
         Main detection entry point.
+        frame_index: Position of the frame in its source, used as the inference cache key (optional).
         Returns:
             status (str): "SAFE", "VIOLATION", "UNKNOWN"
             is_new_violation (bool): True if this specific call triggered a new violation
         """
-        # 1. System Reset Check
-        # 1. System Reset Check
-        from utils import system_state
-        if self.last_check_time < system_state.get_last_reset_time():
-            self.violated_vehicles.clear()
-            self.helmet_history.clear()
-            # New: Stabilization state {track_id: {'status': 'UNKNOWN', 'count': 0, 'confirmed': 'UNKNOWN'}}
-            self.helmet_stability = {} 
-            self.last_check_time = time.time()
-
-        # Init stabilization state for new id
-        if not hasattr(self, 'helmet_stability'):
-             self.helmet_stability = {}
+        # 1. Init stabilization state for new id
         if track_id not in self.helmet_stability:
              self.helmet_stability[track_id] = {'status': 'UNKNOWN', 'count': 0, 'confirmed': 'UNKNOWN'}
 
@@ -85,17 +106,13 @@ class HelmetDetector:
 
         crop = frame[head_y1:head_y2, head_x1:head_x2]
 
-        # 4. Preprocessing
-        crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
-        
-        # 5. Classification
-        results = self.model(crop_rgb, verbose=False)
-        probs = results[0].probs
-        
-        top1_idx = probs.top1
-        conf = probs.top1conf.item()
-        label = results[0].names[top1_idx]
-        label_str = str(label).lower()
+        # 4-5. Preprocessing + Classification (served from the cache when re-processing a clip)
+        if self.inference_cache and frame_index is not None:
+            label, conf = self.inference_cache.lookup("helmet", frame_index, lambda: self._classify(crop),
+                                                      key=f"{head_x1},{head_y1},{head_x2},{head_y2}")
+        else:
+            label, conf = self._classify(crop)
+        label_str = label.lower()
         
         is_val_helmet_class = False
         if "no" in label_str or "without" in label_str:
@@ -167,6 +184,8 @@ class HelmetDetector:
         
         # Speed 0 placeholder
         snapshot_path = capture_snapshot(frame, track_id, 0, bbox)
+        if self.clip_recorder:
+            self.clip_recorder.trigger(snapshot_path)
         
         if snapshot_path:
             data = {
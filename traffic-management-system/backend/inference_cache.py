@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import cv2
+from utils.config import INFERENCE_CACHE_DIR
+
+# Memoized content hashes: {path: ((size, mtime_ns), sha1)}
+_file_hashes = {}
+
+def file_fingerprint(path):
+    """
+    SHA-1 of a file's contents (hashed once per size/mtime).
+    Returns: hex digest, or "missing" if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _file_hashes.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    _file_hashes[path] = (stamp, h.hexdigest())
+    return h.hexdigest()
+
+def source_frame_index(cap):
+    """
+    Position of the frame the next cap.read() returns: the cache key for a frame.
+    Unlike a running frame counter it repeats when a file source loops, so later
+    passes over the clip replay the first one.
+    """
+    return int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+class InferenceCache:
+    """
+    Opt-in on-disk cache of model outputs for one video file.
+
+    Layout: <cache_dir>/<video hash>/<namespace>-<fingerprint>.jsonl, one JSON line per
+    entry ({"k": "<frame index>|<key>", "v": value}). The fingerprint covers the model
+    file contents and the call parameters (thresholds, classes, ...), so changing either
+    starts a fresh store and stale stores of the same namespace are deleted on open.
+
+    Tracker IDs are replayed as recorded: a run that goes past the cached frames
+    continues with a fresh tracker, so IDs are only continuous over the cached prefix.
+    """
+    FLUSH_EVERY = 256 # entries buffered before appending to disk
+
+    def __init__(self, video_path, cache_dir=INFERENCE_CACHE_DIR):
+        self.video_hash = file_fingerprint(video_path)
+        self.dir = os.path.join(cache_dir, self.video_hash[:16])
+        self.stores = {} # {namespace: {'path', 'entries', 'pending'}}
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, namespace, model_path, params=None):
+        """
+        Opens (or creates) the store for one model.
+        params: JSON-serializable settings that change the model output (conf, classes, ...).
+        """
+        payload = json.dumps({"model": file_fingerprint(model_path) if model_path else None,
+                              "params": params or {}}, sort_keys=True)
+        fingerprint = hashlib.sha1(payload.encode()).hexdigest()[:16]
+        filename = f"{namespace}-{fingerprint}.jsonl"
+        os.makedirs(self.dir, exist_ok=True)
+
+        # Invalidate: drop stores written with another model/config
+        for name in os.listdir(self.dir):
+            if name.startswith(f"{namespace}-") and name != filename:
+                print(f"[CACHE] Removing stale {namespace} cache {name}")
+                os.remove(os.path.join(self.dir, name))
+
+        path = os.path.join(self.dir, filename)
+        self.stores[namespace] = {'path': path, 'entries': self._load(path), 'pending': []}
+        print(f"[CACHE] {namespace}: {len(self.stores[namespace]['entries'])} cached entries ({path})")
+
+    @staticmethod
+    def _load(path):
+        entries = {}
+        if not os.path.exists(path):
+            return entries
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Truncated last line after a crash
+                entries[item["k"]] = item["v"]
+        return entries
+
+    @staticmethod
+    def _key(frame_index, key):
+        return f"{frame_index}|{key}" if key is not None else str(frame_index)
+
+    def get(self, namespace, frame_index, key=None):
+        """Returns the cached value, or None on a miss."""
+        return self.stores[namespace]['entries'].get(self._key(frame_index, key))
+
+    def put(self, namespace, frame_index, value, key=None):
+        """Stores a JSON-serializable value (written to disk in batches)."""
+        store = self.stores[namespace]
+        k = self._key(frame_index, key)
+        store['entries'][k] = value
+        store['pending'].append(json.dumps({"k": k, "v": value}))
+        if len(store['pending']) >= self.FLUSH_EVERY:
+            self._flush(store)
+
+    def lookup(self, namespace, frame_index, compute, key=None):
+        """
+        Returns the cached value, or calls compute() and caches its result.
+        compute must return a JSON-serializable value (not None).
+        """
+        value = self.get(namespace, frame_index, key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(namespace, frame_index, value, key)
+        return value
+
+    def _flush(self, store):
+        if not store['pending']:
+            return
+        with open(store['path'], 'a') as f:
+            f.write("\n".join(store['pending']) + "\n")
+        store['pending'] = []
+
+    def flush(self):
+        """Appends all buffered entries to disk."""
+        for store in self.stores.values():
+            self._flush(store)
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses}
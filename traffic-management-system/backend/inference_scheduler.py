@@ -0,0 +1,131 @@
+"""
+Deadline-aware scheduling of per-track model calls (helmet classification, plate
+localization) under overload.
+
+Every request of a frame carries a priority class and a deadline (frame index):
+  critical  always runs: an enforcement decision depends on it now (helmet violation
+            being confirmed, vehicle approaching the stop line on RED, track near
+            its lane's speed limit)
+  high      runs while the frame is within budget; otherwise deferred, and run
+            regardless once its deadline has passed (new tracks, unconfirmed helmets)
+  routine   runs while the frame is within budget; otherwise deferred, and shed
+            (previous result reused) once its deadline has passed
+Within a class, the earliest deadline runs first. A deferred request keeps its
+original deadline when it is submitted again on a later frame.
+"""
+import time
+from utils.config import SCHEDULER_DEADLINE_FRAMES
+from utils import metrics
+
+CRITICAL, HIGH, ROUTINE = 0, 1, 2
+PRIORITY_NAMES = ("critical", "high", "routine")
+OUTCOMES = ("run", "deferred", "shed")
+
+class InferenceScheduler:
+    def __init__(self, camera, frame_budget=None, deadline_frames=SCHEDULER_DEADLINE_FRAMES):
+        """
+        frame_budget: seconds per frame (measured from begin_frame) before non-critical
+                      work is deferred; None runs everything (scheduling disabled).
+        """
+        self.camera = camera
+        self.frame_budget = frame_budget
+        self.deadline_frames = {HIGH: deadline_frames["high"], ROUTINE: deadline_frames["routine"]}
+        self.frame_index = 0
+        self.frame_deadline = None
+        self.deadlines = {}   # {(kind, track_id): deadline frame} of deferred requests
+        self.last = {}        # {(kind, track_id): last result}
+        self.counts = {name: dict.fromkeys(OUTCOMES, 0) for name in PRIORITY_NAMES}
+        self.counters = {(p, o): metrics.INFERENCE_SCHEDULED.labels(camera, PRIORITY_NAMES[p], o)
+                         for p in (CRITICAL, HIGH, ROUTINE) for o in OUTCOMES}
+
+    def begin_frame(self, frame_index, start=None, frames=1):
+        """
+        start: perf_counter() when the frame began (decode included).
+        frames: frame intervals this frame's work may use. Detection frames carry the
+                tracker and helmet work of SKIP_FRAMES frames, so they get SKIP_FRAMES
+                budgets; judging them against one interval would report overload
+                whenever the pipeline keeps up on average.
+        """
+        self.frame_index = frame_index
+        if self.frame_budget is not None:
+            start = time.perf_counter() if start is None else start
+            self.frame_deadline = start + self.frame_budget * frames
+
+    def over_budget(self):
+        return self.frame_deadline is not None and time.perf_counter() >= self.frame_deadline
+
+    def _count(self, priority, outcome):
+        self.counts[PRIORITY_NAMES[priority]][outcome] += 1
+        self.counters[(priority, outcome)].inc()
+
+    def run(self, kind, requests, fallback):
+        """
+        requests: [(track_id, priority, fn)], fn() -> result.
+        fallback(track_id, last result or None) -> result used when a request is not run.
+        Returns: {track_id: result}
+        """
+        queue = []
+        for track_id, priority, fn in requests:
+            key = (kind, track_id)
+            deadline = self.deadlines.get(key)
+            if deadline is None:
+                deadline = self.frame_index + self.deadline_frames.get(priority, 0)
+            queue.append((priority, deadline, track_id, fn))
+        queue.sort(key=lambda r: (r[0], r[1]))
+
+        results = {}
+        for priority, deadline, track_id, fn in queue:
+            key = (kind, track_id)
+            expired = self.frame_index >= deadline
+            if priority == CRITICAL or not self.over_budget() or (priority == HIGH and expired):
+                results[track_id] = self.last[key] = fn()
+                self.deadlines.pop(key, None)
+                self._count(priority, "run")
+            elif expired:
+                self.deadlines.pop(key, None)
+                results[track_id] = fallback(track_id, self.last.get(key))
+                self._count(priority, "shed")
+            else:
+                self.deadlines[key] = deadline
+                results[track_id] = fallback(track_id, self.last.get(key))
+                self._count(priority, "deferred")
+        return results
+
+    def forget_tracks(self, track_ids):
+        """Drops deadlines and cached results of tracks that left the scene (called by TrackRegistry)."""
+        track_ids = set(track_ids)
+        for table in (self.deadlines, self.last):
+            for key in [k for k in table if k[1] in track_ids]:
+                del table[key]
+
+    def reset(self):
+        self.deadlines.clear()
+        self.last.clear()
+
+    def get_stats(self):
+        """Returns: {priority: {"run", "deferred", "shed"}} since start, plus pending deferrals."""
+        stats = {name: dict(counts) for name, counts in self.counts.items()}
+        stats["pending"] = len(self.deadlines)
+        return stats
+
+def helmet_priority(helmet_detector, track_id):
+    """Priority of a helmet classification from the detector's stabilization state."""
+    if track_id in helmet_detector.violated_vehicles:
+        return ROUTINE # answered from state, no model call
+    stb = helmet_detector.helmet_stability.get(track_id)
+    if stb is None or stb['confirmed'] == 'UNKNOWN':
+        return HIGH
+    if stb['confirmed'] == 'NO_HELMET' or stb['status'] == 'NO_HELMET':
+        return CRITICAL # violation being confirmed (or a HELMET lock being contested)
+    return ROUTINE
+
+def plate_priority(plate_manager, track_id, enforcement_critical):
+    """
+    enforcement_critical: the track may produce a violation on this frame (near its
+    speed limit, approaching the stop line while not GREEN).
+    """
+    if enforcement_critical:
+        return CRITICAL
+    if str(track_id) not in plate_manager.plate_data:
+        return HIGH
+    return ROUTINE
@@ -0,0 +1,178 @@
+"""
+Multi-camera mosaic stream (/video_feed/mosaic).
+
+Tiles the latest annotated frames of several cameras (frame_store.LatestFrame)
+into one grid, encoded once per tick at a fixed output size and FPS. Every
+viewer of the same (cameras, size, fps) selection gets the same JPEG bytes, so
+bandwidth and connections per viewer do not grow with the number of cameras.
+While a mosaic has viewers it holds a viewer slot on each camera's pipeline.
+"""
+import math
+import threading
+import time
+import cv2
+import numpy as np
+from utils.config import MOSAIC_JPEG_QUALITY
+from utils import metrics
+from frame_store import get_latest_frame
+
+def grid_shape(count):
+    """Returns: (columns, rows) of the most square grid holding `count` tiles."""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    return columns, max(1, math.ceil(count / columns))
+
+def fit_tile(image, tile_w, tile_h):
+    """Resizes image to fit a tile_w x tile_h cell (aspect kept, letterboxed). Returns: the tile."""
+    tile = np.zeros((tile_h, tile_w, 3), dtype=np.uint8)
+    h, w = image.shape[:2]
+    scale = min(tile_w / w, tile_h / h)
+    new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
+    x, y = (tile_w - new_w) // 2, (tile_h - new_h) // 2
+    tile[y:y + new_h, x:x + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    return tile
+
+class MosaicStream:
+    """
+    One composer thread per camera selection, running while it has viewers.
+    sources: objects with attach()/detach() (camera pipelines), attached from the
+    first viewer until the last one leaves.
+    on_idle(stream) is called after the last viewer left.
+    """
+    def __init__(self, cameras, width, height, fps, sources=(), jpeg_quality=MOSAIC_JPEG_QUALITY, on_idle=None):
+        self.cameras = list(cameras)
+        self.width, self.height, self.fps = width, height, fps
+        self.sources = list(sources)
+        self.jpeg_quality = jpeg_quality
+        self.on_idle = on_idle
+        self.columns, self.rows = grid_shape(len(self.cameras))
+        self.tile_w, self.tile_h = width // self.columns, height // self.rows
+        self.tiles = {}   # {camera: (source version, tile)}: unchanged cameras are not resized again
+        self.jpeg = None
+        self.version = 0
+        self.viewers = 0
+        self.thread = None
+        self.cond = threading.Condition()
+        self.compose_timer = metrics.STAGE_LATENCY.labels("mosaic", "compose")
+        self.encode_timer = metrics.STAGE_LATENCY.labels("mosaic", "encode")
+
+    def _tile(self, camera):
+        latest = get_latest_frame(camera)
+        image, version = None, 0
+        if latest is not None:
+            with latest.lock:
+                image, version = latest.image, latest.version
+        cached = self.tiles.get(camera)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if image is None:
+            tile = np.zeros((self.tile_h, self.tile_w, 3), dtype=np.uint8)
+            cv2.putText(tile, f"{camera}: no signal", (10, self.tile_h // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (128, 128, 128), 1)
+        else:
+            tile = fit_tile(image, self.tile_w, self.tile_h)
+        self.tiles[camera] = (version, tile)
+        return tile
+
+    def compose(self):
+        """Returns: the grid image (height x width) with the latest frame of every camera."""
+        canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        for i, camera in enumerate(self.cameras):
+            x, y = (i % self.columns) * self.tile_w, (i // self.columns) * self.tile_h
+            canvas[y:y + self.tile_h, x:x + self.tile_w] = self._tile(camera)
+        return canvas
+
+    def _tick(self):
+        with self.compose_timer.time():
+            canvas = self.compose()
+        with self.encode_timer.time():
+            ok, buffer = cv2.imencode('.jpg', canvas, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise RuntimeError("JPEG encode failed")
+        with self.cond:
+            self.jpeg = buffer.tobytes()
+            self.version += 1
+            self.cond.notify_all()
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        next_tick = time.perf_counter()
+        last_error = None
+        try:
+            while True:
+                with self.cond:
+                    if self.viewers == 0:
+                        self.thread = None
+                        return
+                try:
+                    self._tick()
+                    last_error = None
+                except Exception as e:
+                    # Logged once per distinct error; the composer keeps ticking
+                    if str(e) != last_error:
+                        print(f"[MOSAIC] {','.join(self.cameras)}: compose/encode failed ({e})")
+                    last_error = str(e)
+                # Fixed tick: sleep until the next one (ticks missed under load are skipped)
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            with self.cond:
+                if self.thread is threading.current_thread():
+                    self.thread = None
+
+    def _ensure_composer(self):
+        """Starts the composer thread if none is alive (caller holds self.cond)."""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True, name="mosaic-composer")
+            self.thread.start()
+
+    def frames(self):
+        """MJPEG generator for one viewer: yields each encoded grid once."""
+        with self.cond:
+            self.viewers += 1
+            if self.viewers == 1:
+                for source in self.sources:
+                    source.attach()
+            self._ensure_composer()
+        seen = 0
+        try:
+            while True:
+                with self.cond:
+                    if not self.cond.wait_for(lambda: self.version != seen, timeout=1.0):
+                        # No new grid: restart the composer if it died
+                        self._ensure_composer()
+                        continue
+                    jpeg, seen = self.jpeg, self.version
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+        finally:
+            with self.cond:
+                self.viewers -= 1
+                idle = self.viewers == 0
+                if idle:
+                    for source in self.sources:
+                        source.detach()
+            if idle and self.on_idle:
+                self.on_idle(self)
+
+# {(cameras, width, height, fps): MosaicStream}, shared by every viewer of the same selection.
+# A selection is dropped when its last viewer leaves, so arbitrary query values do not accumulate.
+_streams = {}
+_streams_lock = threading.Lock()
+
+def _release(key, stream):
+    with _streams_lock:
+        with stream.cond:
+            if stream.viewers == 0 and _streams.get(key) is stream:
+                del _streams[key]
+
+def get_mosaic_stream(cameras, width, height, fps, sources=()):
+    key = (tuple(cameras), width, height, fps)
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None:
+            stream = _streams[key] = MosaicStream(cameras, width, height, fps, sources=sources,
+                                                  on_idle=lambda s: _release(key, s))
+        return stream
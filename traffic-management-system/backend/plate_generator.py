@@ -1,38 +1,46 @@
 import random
 import string
 import os
-import cv2
-import numpy as np
-from ultralytics import YOLO
+import uuid
 from utils.config import PROJECT_ROOT
+from utils import metrics
+from utils import model_loader
+from plate_store import get_plate_store
 
 # Define Plate Output Directory
 PLATE_DIR = os.path.join(PROJECT_ROOT, "plates")
+PLATE_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "license_plate.pt")
 
 class PlateManager:
-    def __init__(self):
+    def __init__(self, inference_cache=None):
         self.assigned_plates = {} # {id: "KA-05-XY-1234"}
-        self.plate_data = {} # {id: {'text': ..., 'image_path': ...}}
+        self.plate_data = {} # {id: {'text': ..., 'image_key': plate store key or None, 'last_bbox': ...}}
         self.state_codes = ["KA", "TN", "MH", "DL", "TS", "AP", "KL"]
         self.rto_codes = [f"{i:02}" for i in range(1, 100)] # 01-99
         
         # Try to load model, otherwise flag for fallback
         self.model = None
-        self.model_path = os.path.join(PROJECT_ROOT, "models", "license_plate.pt")
+        self.model_path = PLATE_MODEL_PATH
         if os.path.exists(self.model_path):
             print(f"Loading Plate Detector from: {self.model_path}")
             try:
                 # Attempt to load custom model. If it's incompatible with new ultralytics, 
                 # we catch the error and fallback to heuristic.
-                self.model = YOLO(self.model_path)
+                self.model = model_loader.get_model(self.model_path) # Warm instance if preloaded at startup
             except Exception as e:
                 print(f"WARNING: Customized Plate Model failed to load ({e}). Using Heuristic Fallback.")
                 self.model = None
         else:
             print("Plate Detector model not found. Using Heuristic Fallback.")
 
-        if not os.path.exists(PLATE_DIR):
-            os.makedirs(PLATE_DIR)
+        # Crops go to the packed store (background writer); keys are unique per manager instance
+        self.plate_store = get_plate_store(PLATE_DIR)
+        self.session = uuid.uuid4().hex[:8]
+
+        # Optional: on-disk cache of plate model outputs (re-processing recorded clips)
+        self.inference_cache = inference_cache
+        if inference_cache and self.model:
+            inference_cache.register("plate", self.model_path)
 
     def generate_plate_text(self):
         state = random.choice(self.state_codes)
@@ -48,19 +56,42 @@ class PlateManager:
         # Fallback if accessed before detection (shouldn't happen with new flow)
         return self._assign_new_plate(track_id)
 
-    def _assign_new_plate(self, track_id, image_path=None, bbox=None):
+    def _assign_new_plate(self, track_id, image_key=None, bbox=None):
         text = self.generate_plate_text()
         self.plate_data[track_id] = {
             'text': text,
-            'image_path': image_path,
+            'image_key': image_key, # crop in the plate store (plate_store.get(image_key))
             'last_bbox': bbox
         }
         self.assigned_plates[track_id] = text
         return text
 
-    def detect_and_assign(self, track_id, frame, vehicle_bbox):
+    def forget_tracks(self, track_ids):
+        """Drops plate assignments for tracks that left the scene (called by TrackRegistry)."""
+        for track_id in track_ids:
+            # Plates are keyed by str(track_id) (see detect_and_assign)
+            self.plate_data.pop(str(track_id), None)
+            self.assigned_plates.pop(str(track_id), None)
+
+    def _locate_plate(self, vcrop):
+        """
+        Runs the plate model on a vehicle crop.
+        Returns: [bx1, by1, bx2, by2] of the most confident box (crop coordinates), [] if none.
+        """
+        metrics.INFERENCE_CALLS.labels("plate").inc()
+        results = self.model(vcrop, verbose=False)
+        if results[0].boxes.xyxy.numel() > 0:
+            # Find box with max confidence
+            best_box_idx = results[0].boxes.conf.argmax()
+            return [int(v) for v in results[0].boxes.xyxy[best_box_idx].cpu().numpy().astype(int)]
+        # Debug: Model ran but found nothing
+        # print(f"[PLATE DEBUG] Model found 0 boxes")
+        return []
+
+    def detect_and_assign(self, track_id, frame, vehicle_bbox, frame_index=None):
         """
         Runs detection/localization.
+        frame_index: Position of the frame in its source, used as the inference cache key (optional).
         Returns: (plate_text, plate_bbox)
         - plate_text: The assigned ID (simulated).
         - plate_bbox: (x1, y1, x2, y2) of the plate region for visualization.
@@ -99,21 +130,16 @@ class PlateManager:
             if (y2 - y1) > 10 and (x2 - x1) > 10:
                 vcrop = frame[y1:y2, x1:x2]
                 try:
-                    results = self.model(vcrop, verbose=False)
-                    if results[0].boxes.xyxy.numel() > 0:
-                        # Get best box (highest confidence)
-                        # boxes are relative to vcrop
-                        
-                        # Find box with max confidence
-                        best_box_idx = results[0].boxes.conf.argmax()
-                        bx1, by1, bx2, by2 = results[0].boxes.xyxy[best_box_idx].cpu().numpy().astype(int)
-                        
+                    # Get best box (highest confidence), relative to vcrop
+                    if self.inference_cache and frame_index is not None:
+                        best = self.inference_cache.lookup("plate", frame_index, lambda: self._locate_plate(vcrop),
+                                                           key=f"{x1},{y1},{x2},{y2}")
+                    else:
+                        best = self._locate_plate(vcrop)
+                    if best:
+                        bx1, by1, bx2, by2 = best
                         # Map to global frame
                         plate_bbox = (x1 + bx1, y1 + by1, x1 + bx2, y1 + by2)
-                    else:
-                        # Debug: Model ran but found nothing
-                        # print(f"[PLATE DEBUG] ID:{track_id} - Model found 0 boxes")
-                        pass
                 except Exception as e:
                     print(f"Plate Model Inference Error: {e}")
             
@@ -154,19 +180,15 @@ class PlateManager:
             return self.plate_data[track_id]['text'], plate_bbox
 
         # If new:
-        # Save Crop (using the calculated bbox)
-        image_path = None
+        # Save Crop (using the calculated bbox): queued for the background pack writer
+        image_key = None
         if plate_bbox is not None:
             px1, py1, px2, py2 = plate_bbox
             if (px2 - px1) > 5 and (py2 - py1) > 5:
-                plate_crop = frame[py1:py2, px1:px2]
-                filename = f"plate_{track_id}.jpg"
-                image_path = os.path.join(PLATE_DIR, filename)
-                try:
-                    cv2.imwrite(image_path, plate_crop)
-                except Exception as e:
-                    print(f"Error saving plate crop: {e}")
+                key = f"{self.session}_{track_id}"
+                if self.plate_store.put(key, frame[py1:py2, px1:px2]):
+                    image_key = key
 
         # Assign Simulated ID
-        text = self._assign_new_plate(track_id, image_path)
+        text = self._assign_new_plate(track_id, image_key)
         return text, plate_bbox
@@ -0,0 +1,206 @@
+"""
+Packed plate-crop store.
+
+Plate crops are handed to a background writer (a queue push on the frame
+thread), JPEG-encoded there and appended in batches to rolling pack files:
+    plates/pack_000001.bin   concatenated JPEG bytes
+    plates/pack_000001.idx   one JSON line per crop: {"key", "offset", "length"}
+Reads memory-map the pack and slice out one crop.
+
+Usage (from backend/):
+    python plate_store.py list
+    python plate_store.py export --out ../plate_export            # every crop as <key>.jpg
+    python plate_store.py export --out ../plate_export --key 3f2a9c1e_17
+"""
+import argparse
+import glob
+import json
+import mmap
+import os
+import queue
+import threading
+import cv2
+from utils.config import PLATE_PACK_MAX_MB, PLATE_QUEUE_SIZE, PLATE_JPEG_QUALITY
+from utils import metrics
+
+class PlateCropStore:
+    def __init__(self, directory, pack_max_bytes=PLATE_PACK_MAX_MB * 1024 * 1024,
+                 queue_size=PLATE_QUEUE_SIZE, jpeg_quality=PLATE_JPEG_QUALITY):
+        self.directory = directory
+        self.pack_max_bytes = pack_max_bytes
+        self.jpeg_quality = jpeg_quality
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.index = {}   # {key: (pack number, offset, length)}, filled from the .idx files
+        self.index_sizes = {} # {pack number: bytes of its .idx already read}
+        self.maps = {}    # {pack number: (mmap, mapped size)}
+        self.read_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Continue the newest pack (a new one is started once it is full)
+        packs = self._pack_numbers()
+        self.pack_number = packs[-1] if packs else 1
+
+        self.writer = threading.Thread(target=self._run, daemon=True, name="plate-store-writer")
+        self.writer.start()
+
+    def _pack_numbers(self):
+        names = glob.glob(os.path.join(self.directory, "pack_*.bin"))
+        return sorted(int(os.path.basename(n)[5:11]) for n in names)
+
+    def _path(self, pack_number, ext):
+        return os.path.join(self.directory, f"pack_{pack_number:06d}.{ext}")
+
+    def put(self, key, crop):
+        """
+        Queues a BGR crop for writing (frame thread: one copy + queue push).
+        Returns: True if queued, False if the writer is behind and the crop was dropped.
+        """
+        try:
+            self.queue.put_nowait((key, crop.copy()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            metrics.PLATE_CROPS_DROPPED.labels("queue_full").inc()
+            return False
+
+    def flush(self):
+        """Blocks until every queued crop is on disk."""
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            # Take one crop (blocking), then whatever else is already waiting: one write per batch
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"[PLATES] Failed to write {len(batch)} crops: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            metrics.PLATE_STORE_QUEUE.set(self.queue.qsize())
+
+    def _write_batch(self, batch):
+        pack_path = self._path(self.pack_number, "bin")
+        offset = os.path.getsize(pack_path) if os.path.exists(pack_path) else 0
+        if offset >= self.pack_max_bytes:
+            self.pack_number += 1
+            pack_path, offset = self._path(self.pack_number, "bin"), 0
+
+        blobs, entries = [], []
+        for key, crop in batch:
+            ok, buffer = cv2.imencode('.jpg', crop, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                continue
+            data = buffer.tobytes()
+            blobs.append(data)
+            entries.append(json.dumps({"key": key, "offset": offset, "length": len(data)}))
+            offset += len(data)
+        if not blobs:
+            return
+        # Data before index: an index line never points past the end of its pack
+        with open(pack_path, 'ab') as f:
+            f.write(b"".join(blobs))
+        with open(self._path(self.pack_number, "idx"), 'a') as f:
+            f.write("\n".join(entries) + "\n")
+
+    def _refresh_index(self):
+        """Reads index lines appended since the last call."""
+        for pack_number in self._pack_numbers():
+            idx_path = self._path(pack_number, "idx")
+            if not os.path.exists(idx_path):
+                continue
+            read = self.index_sizes.get(pack_number, 0)
+            if os.path.getsize(idx_path) == read:
+                continue
+            with open(idx_path, 'r') as f:
+                f.seek(read)
+                for line in f:
+                    if not line.endswith("\n"):
+                        break # line still being written
+                    entry = json.loads(line)
+                    self.index[entry["key"]] = (pack_number, entry["offset"], entry["length"])
+                    read += len(line.encode())
+            self.index_sizes[pack_number] = read
+
+    def _map(self, pack_number, end):
+        """Memory map of a pack covering at least `end` bytes (re-mapped as the active pack grows)."""
+        mapped = self.maps.get(pack_number)
+        if mapped is None or mapped[1] < end:
+            if mapped is not None:
+                mapped[0].close()
+            with open(self._path(pack_number, "bin"), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                mapped = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), size)
+            self.maps[pack_number] = mapped
+        return mapped[0]
+
+    def get(self, key):
+        """Returns: JPEG bytes of the crop stored under key, or None."""
+        with self.read_lock:
+            if key not in self.index:
+                self._refresh_index()
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            pack_number, offset, length = entry
+            return self._map(pack_number, offset + length)[offset:offset + length]
+
+    def keys(self):
+        """Returns: all stored keys."""
+        with self.read_lock:
+            self._refresh_index()
+            return list(self.index)
+
+    def export(self, out_dir, keys=None):
+        """Writes crops as <out_dir>/<key>.jpg. Returns: number of files written."""
+        os.makedirs(out_dir, exist_ok=True)
+        written = 0
+        for key in keys or self.keys():
+            data = self.get(key)
+            if data is None:
+                print(f"[PLATES] No crop stored for {key}")
+                continue
+            with open(os.path.join(out_dir, f"{key}.jpg"), 'wb') as f:
+                f.write(data)
+            written += 1
+        return written
+
+# One store (and writer thread) per directory, shared by every pipeline
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_plate_store(directory):
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = PlateCropStore(directory)
+        return store
+
+def main():
+    from plate_generator import PLATE_DIR
+    parser = argparse.ArgumentParser(description="Plate crop pack store tools")
+    parser.add_argument("command", choices=["list", "export"])
+    parser.add_argument("--dir", default=PLATE_DIR, help="Plate store directory")
+    parser.add_argument("--out", help="Export directory")
+    parser.add_argument("--key", action="append", help="Export only this key (repeatable)")
+    args = parser.parse_args()
+
+    store = PlateCropStore(args.dir)
+    if args.command == "list":
+        for key in store.keys():
+            pack_number, offset, length = store.index[key]
+            print(f"{key}\tpack_{pack_number:06d}.bin\t{offset}\t{length}")
+    else:
+        if not args.out:
+            parser.error("export needs --out")
+        print(f"[PLATES] Exported {store.export(args.out, args.key)} crops to {args.out}")
+
+if __name__ == "__main__":
+    main()
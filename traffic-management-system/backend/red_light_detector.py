@@ -1,14 +1,149 @@
 
 import cv2
 import time
+import numpy as np
+from utils.geometry import points_in_polygon
+
+# Half-length of the implicit full-width stop line used for the legacy stop_line_y mode
+FULL_WIDTH_EXTENT = 1e6
 
 class RedLightDetector:
-    def __init__(self, stop_line_y=500):
+    def __init__(self, stop_line_y=500, approaches=None):
+        """
+        stop_line_y: Legacy single horizontal stop line (vehicles moving down the image).
+        approaches: Optional list of per-approach stop zones, e.g.
+            [{'name': 'North', 'line': [(x1, y1), (x2, y2)], 'direction': (0, 1)},
+             {'name': 'East', 'polygon': [(x, y), ...], 'direction': (-1, 0)}]
+            'direction' is the direction of travel (image coordinates) that counts as
+            crossing. A line is crossed when the centroid moves from behind it to on/past it
+            within the segment; a polygon is crossed when the centroid enters it while
+            moving along 'direction'.
+        """
         # Configuration
         self.stop_line_y = stop_line_y # Default stop line y-coordinate
         self.violated_vehicles = set() # Store confirmed violation IDs
-        self.vehicle_states = {} # Track vehicle positions {id: previous_y}
-        
+        self.vehicle_states = {} # Track vehicle positions {id: (previous_x, previous_y)}
+
+        if not approaches:
+            # Horizontal full-width line, downward motion (legacy behavior)
+            approaches = [{
+                'name': 'STOP LINE',
+                'line': [(-FULL_WIDTH_EXTENT, stop_line_y), (FULL_WIDTH_EXTENT, stop_line_y)],
+                'direction': (0, 1)
+            }]
+        self.approaches = [self._compile_approach(a) for a in approaches]
+
+    def _compile_approach(self, approach):
+        """Precomputes the arrays used by the crossing test."""
+        direction = np.asarray(approach.get('direction', (0, 1)), dtype=np.float64)
+        compiled = {'name': approach.get('name', 'STOP LINE'), 'direction': direction}
+
+        if 'polygon' in approach:
+            compiled['polygon'] = np.asarray(approach['polygon'], dtype=np.float64)
+            return compiled
+
+        a, b = np.asarray(approach['line'], dtype=np.float64)
+        ab = b - a
+        # Unit normal of the line, oriented along the direction of travel
+        normal = np.array([-ab[1], ab[0]])
+        normal /= np.linalg.norm(normal)
+        if np.dot(normal, direction) < 0:
+            normal = -normal
+        compiled.update({'a': a, 'ab': ab, 'ab_len2': np.dot(ab, ab), 'normal': normal})
+        return compiled
+
+    def forget_tracks(self, track_ids):
+        """Drops per-track state for tracks that left the scene (called by TrackRegistry)."""
+        for track_id in track_ids:
+            self.vehicle_states.pop(track_id, None)
+            self.violated_vehicles.discard(track_id)
+
+    def _crossed_approach(self, prev, cur):
+        """
+        Evaluates the crossing test for N tracks against every approach.
+        prev, cur: (N, 2) float arrays of centroids.
+        Returns: (N,) int array with the index of the crossed approach, -1 if none.
+        """
+        crossed = np.full(prev.shape[0], -1, dtype=np.int64)
+        for i, ap in enumerate(self.approaches):
+            if 'polygon' in ap:
+                entered = ~points_in_polygon(prev, ap['polygon']) & points_in_polygon(cur, ap['polygon'])
+                hit = entered & (((cur - prev) @ ap['direction']) > 0)
+            else:
+                # Signed distance to the line (negative = before the line)
+                side_prev = (prev - ap['a']) @ ap['normal']
+                side_cur = (cur - ap['a']) @ ap['normal']
+                hit = (side_prev < 0) & (side_cur >= 0)
+
+                # Segment-intersection: the crossing point must lie on the stop-line segment
+                denom = np.where(hit, side_cur - side_prev, 1.0)
+                t = -side_prev / denom
+                point = prev + t[:, None] * (cur - prev)
+                u = ((point - ap['a']) @ ap['ab']) / ap['ab_len2']
+                hit &= (u >= 0) & (u <= 1)
+            crossed[(crossed < 0) & hit] = i
+        return crossed
+
+    def approaching(self, bboxes, margin):
+        """
+        Tracks about to reach a stop line/zone (candidates for a RED crossing).
+        bboxes: (N, 4) boxes; margin: distance in px before the line (or around the zone).
+        Returns: (N,) bool array.
+        """
+        boxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        pts = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+        near = np.zeros(pts.shape[0], dtype=bool)
+        for ap in self.approaches:
+            if 'polygon' in ap:
+                lo, hi = ap['polygon'].min(axis=0) - margin, ap['polygon'].max(axis=0) + margin
+                near |= np.all((pts >= lo) & (pts <= hi), axis=1) & ~points_in_polygon(pts, ap['polygon'])
+            else:
+                side = (pts - ap['a']) @ ap['normal']
+                u = ((pts - ap['a']) @ ap['ab']) / ap['ab_len2']
+                near |= (side < 0) & (side >= -margin) & (u >= 0) & (u <= 1)
+        return near
+
+    def detect_frame(self, track_ids, bboxes, light_state):
+        """
+        Checks all tracks of one frame for stop-line crossings during RED.
+        Returns:
+            dict: {track_id: (status, is_new)} with status "SAFE" or "VIOLATION"
+                  and is_new True for a newly confirmed violation.
+        """
+        results = {}
+        pending_ids, prev_pts, cur_pts = [], [], []
+
+        for track_id, bbox in zip(track_ids, bboxes):
+            if track_id in self.violated_vehicles:
+                results[track_id] = ("VIOLATION", False)
+                continue
+
+            x1, y1, x2, y2 = bbox
+            # Calculate Centroid
+            centroid = ((x1 + x2) // 2, (y1 + y2) // 2)
+
+            # Get previous state, then update
+            prev = self.vehicle_states.get(track_id)
+            self.vehicle_states[track_id] = centroid
+
+            results[track_id] = ("SAFE", False)
+            if prev is not None:
+                pending_ids.append(track_id)
+                prev_pts.append(prev)
+                cur_pts.append(centroid)
+
+        # Crossings only matter during RED
+        if light_state != "RED" or not pending_ids:
+            return results
+
+        crossed = self._crossed_approach(np.asarray(prev_pts, dtype=np.float64), np.asarray(cur_pts, dtype=np.float64))
+        for track_id, idx in zip(pending_ids, crossed):
+            if idx >= 0:
+                self.violated_vehicles.add(track_id)
+                print(f"[RED LIGHT] Vehicle {track_id} crossed {self.approaches[idx]['name']} during RED!")
+                results[track_id] = ("VIOLATION", True)
+        return results
+
     def detect(self, track_id, bbox, light_state):
         """
         Checks if the vehicle crosses the stop line during a RED light.
@@ -16,44 +151,31 @@ class RedLightDetector:
             status: "SAFE", "VIOLATION"
             is_new: True if this is a newly confirmed violation
         """
-        # 1. Reset check (handled by external system_state or manual clear if needed)
-        # But for strictly Red Light, we just track per session.
-        # Check system reset using the same pattern if improved later.
-        
-        if track_id in self.violated_vehicles:
-            return "VIOLATION", False
-
-        x1, y1, x2, y2 = bbox
-        
-        # Calculate Centroid Y
-        cy = (y1 + y2) // 2
-        
-        # Get previous state
-        prev_y = self.vehicle_states.get(track_id)
-        
-        # Update state
-        self.vehicle_states[track_id] = cy
-        
-        if prev_y is None:
-            return "SAFE", False
-            
-        # Crossing Logic:
-        # Assuming camera view where Y increases downwards (Top=0, Bottom=720)
-        # Vehicle moving DOWN (away?) or UP (towards?)
-        # Let's assume standard CCTV: Moving DOWN crossing line y=500.
-        # "Crossed" means: prev_y < LINE and curr_y >= LINE
-        
-        has_crossed = (prev_y < self.stop_line_y) and (cy >= self.stop_line_y)
-        
-        if has_crossed and light_state == "RED":
-            self.violated_vehicles.add(track_id)
-            print(f"[RED LIGHT] Vehicle {track_id} crossed Stop Line during RED!")
-            return "VIOLATION", True
-            
-        return "SAFE", False
-        
+        return self.detect_frame([track_id], [bbox], light_state)[track_id]
+
     def draw_overlay(self, frame):
-        """Draws the virtual stop line."""
+        """Draws the virtual stop line(s)."""
         h, w = frame.shape[:2]
-        cv2.line(frame, (0, self.stop_line_y), (w, self.stop_line_y), (0, 0, 255), 2)
-        cv2.putText(frame, "STOP LINE", (10, self.stop_line_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        for ap in self.approaches:
+            if 'polygon' in ap:
+                pts = ap['polygon'].reshape((-1, 1, 2)).astype(np.int32)
+                cv2.polylines(frame, [pts], True, (0, 0, 255), 2)
+                label_pos = tuple(pts[0][0])
+            else:
+                a = ap['a']
+                b = a + ap['ab']
+                if ap['ab'][0] == 0:
+                    p1, p2 = (int(a[0]), int(a[1])), (int(b[0]), int(b[1]))
+                else:
+                    # Clip the segment (or the implicit full-width line) to the frame
+                    xa, xb = np.clip([a[0], b[0]], 0, w)
+                    p1 = (int(xa), int(self._y_at(ap, xa)))
+                    p2 = (int(xb), int(self._y_at(ap, xb)))
+                cv2.line(frame, p1, p2, (0, 0, 255), 2)
+                label_pos = (max(10, min(p1[0], p2[0]) + 10), min(p1[1], p2[1]))
+            cv2.putText(frame, ap['name'], (int(label_pos[0]), int(label_pos[1]) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+    @staticmethod
+    def _y_at(ap, x):
+        """y of the (non-vertical) stop line at image column x."""
+        return ap['a'][1] + (x - ap['a'][0]) * ap['ab'][1] / ap['ab'][0]
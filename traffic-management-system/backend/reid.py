@@ -0,0 +1,158 @@
+import cv2
+import numpy as np
+from utils.config import (REID_MAX_LOST_FRAMES, REID_MAX_DISTANCE, REID_MIN_SIMILARITY, REID_HIST_REFRESH_FRAMES)
+
+# Canonical IDs handed out when a tracker ID cannot keep its own number
+SYNTHETIC_ID_START = 1_000_000
+
+def color_histogram(frame, box):
+    """
+    Compact appearance descriptor: normalized 8x8 hue/saturation histogram of the box.
+    Returns: float32 array, or None if the box is empty.
+    """
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = max(0, box[0]), max(0, box[1]), min(w, box[2]), min(h, box[3])
+    if x2 - x1 < 4 or y2 - y1 < 4:
+        return None
+    # A small fixed-size crop keeps the cost independent of the vehicle size
+    crop = cv2.resize(frame[y1:y2, x1:x2], (32, 32), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [8, 8], [0, 180, 0, 256])
+    return cv2.normalize(hist, hist).flatten()
+
+class ReIdentifier:
+    """
+    Stitches fragmented tracker IDs back together.
+
+    ByteTrack gives a vehicle a new ID after an occlusion. When a new ID appears, it is
+    compared with tracks of the same class lost within max_lost_frames:
+      1. motion     - distance between its box center and the lost track's predicted center
+                      (constant velocity), relative to the lost box diagonal
+      2. appearance - correlation of hue/saturation histograms
+    On a match the new tracker ID is mapped to the old (canonical) ID, so every per-track
+    component keeps its state. Subscribes to TrackRegistry like the other components.
+    """
+    def __init__(self, max_lost_frames=REID_MAX_LOST_FRAMES, max_distance=REID_MAX_DISTANCE,
+                 min_similarity=REID_MIN_SIMILARITY, hist_refresh_frames=REID_HIST_REFRESH_FRAMES):
+        self.max_lost_frames = max_lost_frames
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        self.hist_refresh_frames = hist_refresh_frames
+        self.raw_to_id = {} # {tracker ID: canonical ID}
+        self.owner = {}     # {canonical ID: tracker ID currently feeding it}
+        self.tracks = {}    # {canonical ID: {'box', 'cls', 'velocity', 'last_seen', 'hist', 'hist_frame'}}
+        self.next_id = SYNTHETIC_ID_START
+        self.merged_total = 0
+        self.last_merged = [] # canonical IDs resumed in the latest update
+
+    def forget_tracks(self, track_ids):
+        """Drops state of canonical IDs evicted by TrackRegistry."""
+        for track_id in track_ids:
+            self.tracks.pop(track_id, None)
+            raw = self.owner.pop(track_id, None)
+            if raw is not None and self.raw_to_id.get(raw) == track_id:
+                del self.raw_to_id[raw]
+
+    def _new_id(self, raw):
+        """Canonical ID for an unmatched tracker ID: its own number unless that is taken."""
+        if raw not in self.tracks and raw not in self.owner:
+            return raw
+        self.next_id += 1
+        return self.next_id
+
+    def _match(self, frame, new_rows, frame_index, seen):
+        """Greedy matching of new tracker IDs to lost tracks. Returns: {row index: canonical ID}."""
+        lost = [(tid, t) for tid, t in self.tracks.items()
+                if tid not in seen and 0 < frame_index - t['last_seen'] <= self.max_lost_frames]
+        if not lost:
+            return {}
+
+        pairs = []
+        for i, (x1, y1, x2, y2, _, cls) in new_rows:
+            center = np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0])
+            hist = None
+            for tid, t in lost:
+                if t['cls'] != cls or t['hist'] is None:
+                    continue
+                # 1. Motion gate
+                bx1, by1, bx2, by2 = t['box']
+                predicted = np.array([(bx1 + bx2) / 2.0, (by1 + by2) / 2.0]) + t['velocity'] * (frame_index - t['last_seen'])
+                diagonal = max(1.0, float(np.hypot(bx2 - bx1, by2 - by1)))
+                distance = float(np.linalg.norm(center - predicted)) / diagonal
+                if distance > self.max_distance:
+                    continue
+                # 2. Appearance gate (histogram computed only for new IDs that pass a motion gate)
+                if hist is None:
+                    hist = color_histogram(frame, (x1, y1, x2, y2))
+                    if hist is None:
+                        break
+                similarity = float(cv2.compareHist(hist, t['hist'], cv2.HISTCMP_CORREL))
+                if similarity >= self.min_similarity:
+                    pairs.append((similarity - 0.5 * distance, i, tid))
+
+        matches, used = {}, set()
+        for _, i, tid in sorted(pairs, reverse=True):
+            if i not in matches and tid not in used:
+                matches[i] = tid
+                used.add(tid)
+        return matches
+
+    def update(self, frame, rows, frame_index):
+        """
+        Maps one detection frame of tracker output to canonical IDs.
+        rows: [[x1, y1, x2, y2, tracker_id, cls], ...]
+        Returns: rows with the tracker ID replaced by the canonical ID.
+        """
+        self.last_merged = []
+        canonical = [None] * len(rows)
+        new_rows = []
+        for i, row in enumerate(rows):
+            raw = row[4]
+            tid = self.raw_to_id.get(raw)
+            if tid is not None and self.owner.get(tid) == raw:
+                canonical[i] = tid
+            else:
+                new_rows.append((i, row))
+
+        if new_rows:
+            seen = {tid for tid in canonical if tid is not None}
+            matches = self._match(frame, new_rows, frame_index, seen)
+            for i, row in new_rows:
+                raw = row[4]
+                tid = matches.get(i)
+                if tid is not None:
+                    self.merged_total += 1
+                    self.last_merged.append(tid)
+                    old_raw = self.owner.get(tid)
+                    if old_raw is not None and self.raw_to_id.get(old_raw) == tid:
+                        del self.raw_to_id[old_raw]
+                else:
+                    tid = self._new_id(raw)
+                self.raw_to_id[raw] = tid
+                self.owner[tid] = raw
+                canonical[i] = tid
+
+        # Motion/appearance state of every visible track
+        out = []
+        for (x1, y1, x2, y2, _, cls), tid in zip(rows, canonical):
+            box = (x1, y1, x2, y2)
+            t = self.tracks.get(tid)
+            if t is None:
+                t = self.tracks[tid] = {'box': box, 'cls': cls, 'velocity': np.zeros(2), 'last_seen': frame_index,
+                                        'hist': None, 'hist_frame': -self.hist_refresh_frames}
+            else:
+                gap = max(1, frame_index - t['last_seen'])
+                old = np.array([(t['box'][0] + t['box'][2]) / 2.0, (t['box'][1] + t['box'][3]) / 2.0])
+                new = np.array([(x1 + x2) / 2.0, (y1 + y2) / 2.0])
+                t['velocity'] = 0.5 * t['velocity'] + 0.5 * (new - old) / gap
+                t['box'], t['last_seen'] = box, frame_index
+            if frame_index - t['hist_frame'] >= self.hist_refresh_frames:
+                hist = color_histogram(frame, box)
+                if hist is not None:
+                    t['hist'], t['hist_frame'] = hist, frame_index
+            out.append([x1, y1, x2, y2, tid, cls])
+        return out
+
+    def get_stats(self):
+        """Returns merge count and live mapping sizes for this pipeline."""
+        return {"merged": self.merged_total, "tracks": len(self.tracks)}
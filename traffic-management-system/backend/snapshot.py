@@ -2,6 +2,7 @@ import cv2
 import os
 import datetime
 from utils.config import PROJECT_ROOT
+from utils import storage
 
 # Define Snapshot Directory
 SNAPSHOT_DIR = os.path.join(PROJECT_ROOT, "snapshots")
@@ -19,15 +20,17 @@ def capture_snapshot(frame, vehicle_id, speed, bbox=None):
     Returns:
         str: Absolute path of the saved snapshot.
     """
-    if not os.path.exists(SNAPSHOT_DIR):
-        os.makedirs(SNAPSHOT_DIR)
+    # Current storage generation (see utils/storage.py)
+    snapshot_dir = storage.generation_dir(SNAPSHOT_DIR)
+    if not os.path.exists(snapshot_dir):
+        os.makedirs(snapshot_dir)
         
     # Generate Timestamp
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     
     # Filename format: vehicleID_timestamp.jpg (e.g., 5_20231212_103000.jpg)
     filename = f"{vehicle_id}_{timestamp}.jpg"
-    filepath = os.path.join(SNAPSHOT_DIR, filename)
+    filepath = os.path.join(snapshot_dir, filename)
     
     # Create a copy to avoid modifying the original frame stream if needed
     save_img = frame.copy()
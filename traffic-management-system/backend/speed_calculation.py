@@ -3,7 +3,6 @@ import os
 import math
 import numpy as np
 from collections import defaultdict, deque
-from ultralytics import YOLO
 from utils.config import PROJECT_ROOT, MODEL_PATH, VIDEO_SOURCE, VEHICLE_CLASSES
 
 # Constants for Speed Calculation
@@ -26,9 +25,16 @@ class SpeedTracker:
         self.track_ages = defaultdict(int) # {track_id: age_in_frames}
         self.last_valid_speed = {} # {track_id: speed_kmh}
 
+        # Per-track state table used by the batch path (calculate_speeds)
+        self.state_table = TrackStateTable()
+
     def get_last_speed(self, track_id):
         """Returns the last calculated valid speed for a track_id."""
-        return self.last_valid_speed.get(track_id, 0)
+        if track_id in self.last_valid_speed or len(self.state_table) == 0:
+            return self.last_valid_speed.get(track_id, 0)
+        # Track is handled by the batch path (calculate_speeds)
+        slot = self.state_table.lookup(np.array([track_id], dtype=np.int64))[0]
+        return float(self.state_table.last_valid[slot]) if slot >= 0 else 0
 
     def calculate_speed(self, track_id, centroid, time_elapsed=None):
         cx, cy = centroid
@@ -82,11 +88,212 @@ class SpeedTracker:
         self.previous_positions[track_id] = (cx, cy)
         return speed
 
+    def forget_tracks(self, track_ids):
+        """Drops all per-track state for the given IDs (called by TrackRegistry)."""
+        for track_id in track_ids:
+            self.previous_positions.pop(track_id, None)
+            self.speed_history.pop(track_id, None)
+            self.track_ages.pop(track_id, None)
+            self.last_valid_speed.pop(track_id, None)
+        self.state_table.remove(np.asarray(list(track_ids), dtype=np.int64))
+
+    def resume_tracks(self, track_ids):
+        """
+        Tracks re-identified after a gap (see reid.py): keep age and speed history, but
+        forget the last position so the gap is not measured as one step.
+        """
+        for track_id in track_ids:
+            self.previous_positions.pop(track_id, None)
+        if len(track_ids) and len(self.state_table):
+            slots = self.state_table.lookup(np.asarray(list(track_ids), dtype=np.int64))
+            self.state_table.has_prev[slots[slots >= 0]] = False
+
+    def calculate_speeds(self, track_ids, centroids, time_elapsed=None):
+        """
+        Batch version of calculate_speed for all tracks of one frame.
+        Applies the same distance, sanity checks, moving average and age filter
+        as NumPy array operations over the per-track state table.
+
+        Args:
+            track_ids: sequence/array of N unique track IDs.
+            centroids: (N, 2) array-like of (cx, cy).
+            time_elapsed: Optional time delta (seconds) shared by all tracks.
+        Returns:
+            np.ndarray: (N,) smoothed speeds in km/h, identical to calculate_speed.
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        centroids = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        if track_ids.size == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        dt = time_elapsed if time_elapsed else self.time_per_frame
+        table = self.state_table
+        slots = table.lookup(track_ids, create=True)
+
+        # Increment track age
+        table.age[slots] += 1
+
+        has_prev = table.has_prev[slots]
+        speeds = np.zeros(track_ids.size, dtype=np.float64)
+
+        if has_prev.any():
+            moving = slots[has_prev]
+            cx = centroids[has_prev, 0]
+            cy = centroids[has_prev, 1]
+
+            # Euclidean distance in pixels -> meters -> m/s -> km/h (same operation order as scalar path)
+            dx = cx - table.prev_x[moving]
+            dy = cy - table.prev_y[moving]
+            distance_pixels = np.sqrt(dx * dx + dy * dy)
+            distance_meters = distance_pixels * self.meters_per_pixel
+            speed_mps = distance_meters / dt
+            speed_kmh = speed_mps * 3.6
+
+            # --- Sanity Check 1: Ignore Unrealistic High Speeds (> 150 km/h) ---
+            spike = speed_kmh > 150
+            speed_kmh = np.where(spike, table.last_valid[moving], speed_kmh)
+            table.last_valid[moving[~spike]] = speed_kmh[~spike]
+
+            # --- Sanity Check 2: Ignore Tiny Movements (< 1 km/h) ---
+            speed_kmh[speed_kmh < 1] = 0
+
+            # Smoothing (Moving Average) over the last HISTORY_SIZE speeds
+            avg_speed = table.push_history(moving, speed_kmh)
+
+            # Clamp Speed to realistic values
+            speed = np.clip(avg_speed, 0, 150)
+
+            # --- Minimum Track Age Filter ---
+            speed[table.age[moving] < 10] = 0
+            speeds[has_prev] = speed
+
+        # Update position
+        table.prev_x[slots] = centroids[:, 0]
+        table.prev_y[slots] = centroids[:, 1]
+        table.has_prev[slots] = True
+        return speeds
+
+class TrackStateTable:
+    """
+    Compact per-track state for SpeedTracker.calculate_speeds.
+    Each track owns one row (slot) in a set of parallel NumPy arrays; track IDs
+    are mapped to slots through a sorted ID index so lookups are vectorized.
+    """
+    HISTORY_SIZE = 5 # Same window as the scalar deque(maxlen=5)
+
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.sorted_ids = np.zeros(0, dtype=np.int64)   # Track IDs, ascending
+        self.sorted_slots = np.zeros(0, dtype=np.int64) # Slot for each entry of sorted_ids
+        self.free_slots = []
+
+        self.prev_x = np.zeros(0, dtype=np.float64)
+        self.prev_y = np.zeros(0, dtype=np.float64)
+        self.has_prev = np.zeros(0, dtype=bool)
+        self.age = np.zeros(0, dtype=np.int64)
+        self.last_valid = np.zeros(0, dtype=np.float64)
+        # History rows are kept oldest -> newest, right-aligned (unused entries are 0)
+        self.history = np.zeros((0, self.HISTORY_SIZE), dtype=np.float64)
+        self.history_len = np.zeros(0, dtype=np.int64)
+
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.sorted_ids.size
+
+    def _grow(self, new_capacity):
+        extra = new_capacity - self.capacity
+        if extra <= 0:
+            return
+        self.prev_x = np.concatenate([self.prev_x, np.zeros(extra)])
+        self.prev_y = np.concatenate([self.prev_y, np.zeros(extra)])
+        self.has_prev = np.concatenate([self.has_prev, np.zeros(extra, dtype=bool)])
+        self.age = np.concatenate([self.age, np.zeros(extra, dtype=np.int64)])
+        self.last_valid = np.concatenate([self.last_valid, np.zeros(extra)])
+        self.history = np.concatenate([self.history, np.zeros((extra, self.HISTORY_SIZE))])
+        self.history_len = np.concatenate([self.history_len, np.zeros(extra, dtype=np.int64)])
+        # Hand out low slots first
+        self.free_slots.extend(range(new_capacity - 1, self.capacity - 1, -1))
+        self.capacity = new_capacity
+
+    def _find(self, track_ids):
+        """Returns (positions in sorted index, found mask)."""
+        pos = np.searchsorted(self.sorted_ids, track_ids)
+        found = pos < self.sorted_ids.size
+        found[found] = self.sorted_ids[pos[found]] == track_ids[found]
+        return pos, found
+
+    def lookup(self, track_ids, create=False):
+        """
+        Maps track IDs to slots. Unknown IDs get fresh slots when create=True,
+        otherwise their slot is -1.
+        """
+        pos, found = self._find(track_ids)
+        slots = np.full(track_ids.size, -1, dtype=np.int64)
+        slots[found] = self.sorted_slots[pos[found]]
+
+        if create and not found.all():
+            new_ids = np.unique(track_ids[~found])
+            if len(self.free_slots) < new_ids.size:
+                self._grow(max(self.capacity * 2, self.capacity + new_ids.size))
+            new_slots = np.array([self.free_slots.pop() for _ in range(new_ids.size)], dtype=np.int64)
+            self._reset(new_slots)
+
+            ids = np.concatenate([self.sorted_ids, new_ids])
+            all_slots = np.concatenate([self.sorted_slots, new_slots])
+            order = np.argsort(ids, kind='stable')
+            self.sorted_ids = ids[order]
+            self.sorted_slots = all_slots[order]
+
+            pos, found = self._find(track_ids)
+            slots = self.sorted_slots[pos]
+        return slots
+
+    def remove(self, track_ids):
+        """Releases the slots of the given track IDs (unknown IDs are ignored)."""
+        if track_ids.size == 0 or self.sorted_ids.size == 0:
+            return
+        pos, found = self._find(track_ids)
+        if not found.any():
+            return
+        pos = np.unique(pos[found])
+        self.free_slots.extend(self.sorted_slots[pos].tolist())
+        self.sorted_ids = np.delete(self.sorted_ids, pos)
+        self.sorted_slots = np.delete(self.sorted_slots, pos)
+
+    def _reset(self, slots):
+        self.prev_x[slots] = 0
+        self.prev_y[slots] = 0
+        self.has_prev[slots] = False
+        self.age[slots] = 0
+        self.last_valid[slots] = 0
+        self.history[slots] = 0
+        self.history_len[slots] = 0
+
+    def push_history(self, slots, values):
+        """
+        Appends one speed per slot to its history window and returns the moving averages.
+        Summation runs oldest -> newest so results match sum(deque) exactly.
+        """
+        hist = self.history[slots]
+        hist[:, :-1] = hist[:, 1:]
+        hist[:, -1] = values
+        self.history[slots] = hist
+
+        counts = np.minimum(self.history_len[slots] + 1, self.HISTORY_SIZE)
+        self.history_len[slots] = counts
+
+        total = hist[:, 0].copy()
+        for k in range(1, self.HISTORY_SIZE):
+            total += hist[:, k]
+        return total / counts
+
 def main():
     if not os.path.exists(MODEL_PATH):
         print(f"Error: Model not found at {MODEL_PATH}")
         return
 
+    from ultralytics import YOLO
     print(f"Loading YOLOv8 model from: {MODEL_PATH}")
     model = YOLO(MODEL_PATH)
 
@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analytics import TrafficRollups, RollupRing
+
+T0 = 1_700_000_040 # start of a minute bucket
+
+class TestTrafficRollups(unittest.TestCase):
+    def setUp(self):
+        self.rollups = TrafficRollups("cam1", ["Lane 1", "Lane 2"], classes=[2, 3],
+                                      speed_bins=[0, 30, 60], minute_buckets=5, hour_buckets=2)
+
+    def test_vehicles_counted_once_per_track(self):
+        """A track seen on several frames is counted once, in the lane of first sighting"""
+        for dt in (0, 1, 2):
+            self.rollups.observe([1, 2], [2, 3], [0, -1], now=T0 + dt)
+        lanes = self.rollups.summary("minute", buckets=1, now=T0 + 2)["lanes"]
+        self.assertEqual(lanes["Lane 1"]["vehicles"], {"car": [1], "motorcycle": [0]})
+        self.assertEqual(lanes["N/A"]["vehicles"]["motorcycle"], [1])
+
+    def test_speed_histogram_on_eviction(self):
+        """Mean speed of a finished track lands in its bin; static samples are ignored"""
+        self.rollups.observe([1], [2], [1], speeds={1: 50}, now=T0)
+        self.rollups.observe([1], [2], [1], speeds={1: 70}, now=T0 + 1)
+        self.rollups.observe([1], [2], [1], speeds={1: 1}, now=T0 + 2)
+        self.rollups.forget_tracks([1], now=T0 + 3)
+        lane = self.rollups.summary("minute", buckets=1, now=T0 + 3)["lanes"]["Lane 2"]
+        self.assertEqual(lane["speed_histogram"], [[0, 0, 1]]) # mean 60 -> open-ended last bin
+        self.assertEqual(self.rollups.live, {})
+
+    def test_close_all_records_open_tracks(self):
+        """Ending a session closes its tracks: speeds recorded, IDs free for the next session"""
+        self.rollups.observe([1, 2], [2, 2], [0, 0], speeds={1: 40, 2: 10}, now=T0)
+        self.rollups.close_all(now=T0 + 1)
+        self.assertEqual(self.rollups.live, {})
+        lane = self.rollups.summary("minute", buckets=1, now=T0 + 1)["lanes"]["Lane 1"]
+        self.assertEqual(lane["speed_histogram"], [[1, 1, 0]])
+        # Same track ID in a new session is a new vehicle
+        self.assertEqual(self.rollups.observe([1], [2], [0], now=T0 + 2), 1)
+
+    def test_ring_ages_out_old_buckets(self):
+        """Buckets older than the ring are dropped; memory stays fixed"""
+        self.rollups.record_violation(0, "Overspeed", now=T0)
+        self.rollups.record_violation(0, "Red Light", now=T0 + 60)
+        summary = self.rollups.summary("minute", now=T0 + 60)
+        self.assertEqual(summary["lanes"]["Lane 1"]["violations"]["Overspeed"], [0, 0, 0, 1, 0])
+        self.assertEqual(summary["lanes"]["Lane 1"]["totals"]["violations"], 2)
+
+        later = self.rollups.summary("minute", now=T0 + 5 * 60)["lanes"]["Lane 1"]
+        self.assertEqual(later["totals"]["violations"], 1) # first minute has left the window
+        self.assertEqual(self.rollups.rings["minute"].data["violations"].shape, (5, 3, 3))
+
+    def test_reset(self):
+        self.rollups.observe([1], [2], [0], now=T0)
+        self.rollups.reset()
+        self.assertEqual(self.rollups.summary("hour", now=T0)["lanes"]["Lane 1"]["totals"]["vehicles"], 0)
+
+class TestRollupRing(unittest.TestCase):
+    def test_slot_reuse_zeroes_stale_bucket(self):
+        ring = RollupRing(60, 2, {"n": (1,)})
+        ring.data["n"][ring.slot(0)] += 5
+        ring.data["n"][ring.slot(120)] += 1 # same slot, two buckets later
+        _, data = ring.series(120, 2)
+        self.assertEqual(data["n"][:, 0].tolist(), [0, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import backfill_challans
+import database
+from utils import storage
+from utils.config import STORAGE_GENERATION_FILE
+
+class TestBackfillChallans(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        storage.use_generation_file(os.path.join(self.tmp_dir, "storage_generation.json"))
+        self.original_db = database.DB_FILE
+        database.DB_FILE = os.path.join(self.tmp_dir, "violations.json")
+        self.records = [{"id": str(i), "timestamp": f"2026-01-01 10:00:0{i}", "speed": 70.0, "limit": 60,
+                         "lane": "cam1", "violation_type": "Overspeed"} for i in range(3)]
+        with open(database.DB_FILE, 'w') as f:
+            json.dump(self.records, f)
+
+    def tearDown(self):
+        database.DB_FILE = self.original_db
+        storage.use_generation_file(STORAGE_GENERATION_FILE)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_fingerprint_tracks_rendered_content(self):
+        record = dict(self.records[0])
+        base = backfill_challans.record_fingerprint(record, "t1")
+        self.assertEqual(base, backfill_challans.record_fingerprint(dict(record, unrelated=1), "t1"))
+        self.assertNotEqual(base, backfill_challans.record_fingerprint(dict(record, speed=71.0), "t1"))
+        self.assertNotEqual(base, backfill_challans.record_fingerprint(record, "t2")) # template changed
+
+    def test_resume_skips_completed_records(self):
+        """Records in the manifest with a matching fingerprint and an existing PDF are skipped"""
+        pdf = os.path.join(self.tmp_dir, "done.pdf")
+        open(pdf, 'w').close()
+        manifest_path = os.path.join(self.tmp_dir, backfill_challans.MANIFEST_NAME)
+        with open(manifest_path, 'w') as f:
+            for record in self.records[:2]:
+                key = backfill_challans.record_key(record)
+                f.write(json.dumps({"key": key, "fingerprint": backfill_challans.record_fingerprint(record, "t"),
+                                    "path": pdf}) + "\n")
+            f.write('{"key": "trunc') # interrupted write
+
+        manifest = backfill_challans.load_manifest(manifest_path)
+        pending = [key for key, _, _ in backfill_challans.pending_records(manifest, "t")]
+        self.assertEqual(pending, [backfill_challans.record_key(self.records[2])])
+        self.assertEqual(len(list(backfill_challans.pending_records(manifest, "t", force=True))), 3)
+        self.assertEqual(len(list(backfill_challans.pending_records(manifest, "other"))), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import camera_config
+from utils.camera_config import CameraConfig, DEFAULT_CAMERA, get_camera_config
+from utils.config import LANE_DIVIDER_X, LANE_1_LIMIT, LANE_2_LIMIT
+
+class TestCameraConfig(unittest.TestCase):
+    def test_default_matches_lane_divider(self):
+        """Default layout reproduces the old `cx < LANE_DIVIDER_X` rule"""
+        cfg = CameraConfig("default", DEFAULT_CAMERA)
+        xs = np.arange(-50, 1400, 7)
+        ys = np.arange(-20, 800, 13)
+        points = np.array([(x, y) for x in xs for y in ys])
+        lanes = cfg.lane_indices(points)
+        expected = np.where(points[:, 0] < LANE_DIVIDER_X, 0, 1)
+        np.testing.assert_array_equal(lanes, expected)
+
+        self.assertEqual(cfg.lane_info(cfg.lane_index((LANE_DIVIDER_X - 1, 300))), ("Lane 1", LANE_1_LIMIT))
+        self.assertEqual(cfg.lane_info(cfg.lane_index((LANE_DIVIDER_X, 300))), ("Lane 2", LANE_2_LIMIT))
+
+    def test_polygon_lanes_and_outside(self):
+        cfg = CameraConfig("junction", {
+            "frame_size": [800, 600],
+            "lanes": [
+                {"name": "Bus Lane", "polygon": [[0, 300], [200, 300], [200, 600], [0, 600]], "limit": 30},
+                {"name": "Main", "polygon": [[100, 300], [600, 300], [400, 600], [100, 600]], "limit": 50},
+            ],
+        })
+        lanes = cfg.lane_indices([(50, 400), (150, 400), (500, 350), (700, 500), (400, 100)])
+        # Overlap (150, 400) goes to the earlier lane
+        np.testing.assert_array_equal(lanes, [0, 0, 1, -1, -1])
+        self.assertEqual(cfg.lane_info(-1), ("N/A", None))
+        self.assertEqual(cfg.lane_labels, ["L1", "L2"])
+
+    def test_road_roi_bounds_and_filter(self):
+        settings = dict(DEFAULT_CAMERA, road_roi=[[100, 300], [1200, 300], [1300, 800], [-20, 800]])
+        cfg = CameraConfig("roi", settings)
+        # Bounding box clipped to the actual frame
+        self.assertEqual(cfg.roi_bounds(1280, 720), (0, 300, 1280, 720))
+        np.testing.assert_array_equal(cfg.in_roi([(640, 500), (640, 200), (50, 310)]), [True, False, False])
+
+        # No ROI: whole frame, nothing dropped
+        plain = CameraConfig("default", DEFAULT_CAMERA)
+        self.assertEqual(plain.roi_bounds(1280, 720), (0, 0, 1280, 720))
+        self.assertTrue(plain.in_roi([(5, 5), (2000, 2000)]).all())
+
+    def test_registry_loads_file_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cameras.json")
+            with open(path, "w") as f:
+                json.dump({"cam_a.mp4": {"stop_line_y": 420}}, f)
+
+            camera_config.reload_camera_configs()
+            camera_config._camera_settings = camera_config.load_camera_settings(path)
+            try:
+                cfg_a = get_camera_config("cam_a.mp4")
+                self.assertEqual(cfg_a.stop_line_y, 420)
+                self.assertEqual(cfg_a.lane_names, ["Lane 1", "Lane 2"]) # Inherited default lanes
+                self.assertIs(get_camera_config("cam_a.mp4"), cfg_a) # Compiled once
+                self.assertIs(get_camera_config("unknown.mp4"), get_camera_config(None))
+            finally:
+                camera_config.reload_camera_configs()
+
+if __name__ == '__main__':
+    unittest.main()
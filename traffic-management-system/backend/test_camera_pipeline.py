@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_pipeline import CameraPipeline, FramePacer, placeholder_chunk
+
+class CountingSource:
+    """Frame generator that records how many frames were pulled and whether it was closed."""
+    def __init__(self):
+        self.pulled = 0
+        self.opened = 0
+        self.closed = 0
+
+    def __call__(self, camera):
+        self.opened += 1
+        return self._frames()
+
+    def _frames(self):
+        try:
+            while True:
+                self.pulled += 1
+                time.sleep(0.005)
+                yield f"frame-{self.pulled}".encode()
+        except GeneratorExit:
+            self.closed += 1
+            raise
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+class TestCameraPipeline(unittest.TestCase):
+    def test_viewers_share_one_pipeline_and_suspend(self):
+        source = CountingSource()
+        pipeline = CameraPipeline("cam", source, idle_close_seconds=60)
+        first, second = pipeline.stream(), pipeline.stream()
+        self.assertTrue(next(first).startswith(b"frame-"))
+        self.assertTrue(next(second).startswith(b"frame-"))
+        self.assertEqual(source.opened, 1)
+        self.assertEqual(pipeline.get_status()["viewers"], 2)
+
+        first.close()
+        second.close()
+        self.assertTrue(wait_for(lambda: pipeline.state == "suspended"))
+        pulled = source.pulled
+        time.sleep(0.1)
+        self.assertLessEqual(source.pulled - pulled, 1) # no decode while suspended
+
+        # Resume: same generator (capture, models, tracks kept), frames flow again
+        third = pipeline.stream()
+        next(third)
+        self.assertEqual(source.opened, 1)
+        self.assertEqual(pipeline.state, "running")
+        third.close()
+
+    def test_enforcement_duty_runs_without_viewers(self):
+        source = CountingSource()
+        pipeline = CameraPipeline("cam", source)
+        pipeline.set_enforce(True)
+        self.assertTrue(wait_for(lambda: source.pulled > 5))
+        pipeline.set_enforce(False)
+        self.assertTrue(wait_for(lambda: pipeline.state == "suspended"))
+
+    def test_long_idle_closes_the_source(self):
+        source = CountingSource()
+        pipeline = CameraPipeline("cam", source, idle_close_seconds=0.1)
+        viewer = pipeline.stream()
+        next(viewer)
+        viewer.close()
+        self.assertTrue(wait_for(lambda: source.closed == 1 and pipeline.state == "stopped"))
+        viewer = pipeline.stream()
+        next(viewer)
+        self.assertEqual(source.opened, 2)
+        viewer.close()
+
+    def test_failing_source_keeps_viewers_alive(self):
+        # Source that cannot be opened: the pipeline only retries, viewers get placeholders
+        pipeline = CameraPipeline("dead_cam", lambda camera: iter(()))
+        viewer = pipeline.stream(keepalive_seconds=0.05)
+        self.assertEqual(next(viewer), placeholder_chunk())
+        self.assertIn(b'image/jpeg', next(viewer))
+        self.assertEqual(pipeline.viewers, 1)
+        viewer.close() # what a failed write to a closed connection does
+        self.assertEqual(pipeline.viewers, 0)
+
+    def test_pacer_holds_rate_without_bursting(self):
+        pacer = FramePacer(100)
+        start = time.perf_counter()
+        for _ in range(10):
+            pacer.wait()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.08)
+        # After a stall the schedule restarts instead of catching up
+        time.sleep(0.1)
+        start = time.perf_counter()
+        pacer.wait()
+        pacer.wait()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.008)
+
+if __name__ == '__main__':
+    unittest.main()
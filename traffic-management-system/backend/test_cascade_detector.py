@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest.mock import MagicMock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cascade_detector import CascadeDetector, select_tiles, merge_detections
+
+class FakeTensor:
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+    def cpu(self):
+        return self
+    def numpy(self):
+        return self.data
+
+def fake_result(rows):
+    """rows: [[x1, y1, x2, y2, conf, cls], ...]"""
+    rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+    result = MagicMock()
+    result.boxes.xyxy = FakeTensor(rows[:, :4])
+    result.boxes.conf = FakeTensor(rows[:, 4])
+    result.boxes.cls = FakeTensor(rows[:, 5])
+    return result
+
+class TestCascadeDetector(unittest.TestCase):
+    def test_small_low_conf_object_confirmed_on_full_res_tile(self):
+        model = MagicMock()
+        model.predict.side_effect = [
+            # Coarse pass (1280x720 -> 640x360): confident car + tiny, uncertain motorcycle
+            [fake_result([[100, 100, 300, 300, 0.9, 2], [500, 100, 510, 115, 0.3, 3]])],
+            # Fine pass on one tile; motorcycle in tile coordinates
+            [fake_result([[361, 201, 381, 231, 0.8, 3]])],
+        ]
+        detector = CascadeDetector(model, base_width=640, conf=0.5, tracker=MagicMock(), tile_size=640)
+        boxes, scores, classes = detector.detect(np.zeros((720, 1280, 3), dtype=np.uint8))
+
+        self.assertEqual(detector.last_tile_count, 1)
+        tiles = model.predict.call_args_list[1][0][0]
+        self.assertEqual(tiles[0].shape, (640, 640, 3)) # Full resolution crop
+        order = np.argsort(classes)
+        np.testing.assert_allclose(boxes[order], [[200, 200, 600, 600], [1001, 201, 1021, 231]])
+        np.testing.assert_allclose(scores[order], [0.9, 0.8], rtol=1e-6)
+
+    def test_no_fine_pass_when_coarse_is_confident(self):
+        model = MagicMock()
+        model.predict.return_value = [fake_result([[100, 100, 300, 300, 0.9, 2]])]
+        detector = CascadeDetector(model, base_width=640, tracker=MagicMock())
+        boxes, _, _ = detector.detect(np.zeros((720, 1280, 3), dtype=np.uint8))
+        self.assertEqual(model.predict.call_count, 1)
+        self.assertEqual(len(boxes), 1)
+
+    def test_select_tiles_merges_nearby_and_caps(self):
+        boxes = [[1000, 200, 1010, 220], [1020, 210, 1030, 230], [100, 600, 110, 620], [600, 300, 610, 320]]
+        tiles = select_tiles(boxes, (720, 1280), tile_size=640, max_tiles=2)
+        self.assertEqual(tiles, [(640, 0, 1280, 640), (0, 80, 640, 720)])
+
+    def test_merge_is_class_wise(self):
+        boxes = [[0, 0, 100, 100], [5, 5, 100, 100], [0, 0, 100, 100]]
+        keep = merge_detections(boxes, [0.9, 0.6, 0.7], [2, 2, 3])
+        self.assertEqual(sorted(keep.tolist()), [0, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from clip_recorder import ClipRecorder
+
+class TestClipRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # 30 FPS source sampled to 10 FPS -> every 3rd frame kept
+        self.recorder = ClipRecorder(source_fps=30, pre_seconds=1, post_seconds=1, clip_fps=10, width=160)
+        self.frame = np.random.randint(0, 255, (360, 640, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sampling_and_ring_bound(self):
+        """Buffer keeps only pre_seconds * clip_fps frames"""
+        for _ in range(90):
+            self.recorder.push(self.frame)
+        self.assertEqual(len(self.recorder.frames), 10)
+        self.assertEqual(self.recorder.buffer_bytes, sum(len(f) for f in self.recorder.frames))
+
+    def test_memory_cap(self):
+        """Memory usage never exceeds the configured cap"""
+        recorder = ClipRecorder(source_fps=10, pre_seconds=10, clip_fps=10, width=160, max_bytes=20000)
+        for _ in range(100):
+            recorder.push(self.frame)
+            self.assertLessEqual(recorder.memory_usage(), 20000)
+        self.assertGreater(len(recorder.frames), 0)
+
+    def test_memory_cap_with_many_triggers(self):
+        """Violations in quick succession share frames and stay under the cap"""
+        recorder = ClipRecorder(source_fps=10, pre_seconds=4, post_seconds=2, clip_fps=10, width=160, max_bytes=60000)
+        recorder._write_async = lambda clip: None
+        for i in range(200):
+            recorder.push(np.random.randint(0, 255, (360, 640, 3), dtype=np.uint8))
+            if i % 3 == 0:
+                recorder.trigger(os.path.join(self.tmp_dir, f"{i}.jpg"))
+            self.assertLessEqual(recorder.memory_usage(), 60000)
+            # Accounting matches the distinct bytes objects actually held
+            held = {id(f): len(f) for f in recorder.frames}
+            held.update({id(f): len(f) for clip in recorder.pending for f in clip['frames']})
+            self.assertEqual(recorder.memory_usage(), sum(held.values()))
+        self.assertGreater(len(recorder.frames), 0)
+
+    def test_trigger_collects_post_frames(self):
+        """Clip is handed off after post_seconds worth of frames"""
+        for _ in range(30):
+            self.recorder.push(self.frame)
+
+        writes = []
+        self.recorder._write_async = lambda clip: writes.append(clip)
+
+        snapshot_path = os.path.join(self.tmp_dir, "7_20250101_120000.jpg")
+        clip_path = self.recorder.trigger(snapshot_path)
+        self.assertEqual(clip_path, os.path.join(self.tmp_dir, "7_20250101_120000.mp4"))
+
+        for _ in range(29):
+            self.recorder.push(self.frame)
+        self.assertEqual(len(writes), 0, "Clip should still be collecting")
+
+        self.recorder.push(self.frame)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(len(writes[0]['frames']), 20) # 10 pre + 10 post
+        self.assertEqual(self.recorder.pending, [])
+
+    def test_same_snapshot_name_makes_one_clip(self):
+        """Two violations of one track in the same second share one clip"""
+        for _ in range(30):
+            self.recorder.push(self.frame)
+        snapshot_path = os.path.join(self.tmp_dir, "7_20250101_120000.jpg")
+        self.assertEqual(self.recorder.trigger(snapshot_path), self.recorder.trigger(snapshot_path))
+        self.assertEqual(len(self.recorder.pending), 1)
+
+    def test_concurrent_writers_do_not_collide(self):
+        """Writers of the same clip path use their own temporary files"""
+        frames = [cv2.imencode('.jpg', self.frame)[1].tobytes()] * 5
+        path = os.path.join(self.tmp_dir, "7_20250101_120000.mp4")
+        writers = [threading.Thread(target=self.recorder._write_clip, args=(path, frames)) for _ in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.assertEqual(os.listdir(self.tmp_dir), ["7_20250101_120000.mp4"])
+        self.assertGreater(os.path.getsize(path), 0)
+
+    def test_no_snapshot_no_clip(self):
+        self.assertIsNone(self.recorder.trigger(None))
+        self.assertEqual(self.recorder.pending, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+import numpy as np
+import cv2
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cluster
+import database
+import snapshot
+import challan
+from cluster import Coordinator, Worker
+from cluster_transport import MemoryTransport, SQLiteTransport
+from frame_store import get_latest_frame
+from camera_pipeline import placeholder_chunk
+from utils import storage
+from utils.config import STORAGE_GENERATION_FILE
+
+class FakePipeline:
+    def __init__(self):
+        self.enforce = False
+
+    def set_enforce(self, enforce):
+        self.enforce = enforce
+
+def make_worker(transport, worker_id, cameras, pipelines):
+    return Worker(worker_id, transport, cameras, pipeline_for=lambda c: pipelines.setdefault((worker_id, c), FakePipeline()),
+                  stats_fn=lambda: {"total_vehicles": 5, "recent_violations": [],
+                                    "analytics": {c: {"Lane 1": {"vehicles": 2, "violations": 0}} for c in cameras}})
+
+class TestCluster(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        storage.use_generation_file(os.path.join(self.tmp_dir, "storage_generation.json"))
+        self.saved = (database.DB_FILE, snapshot.SNAPSHOT_DIR, challan.CHALLAN_DIR)
+        database.DB_FILE = os.path.join(self.tmp_dir, "violations.json")
+        snapshot.SNAPSHOT_DIR = os.path.join(self.tmp_dir, "snapshots")
+        challan.CHALLAN_DIR = os.path.join(self.tmp_dir, "challans")
+
+    def tearDown(self):
+        database.DB_FILE, snapshot.SNAPSHOT_DIR, challan.CHALLAN_DIR = self.saved
+        storage.use_generation_file(STORAGE_GENERATION_FILE)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_assignment_balances_and_fails_over(self):
+        transport, pipelines = MemoryTransport(), {}
+        cameras = ["a.mp4", "b.mp4", "c.mp4", "d.mp4"]
+        w1, w2 = make_worker(transport, "w1", cameras, pipelines), make_worker(transport, "w2", cameras, pipelines)
+        for worker in (w1, w2):
+            worker.heartbeat()
+        coordinator = Coordinator(transport, worker_timeout=5.0)
+        assignment = coordinator.assign()
+        self.assertEqual(sorted(len(c) for c in assignment.values()), [2, 2])
+        w1.apply_assignment()
+        self.assertTrue(all(pipelines[("w1", c)].enforce for c in assignment["w1"]))
+
+        # w2 stops sending heartbeats: its cameras move to w1, w1 keeps its own
+        updated, payload = transport.status["w2"]
+        transport.status["w2"] = (updated - 10, payload)
+        before = set(assignment["w1"])
+        assignment = coordinator.assign()
+        self.assertEqual(sorted(assignment["w1"]), cameras)
+        self.assertTrue(before <= set(assignment["w1"]))
+
+    def test_violation_round_trip_with_evidence(self):
+        transport = SQLiteTransport(os.path.join(self.tmp_dir, "cluster.db"))
+        worker = make_worker(transport, "w1", ["a.mp4"], {})
+        snap = os.path.join(self.tmp_dir, "worker_snap.jpg")
+        clip = os.path.join(self.tmp_dir, "worker_snap.mp4")
+        with open(snap, 'wb') as f:
+            f.write(b"jpeg-bytes")
+        worker.send_violation({"id": "7", "violation_type": "Red Light", "snapshot_path": snap})
+        worker.flush_outbox()
+        self.assertEqual(transport.fetch_events(), []) # waiting for the evidence clip
+        with open(clip, 'wb') as f:
+            f.write(b"mp4-bytes")
+        worker.flush_outbox()
+        # Handed to the transport: the worker's copies are gone
+        self.assertFalse(os.path.exists(snap) or os.path.exists(clip))
+
+        coordinator = Coordinator(transport)
+        self.assertEqual(coordinator.drain_events(), 1)
+        self.assertEqual(coordinator.drain_events(), 0) # acknowledged
+        record = database.get_all_violations()[0]
+        self.assertEqual((record["id"], record["node"]), ("7", "w1"))
+        self.assertTrue(record["snapshot_path"].startswith(snapshot.SNAPSHOT_DIR))
+        with open(record["snapshot_path"], 'rb') as f:
+            self.assertEqual(f.read(), b"jpeg-bytes")
+        self.assertEqual(os.path.dirname(record["clip_path"]), os.path.dirname(record["snapshot_path"]))
+        with open(record["clip_path"], 'rb') as f:
+            self.assertEqual(f.read(), b"mp4-bytes")
+
+    def test_clip_timeout_and_reset_discard(self):
+        transport = MemoryTransport()
+        worker = make_worker(transport, "w1", ["a.mp4"], {})
+        snaps = []
+        for i in range(2):
+            snaps.append(os.path.join(self.tmp_dir, f"snap_{i}.jpg"))
+            with open(snaps[-1], 'wb') as f:
+                f.write(b"jpeg-bytes")
+        worker.send_violation({"id": "1", "snapshot_path": snaps[0]})
+        # No clip ever written: sent without it once the wait is over
+        worker.flush_outbox(now=time.time() + worker.clip_wait_seconds)
+        self.assertEqual(len(transport.fetch_events()), 1)
+        self.assertNotIn("clip_path", transport.fetch_events()[0][3]["record"])
+
+        # History cleared on the coordinator: queued records and their files are dropped
+        worker.send_violation({"id": "2", "snapshot_path": snaps[1]})
+        transport.set_assignment({"w1": {"cameras": [], "epoch": 1}})
+        worker.epoch = 0
+        worker.apply_assignment()
+        self.assertEqual(worker.outbox, [])
+        self.assertFalse(os.path.exists(snaps[1]))
+
+    def test_frames_and_stats_reach_the_coordinator(self):
+        transport = SQLiteTransport(os.path.join(self.tmp_dir, "cluster.db"))
+        worker = make_worker(transport, "w1", ["cluster_cam.mp4"], {})
+        worker.heartbeat()
+        coordinator = Coordinator(transport)
+        coordinator.assign()
+        worker.apply_assignment()
+
+        image = np.full((360, 640, 3), 120, dtype=np.uint8)
+        get_latest_frame("cluster_cam.mp4", create=True).publish(image, cv2.imencode('.jpg', image)[1].tobytes())
+        worker.publish_frames()
+        worker.publish_frames() # unchanged frame is not sent again
+        version = get_latest_frame("cluster_cam.mp4").version
+        coordinator.pull_frames()
+        self.assertEqual(get_latest_frame("cluster_cam.mp4").version, version + 1)
+        coordinator.pull_frames()
+        self.assertEqual(get_latest_frame("cluster_cam.mp4").version, version + 1)
+
+        worker.heartbeat()
+        coordinator.assign()
+        merged = cluster.merge_stats({"violations": 3}, coordinator.worker_stats())
+        self.assertEqual((merged["total_vehicles"], merged["violations"]), (5, 3))
+        self.assertEqual(merged["analytics"], {"cluster_cam.mp4": {"Lane 1": {"vehicles": 2, "violations": 0}}})
+        self.assertEqual(coordinator.cameras(), ["cluster_cam.mp4"])
+
+    def test_relay_keeps_silent_viewers_alive(self):
+        relay = cluster.relay_stream("silent_cam.mp4", fps=50, keepalive_seconds=0.05)
+        self.assertEqual(next(relay), placeholder_chunk()) # no worker frame yet
+        image = np.full((36, 64, 3), 120, dtype=np.uint8)
+        jpeg = cv2.imencode('.jpg', image)[1].tobytes()
+        get_latest_frame("silent_cam.mp4", create=True).publish(image, jpeg)
+        self.assertIn(jpeg, next(relay))
+        self.assertEqual(next(relay), placeholder_chunk()) # frame unchanged
+        relay.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import threading
+import cv2
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.cpu_budget import CpuBudget, plan, available_cores
+
+class TestCpuBudget(unittest.TestCase):
+    def test_plan_splits_cores(self):
+        cores = list(range(8))
+        slices, shared, threads = plan(cores, ["a", "b", "c"], reserved=1)
+        self.assertEqual(shared, [0])
+        self.assertEqual(slices, {"a": [1, 2, 3], "b": [4, 5], "c": [6, 7]})
+        self.assertEqual(threads, 2)
+        # Disjoint slices covering every non-reserved core
+        self.assertEqual(sorted(c for s in slices.values() for c in s), list(range(1, 8)))
+
+    def test_plan_oversubscribed_and_small_machines(self):
+        slices, _, threads = plan([0, 1, 2], ["a", "b", "c", "d"], reserved=1)
+        self.assertEqual((slices["a"], slices["c"], threads), ([1], [1], 1))
+        # A single core is never reserved away from inference
+        slices, shared, _ = plan([0], ["a"], reserved=1)
+        self.assertEqual((slices, shared), ({"a": [0]}, []))
+
+    def test_replan_on_register_and_unregister(self):
+        budget = CpuBudget(cores=range(8), reserved=1)
+        budget.register("a")
+        version = budget.version
+        self.assertEqual(budget.allocation()["pipelines"], {"a": [1, 2, 3, 4, 5, 6, 7]})
+        budget.register("b")
+        self.assertGreater(budget.version, version)
+        self.assertEqual(budget.allocation()["intra_op_threads"], 3)
+        budget.unregister("a")
+        self.assertEqual(budget.allocation()["pipelines"], {"b": [1, 2, 3, 4, 5, 6, 7]})
+
+    def test_apply_pins_calling_thread(self):
+        cores = available_cores()
+        budget = CpuBudget(cores=cores, reserved=0)
+        budget.register("cam")
+        result = {}
+        def run():
+            result["version"] = budget.apply("cam")
+            if hasattr(os, "sched_getaffinity"):
+                result["mask"] = sorted(os.sched_getaffinity(0))
+        threads_before = cv2.getNumThreads()
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(result["version"], budget.version)
+        if "mask" in result:
+            self.assertEqual(result["mask"], budget.allocation()["pipelines"]["cam"])
+        self.assertEqual(cv2.getNumThreads(), budget.allocation()["intra_op_threads"])
+        cv2.setNumThreads(threads_before)
+
+if __name__ == '__main__':
+    unittest.main()
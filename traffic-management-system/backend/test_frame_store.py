@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import numpy as np
+import cv2
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from frame_store import LatestFrame
+
+class TestLatestFrame(unittest.TestCase):
+    def setUp(self):
+        self.latest = LatestFrame("cam1")
+        self.image = np.random.randint(0, 255, (360, 640, 3), dtype=np.uint8)
+        self.jpeg = cv2.imencode('.jpg', self.image)[1].tobytes()
+
+    def test_empty_before_first_frame(self):
+        self.assertEqual(self.latest.get(), (None, 0, 0.0))
+
+    def test_full_size_is_the_published_jpeg(self):
+        self.latest.publish(self.image, self.jpeg)
+        jpeg, version, _ = self.latest.get()
+        self.assertIs(jpeg, self.jpeg)
+        self.assertEqual(version, 1)
+        # Widths at or above the frame width also get the original bytes
+        self.assertIs(self.latest.get(1280)[0], self.jpeg)
+
+    def test_thumbnail_cached_until_next_frame(self):
+        """Thumbnails are encoded once per frame and size; widths snap to THUMBNAIL_WIDTHS"""
+        self.latest.publish(self.image, self.jpeg)
+        first = self.latest.get(300)[0]
+        self.assertIs(self.latest.get(320)[0], first)
+        self.assertEqual(cv2.imdecode(np.frombuffer(first, np.uint8), 1).shape, (180, 320, 3))
+
+        self.latest.publish(self.image, self.jpeg)
+        self.assertEqual(self.latest.thumbnails, {})
+        self.assertEqual(self.latest.get(320)[1], 2)
+
+if __name__ == '__main__':
+    unittest.main()
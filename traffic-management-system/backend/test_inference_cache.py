@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import tempfile
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_cache import InferenceCache, source_frame_index
+
+class TestInferenceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.video = os.path.join(self.tmp.name, "clip.mp4")
+        self.model = os.path.join(self.tmp.name, "model.pt")
+        with open(self.video, "wb") as f:
+            f.write(b"video-bytes")
+        with open(self.model, "wb") as f:
+            f.write(b"weights-v1")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _open(self, params=None):
+        cache = InferenceCache(self.video, cache_dir=self.cache_dir)
+        cache.register("vehicle", self.model, params or {"conf": 0.5})
+        return cache
+
+    def test_replay_across_runs(self):
+        calls = []
+        def compute():
+            calls.append(1)
+            return [[10, 20, 30, 40, 1, 2]]
+
+        cache = self._open()
+        self.assertEqual(cache.lookup("vehicle", 3, compute), [[10, 20, 30, 40, 1, 2]])
+        self.assertEqual(cache.lookup("vehicle", 6, lambda: []), []) # Empty result is cached too
+        cache.flush()
+
+        cache = self._open()
+        self.assertEqual(cache.lookup("vehicle", 3, compute), [[10, 20, 30, 40, 1, 2]])
+        self.assertEqual(cache.lookup("vehicle", 6, compute), [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get_stats(), {"hits": 2, "misses": 0})
+
+    def test_model_or_threshold_change_invalidates(self):
+        cache = self._open()
+        cache.put("vehicle", 3, [[1, 2, 3, 4, 5, 2]])
+        cache.flush()
+
+        self.assertIsNone(self._open({"conf": 0.6}).get("vehicle", 3))
+
+        cache = self._open()
+        cache.put("vehicle", 3, [[1, 2, 3, 4, 5, 2]])
+        cache.flush()
+        with open(self.model, "wb") as f:
+            f.write(b"weights-v2-retrained")
+        cache = self._open()
+        self.assertIsNone(cache.get("vehicle", 3))
+        # Stale store is deleted (the new one is created on the first flush)
+        self.assertEqual(os.listdir(cache.dir), [])
+
+    def test_truncated_line_is_ignored(self):
+        cache = self._open()
+        cache.put("vehicle", 3, [])
+        cache.flush()
+        with open(cache.stores["vehicle"]["path"], "a") as f:
+            f.write('{"k": "6", "v": [[1, 2')
+        cache = self._open()
+        self.assertEqual(cache.get("vehicle", 3), [])
+        self.assertIsNone(cache.get("vehicle", 6))
+
+    def test_looping_source_replays_first_pass(self):
+        # Real 12-frame clip, looped twice the way generate_frames does it
+        writer = cv2.VideoWriter(self.video, cv2.VideoWriter_fourcc(*'mp4v'), 10, (64, 48))
+        for i in range(12):
+            writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+        writer.release()
+
+        cache = self._open()
+        cap = cv2.VideoCapture(self.video)
+        passes, misses = 0, []
+        while passes < 2:
+            index = source_frame_index(cap)
+            success, frame = cap.read()
+            if not success:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                passes += 1
+                misses.append(cache.misses)
+                continue
+            cache.lookup("vehicle", index, lambda: [[int(frame[0, 0, 0]), 0, 0, 0, 1, 2]])
+        cap.release()
+
+        self.assertEqual(misses[0], 12)
+        self.assertEqual(misses[1], 12)   # second pass: all hits
+        self.assertEqual(cache.hits, 12)
+        self.assertEqual(len(cache.stores["vehicle"]["entries"]), 12) # no growth per loop
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from inference_scheduler import InferenceScheduler, CRITICAL, HIGH, ROUTINE, helmet_priority
+from red_light_detector import RedLightDetector
+
+def last_or_none(track_id, last):
+    return last
+
+class TestInferenceScheduler(unittest.TestCase):
+    def make(self, budget):
+        return InferenceScheduler("test_cam", frame_budget=budget, deadline_frames={"high": 2, "routine": 2})
+
+    def test_everything_runs_within_budget(self):
+        scheduler = self.make(None)
+        scheduler.begin_frame(1)
+        results = scheduler.run("plate", [(i, p, lambda i=i: i * 10) for i, p in enumerate((ROUTINE, HIGH, CRITICAL))], last_or_none)
+        self.assertEqual(results, {0: 0, 1: 10, 2: 20})
+        stats = scheduler.get_stats()
+        self.assertEqual([stats[c]["run"] for c in ("critical", "high", "routine")], [1, 1, 1])
+
+    def test_overload_defers_then_forces_or_sheds(self):
+        scheduler = self.make(0.0) # every frame is over budget
+        calls = []
+        def request(track_id, priority):
+            return (track_id, priority, lambda: calls.append(track_id) or f"r{track_id}")
+
+        for frame in (1, 2):
+            scheduler.begin_frame(frame)
+            results = scheduler.run("helmet", [request(1, ROUTINE), request(2, HIGH), request(3, CRITICAL)], last_or_none)
+            # Critical work always runs; the rest is deferred until its deadline (frame 3)
+            self.assertEqual(results, {1: None, 2: None, 3: "r3"})
+        self.assertEqual(scheduler.get_stats()["pending"], 2)
+
+        scheduler.begin_frame(3)
+        results = scheduler.run("helmet", [request(1, ROUTINE), request(2, HIGH), request(3, CRITICAL)], last_or_none)
+        self.assertEqual(results, {1: None, 2: "r2", 3: "r3"}) # high forced at its deadline, routine shed
+        self.assertEqual(calls, [3, 3, 3, 2]) # critical before high
+        stats = scheduler.get_stats()
+        self.assertEqual(stats["high"], {"run": 1, "deferred": 2, "shed": 0})
+        self.assertEqual(stats["routine"], {"run": 0, "deferred": 2, "shed": 1})
+        self.assertEqual(stats["pending"], 0)
+
+    def test_fallback_reuses_last_result_and_forget_tracks(self):
+        scheduler = self.make(None)
+        scheduler.begin_frame(1)
+        scheduler.run("plate", [(7, ROUTINE, lambda: "first")], last_or_none)
+        scheduler.frame_budget = 0.0
+        scheduler.begin_frame(2)
+        self.assertEqual(scheduler.run("plate", [(7, ROUTINE, lambda: "second")], last_or_none), {7: "first"})
+        scheduler.forget_tracks([7])
+        self.assertEqual(scheduler.run("plate", [(7, ROUTINE, lambda: "second")], last_or_none), {7: None})
+        self.assertEqual(scheduler.get_stats()["pending"], 1)
+
+    def test_detection_frame_budget_covers_skipped_frames(self):
+        # 10 ms per frame; the tracker already took 15 ms of this detection frame
+        scheduler = self.make(0.010)
+        request = [(1, HIGH, lambda: "ran")]
+        scheduler.begin_frame(3, start=time.perf_counter() - 0.015, frames=1)
+        self.assertEqual(scheduler.run("helmet", request, last_or_none), {1: None}) # one interval: over budget
+        scheduler.begin_frame(6, start=time.perf_counter() - 0.015, frames=3)
+        self.assertEqual(scheduler.run("helmet", request, last_or_none), {1: "ran"}) # within 3 intervals
+        self.assertEqual(scheduler.get_stats()["high"], {"run": 1, "deferred": 1, "shed": 0})
+
+class TestPriorityInputs(unittest.TestCase):
+    def test_helmet_priority_from_stabilization_state(self):
+        class Helmet:
+            violated_vehicles = {4}
+            helmet_stability = {1: {'status': 'HELMET', 'confirmed': 'HELMET'},
+                                2: {'status': 'NO_HELMET', 'confirmed': 'NO_HELMET'},
+                                3: {'status': 'NO_HELMET', 'confirmed': 'HELMET'}}
+        priorities = [helmet_priority(Helmet, i) for i in (0, 1, 2, 3, 4)]
+        self.assertEqual(priorities, [HIGH, ROUTINE, CRITICAL, CRITICAL, ROUTINE])
+
+    def test_approaching_stop_line(self):
+        detector = RedLightDetector(stop_line_y=500)
+        # Centroids at y=300 (far), 420 (80 px before), 520 (past the line)
+        boxes = [[0, 280, 40, 320], [0, 400, 40, 440], [0, 500, 40, 540]]
+        self.assertEqual(detector.approaching(boxes, 150).tolist(), [False, True, False])
+        zone = RedLightDetector(approaches=[{'name': 'Z', 'polygon': [(100, 100), (200, 100), (200, 200), (100, 200)]}])
+        self.assertEqual(zone.approaching([[40, 140, 60, 160], [140, 140, 160, 160], [0, 0, 10, 10]], 60).tolist(),
+                         [True, False, False])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.metrics import Registry
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_render(self):
+        frames = self.registry.counter("tms_frames_total", "Frames.", ["camera"])
+        fps = self.registry.gauge("tms_camera_fps", "FPS.", ["camera"])
+        frames.labels("cam1").inc()
+        frames.labels("cam1").inc(2)
+        fps.labels("cam1").set(12.5)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE tms_frames_total counter", text)
+        self.assertIn('tms_frames_total{camera="cam1"} 3', text)
+        self.assertIn('tms_camera_fps{camera="cam1"} 12.5', text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("lat_seconds", "Latency.", ["stage"], buckets=(0.01, 0.1))
+        child = latency.labels("track")
+        for value in (0.005, 0.05, 0.05, 1.0):
+            child.observe(value)
+
+        text = self.registry.render()
+        self.assertIn('lat_seconds_bucket{stage="track",le="0.01"} 1', text)
+        self.assertIn('lat_seconds_bucket{stage="track",le="0.1"} 3', text)
+        self.assertIn('lat_seconds_bucket{stage="track",le="+Inf"} 4', text)
+        self.assertIn('lat_seconds_count{stage="track"} 4', text)
+
+        with latency.labels("encode").time():
+            pass
+        self.assertEqual(latency.labels("encode").count, 1)
+
+    def test_label_values_escaped(self):
+        counter = self.registry.counter("c_total", "Counter.", ["camera"])
+        counter.labels('a"b\\c').inc()
+        self.assertIn('c_total{camera="a\\"b\\\\c"} 1', self.registry.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+sys.modules['ultralytics'] = MagicMock() # Mock YOLO library
+
+from utils import model_loader
+
+class TestModelLoader(unittest.TestCase):
+    def setUp(self):
+        self.yolo = sys.modules['ultralytics'].YOLO
+        self.yolo.reset_mock()
+        self.yolo.side_effect = lambda path: MagicMock(name=f"model:{path}")
+
+    def test_preloaded_model_is_warmed_and_handed_out_once(self):
+        model_loader.preload_models([("vehicle.pt", (384, 640, 3))], background=False)
+        first = model_loader.get_model("vehicle.pt")
+        first.assert_called_once() # Dummy warmup inference
+        self.assertEqual(first.call_args[0][0].shape, (384, 640, 3))
+
+        # Second stream gets its own instance (tracker state lives on the model)
+        second = model_loader.get_model("vehicle.pt")
+        self.assertIsNot(first, second)
+        self.assertEqual(self.yolo.call_count, 2)
+
+    def test_get_model_waits_for_background_preload(self):
+        thread = model_loader.preload_models([("helmet.pt", (64, 64, 3))])
+        model = model_loader.get_model("helmet.pt")
+        thread.join()
+        self.assertEqual(self.yolo.call_count, 1)
+        model.assert_called_once()
+
+    def test_failed_preload_falls_back_to_lazy_load(self):
+        self.yolo.side_effect = [RuntimeError("bad weights"), MagicMock()]
+        model_loader.preload_models([("plate.pt", (160, 160, 3))], background=False)
+        self.assertIsNotNone(model_loader.get_model("plate.pt"))
+        self.assertEqual(self.yolo.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
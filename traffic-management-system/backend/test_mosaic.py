@@ -0,0 +1,122 @@
+import unittest
+import sys
+import os
+import threading
+import numpy as np
+import cv2
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from frame_store import get_latest_frame
+import mosaic
+from mosaic import MosaicStream, grid_shape, fit_tile, get_mosaic_stream
+
+def publish(camera, color, shape=(360, 640, 3)):
+    image = np.full(shape, color, dtype=np.uint8)
+    get_latest_frame(camera, create=True).publish(image, cv2.imencode('.jpg', image)[1].tobytes())
+
+class Source:
+    """Stands in for a CameraPipeline: counts attached viewers."""
+    def __init__(self):
+        self.viewers = 0
+
+    def attach(self):
+        self.viewers += 1
+
+    def detach(self):
+        self.viewers -= 1
+
+def next_chunk(generator, timeout=5.0):
+    """next() with a bounded wait: a composer that produces nothing fails the test instead of hanging it."""
+    out = []
+    thread = threading.Thread(target=lambda: out.append(next(generator)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if not out:
+        raise AssertionError("no mosaic frame within %.0f s" % timeout)
+    return out[0]
+
+class TestMosaic(unittest.TestCase):
+    def test_grid_shape(self):
+        self.assertEqual(grid_shape(1), (1, 1))
+        self.assertEqual(grid_shape(3), (2, 2))
+        self.assertEqual(grid_shape(8), (3, 3))
+
+    def test_fit_tile_letterboxes(self):
+        tile = fit_tile(np.full((100, 400, 3), 200, dtype=np.uint8), 200, 100)
+        self.assertEqual(tile.shape, (100, 200, 3))
+        self.assertEqual(tile[0, 100, 0], 0)    # bar above the 200x50 image
+        self.assertEqual(tile[50, 100, 0], 200)
+
+    def test_compose_tiles(self):
+        publish("mosaic_a.mp4", 50)
+        publish("mosaic_b.mp4", 150)
+        stream = MosaicStream(["mosaic_a.mp4", "mosaic_b.mp4", "mosaic_missing.mp4"], 640, 360, 10)
+        canvas = stream.compose()
+        self.assertEqual(canvas.shape, (360, 640, 3))
+        self.assertEqual(canvas[90, 160, 0], 50)   # top-left tile
+        self.assertEqual(canvas[90, 480, 0], 150)  # top-right tile
+
+        # Unchanged cameras reuse their resized tile
+        tile = stream.tiles["mosaic_a.mp4"][1]
+        stream.compose()
+        self.assertIs(stream.tiles["mosaic_a.mp4"][1], tile)
+
+    def test_viewers_share_one_encode(self):
+        publish("mosaic_c.mp4", 100)
+        source = Source()
+        stream = MosaicStream(["mosaic_c.mp4"], 320, 180, 20, sources=[source], jpeg_quality=70)
+        first, second = stream.frames(), stream.frames()
+        a, b = next_chunk(first), next_chunk(second)
+        self.assertEqual(stream.viewers, 2)
+        self.assertEqual(source.viewers, 1) # one slot per mosaic, not per mosaic viewer
+        self.assertIn(b'image/jpeg', a)
+        self.assertIn(b'image/jpeg', b)
+        composer = stream.thread
+        first.close()
+        second.close()
+        self.assertEqual(stream.viewers, 0)
+        self.assertEqual(source.viewers, 0)
+        # Composer stops once the last viewer is gone
+        composer.join(1.0)
+        self.assertFalse(composer.is_alive())
+        self.assertIsNone(stream.thread)
+
+    def test_failed_tick_does_not_stall_viewers(self):
+        publish("mosaic_d.mp4", 100)
+        stream = MosaicStream(["mosaic_d.mp4"], 320, 180, 20, jpeg_quality=70)
+        compose, failures = stream.compose, []
+        def flaky_compose():
+            if len(failures) < 3:
+                failures.append(1)
+                raise ValueError("bad frame")
+            return compose()
+        stream.compose = flaky_compose
+        viewer = stream.frames()
+        self.assertIn(b'image/jpeg', next_chunk(viewer))
+        composer = stream.thread
+        viewer.close()
+        composer.join(1.0)
+        # A composer that died without clearing `thread` is replaced, not waited on
+        stream.thread = threading.Thread(target=lambda: None)
+        stream.thread.start()
+        stream.thread.join()
+        viewer = stream.frames()
+        self.assertIn(b'image/jpeg', next_chunk(viewer))
+        viewer.close()
+
+    def test_idle_selection_is_dropped(self):
+        publish("mosaic_e.mp4", 100)
+        stream = get_mosaic_stream(["mosaic_e.mp4"], 320, 180, 20)
+        first, second = stream.frames(), get_mosaic_stream(["mosaic_e.mp4"], 320, 180, 20).frames()
+        next_chunk(first)
+        next_chunk(second)
+        first.close()
+        self.assertIs(get_mosaic_stream(["mosaic_e.mp4"], 320, 180, 20), stream) # still has a viewer
+        second.close()
+        self.assertNotIn((("mosaic_e.mp4",), 320, 180, 20), mosaic._streams)
+        self.assertIsNot(get_mosaic_stream(["mosaic_e.mp4"], 320, 180, 20), stream)
+
+if __name__ == '__main__':
+    unittest.main()
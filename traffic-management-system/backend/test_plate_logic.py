@@ -1,30 +1,32 @@
 import unittest
 import os
 import shutil
-import cv2
+import tempfile
 import numpy as np
 import sys
 
 # Add backend to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from plate_generator import PlateManager, PLATE_DIR
+import plate_generator
+from plate_generator import PlateManager
 
 class TestPlateManager(unittest.TestCase):
     def setUp(self):
-        # Ensure clean state
-        if os.path.exists(PLATE_DIR):
-            shutil.rmtree(PLATE_DIR)
+        # Separate store directory per test (the tracked plates/ directory is left alone)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_dir = plate_generator.PLATE_DIR
+        plate_generator.PLATE_DIR = self.tmp_dir
         self.manager = PlateManager()
 
     def tearDown(self):
-        # Cleanup
-        if os.path.exists(PLATE_DIR):
-            shutil.rmtree(PLATE_DIR)
+        self.manager.plate_store.flush()
+        plate_generator.PLATE_DIR = self.original_dir
+        shutil.rmtree(self.tmp_dir)
 
     def test_directory_creation(self):
-        """Test that plates directory is created on init"""
-        self.assertTrue(os.path.exists(PLATE_DIR))
+        """Test that the plate store directory exists on init"""
+        self.assertTrue(os.path.exists(self.tmp_dir))
 
     def test_heuristic_fallback(self):
         """Test that heuristic crop is saved and text assigned"""
@@ -34,19 +36,20 @@ class TestPlateManager(unittest.TestCase):
         
         # Call detect_and_assign
         track_id = 999
-        text = self.manager.detect_and_assign(track_id, frame, vehicle_bbox)
+        text, plate_bbox = self.manager.detect_and_assign(track_id, frame, vehicle_bbox)
         
         # Check text format (Simple check)
         parts = text.split('-')
         self.assertEqual(len(parts), 4) # AA-00-XX-0000
         
         # Check persistence
-        text2 = self.manager.detect_and_assign(track_id, frame, vehicle_bbox)
+        text2, _ = self.manager.detect_and_assign(track_id, frame, vehicle_bbox)
         self.assertEqual(text, text2)
 
-        # Check image saved
-        expected_file = os.path.join(PLATE_DIR, f"plate_{track_id}.jpg")
-        self.assertTrue(os.path.exists(expected_file), "Plate image should be saved")
+        # Check image saved (written by the background writer)
+        key = self.manager.plate_data[str(track_id)]['image_key']
+        self.manager.plate_store.flush()
+        self.assertIsNotNone(self.manager.plate_store.get(key), "Plate image should be saved")
 
     def test_small_bbox_fallback(self):
         """Test fallback for too small bbox (no image saved)"""
@@ -54,12 +57,13 @@ class TestPlateManager(unittest.TestCase):
         vehicle_bbox = (10, 10, 15, 15) # Very small
         
         track_id = 888
-        text = self.manager.detect_and_assign(track_id, frame, vehicle_bbox)
+        text, _ = self.manager.detect_and_assign(track_id, frame, vehicle_bbox)
         
         self.assertTrue(text)
         # Should NOT have saved an image
-        expected_file = os.path.join(PLATE_DIR, f"plate_{track_id}.jpg")
-        self.assertFalse(os.path.exists(expected_file))
+        self.assertIsNone(self.manager.plate_data[str(track_id)]['image_key'])
+        self.manager.plate_store.flush()
+        self.assertEqual(self.manager.plate_store.keys(), [])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import numpy as np
+import cv2
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from plate_store import PlateCropStore
+
+class TestPlateCropStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.crop = np.random.randint(0, 255, (40, 120, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip_and_rolling_packs(self):
+        """Crops are readable by key after the writer drains; packs roll at the size limit"""
+        store = PlateCropStore(self.tmp_dir, pack_max_bytes=1)
+        for i in range(3):
+            self.assertTrue(store.put(f"s_{i}", self.crop))
+            store.flush() # separate batches -> each batch starts a new (full) pack
+        self.assertEqual(len(store._pack_numbers()), 3)
+        for i in range(3):
+            img = cv2.imdecode(np.frombuffer(store.get(f"s_{i}"), np.uint8), cv2.IMREAD_COLOR)
+            self.assertEqual(img.shape, self.crop.shape)
+        self.assertIsNone(store.get("missing"))
+
+    def test_reads_follow_a_growing_pack(self):
+        """The active pack is re-mapped when new crops are appended after a read"""
+        store = PlateCropStore(self.tmp_dir)
+        store.put("a", self.crop)
+        store.flush()
+        first = store.get("a")
+        store.put("b", self.crop[:20])
+        store.flush()
+        self.assertEqual(store.get("a"), first)
+        self.assertIsNotNone(store.get("b"))
+
+        # A new instance (e.g. the export tool) sees the same index and appends to the same pack
+        reopened = PlateCropStore(self.tmp_dir)
+        self.assertEqual(sorted(reopened.keys()), ["a", "b"])
+        out_dir = os.path.join(self.tmp_dir, "export")
+        self.assertEqual(reopened.export(out_dir, ["b"]), 1)
+        self.assertEqual(os.listdir(out_dir), ["b.jpg"])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """When the writer is behind, put() drops the crop instead of stalling the frame thread"""
+        store = PlateCropStore(self.tmp_dir, queue_size=1)
+        release = threading.Event()
+        store._write_batch = lambda batch: release.wait()
+        results = [store.put(f"k{i}", self.crop) for i in range(5)]
+        release.set()
+        self.assertEqual(results[0], True)
+        self.assertEqual(results[-1], False)
+        self.assertEqual(store.dropped, results.count(False))
+
+if __name__ == '__main__':
+    unittest.main()
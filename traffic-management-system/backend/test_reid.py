@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from reid import ReIdentifier, SYNTHETIC_ID_START
+from speed_calculation import SpeedTracker
+
+RED, BLUE = (0, 0, 200), (200, 60, 0)
+
+def make_frame(*vehicles):
+    frame = np.full((360, 640, 3), 90, dtype=np.uint8)
+    for (x1, y1, x2, y2), color in vehicles:
+        frame[y1:y2, x1:x2] = color
+        frame[y1 + 10:y1 + 20, x1 + 5:x2 - 5] = 30 # windshield
+    return frame
+
+def row(box, track_id, cls=2):
+    return [*box, track_id, cls]
+
+class TestReIdentifier(unittest.TestCase):
+    def setUp(self):
+        self.reid = ReIdentifier(max_lost_frames=30, max_distance=1.0, min_similarity=0.6)
+
+    def _drive(self, track_id, start_x, frames, color=RED, step=10):
+        """Vehicle moving right by `step` px per detection frame (every 3rd frame)."""
+        for k, frame_index in enumerate(frames):
+            box = (start_x + k * step, 100, start_x + k * step + 60, 140)
+            out = self.reid.update(make_frame((box, color)), [row(box, track_id)], frame_index)
+        return out
+
+    def test_fragmented_id_resumes_old_id(self):
+        """New ID near the predicted position with the same colors keeps the lost ID"""
+        self._drive(5, 100, [3, 6, 9])
+        # Occluded for two detection frames, reappears where constant velocity puts it, new tracker ID 9
+        box = (150, 100, 210, 140)
+        out = self.reid.update(make_frame((box, RED)), [row(box, 9)], 18)
+        self.assertEqual(out[0][4], 5)
+        self.assertEqual(self.reid.last_merged, [5])
+        # Mapping persists on the following frames
+        box = (160, 100, 220, 140)
+        self.assertEqual(self.reid.update(make_frame((box, RED)), [row(box, 9)], 21)[0][4], 5)
+
+    def test_no_merge_on_appearance_or_motion_mismatch(self):
+        self._drive(5, 100, [3, 6, 9])
+        box = (150, 100, 210, 140)
+        out = self.reid.update(make_frame((box, BLUE)), [row(box, 9)], 18)
+        self.assertEqual(out[0][4], 9) # different color
+        far = (450, 250, 510, 290)
+        out = self.reid.update(make_frame((far, RED)), [row(far, 11)], 21)
+        self.assertEqual(out[0][4], 11) # too far from the prediction
+        self.assertEqual(self.reid.merged_total, 0)
+
+    def test_old_tracker_id_returning_gets_its_own_id(self):
+        """If the tracker re-finds the old ID after a merge, both vehicles stay distinct"""
+        self._drive(5, 100, [3, 6, 9])
+        box = (150, 100, 210, 140)
+        self.reid.update(make_frame((box, RED)), [row(box, 9)], 18)
+        other = (400, 200, 460, 240)
+        out = self.reid.update(make_frame((box, RED), (other, BLUE)), [row(box, 9), row(other, 5)], 21)
+        self.assertEqual([r[4] for r in out], [5, SYNTHETIC_ID_START + 1])
+
+    def test_forget_tracks_releases_mappings(self):
+        self._drive(5, 100, [3])
+        self.reid.forget_tracks([5])
+        self.assertEqual((self.reid.tracks, self.reid.raw_to_id, self.reid.owner), ({}, {}, {}))
+
+class TestSpeedResume(unittest.TestCase):
+    def test_resume_keeps_age_but_not_position(self):
+        """The occlusion gap is not measured as one step, and the warm-up is not restarted"""
+        tracker = SpeedTracker()
+        for i in range(12):
+            speed = tracker.calculate_speeds([5], [(i * 10, 0)], time_elapsed=0.1)[0]
+        self.assertGreater(speed, 0)
+        tracker.resume_tracks([5])
+        self.assertEqual(tracker.calculate_speeds([5], [(500, 0)], time_elapsed=0.1)[0], 0) # no jump sample
+        self.assertGreater(tracker.calculate_speeds([5], [(510, 0)], time_elapsed=0.1)[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,7 @@ mock_config.VEHICLE_CLASSES = [2, 3, 5, 7]
 sys.modules['utils.config'] = mock_config
 sys.modules['ultralytics'] = MagicMock()
 
+import numpy as np
 from speed_calculation import SpeedTracker
 
 class TestSpeedTracker(unittest.TestCase):
@@ -76,5 +77,48 @@ class TestSpeedTracker(unittest.TestCase):
         # But wait, smoothing logic appends this 0.
         self.assertEqual(speed, 0)
 
+class TestBatchSpeedTracker(unittest.TestCase):
+    def test_batch_matches_scalar(self):
+        """calculate_speeds must return exactly what calculate_speed returns per track"""
+        rng = np.random.default_rng(42)
+        scalar = SpeedTracker(meters_per_pixel=0.05, fps=30)
+        batch = SpeedTracker(meters_per_pixel=0.05, fps=30)
+
+        positions = {}
+        for frame in range(60):
+            # Tracks come and go; IDs are not contiguous
+            active = sorted(rng.choice(np.arange(1, 200, 7), size=12, replace=False))
+            ids, cents = [], []
+            for track_id in active:
+                x, y = positions.get(track_id, rng.integers(0, 1280, size=2))
+                step = rng.integers(-4, 5, size=2)
+                if rng.random() < 0.05:
+                    step = step * 200 # Occasional teleport (> 150 km/h spike)
+                positions[track_id] = (int(x + step[0]), int(y + step[1]))
+                ids.append(track_id)
+                cents.append(positions[track_id])
+
+            dt = 0.1 if frame % 2 else None
+            expected = [scalar.calculate_speed(t, c, time_elapsed=dt) for t, c in zip(ids, cents)]
+            result = batch.calculate_speeds(ids, cents, time_elapsed=dt)
+
+            self.assertEqual(list(result), expected, f"Frame {frame}: batch differs from scalar")
+            for track_id in ids:
+                self.assertEqual(batch.get_last_speed(track_id), scalar.get_last_speed(track_id))
+
+    def test_batch_empty_frame(self):
+        tracker = SpeedTracker()
+        self.assertEqual(tracker.calculate_speeds([], np.zeros((0, 2))).size, 0)
+
+    def test_state_table_growth(self):
+        """Table grows beyond its initial capacity without losing state"""
+        tracker = SpeedTracker()
+        ids = np.arange(500)
+        cents = np.zeros((500, 2))
+        tracker.calculate_speeds(ids, cents)
+        tracker.calculate_speeds(ids, cents + 1)
+        self.assertEqual(len(tracker.state_table), 500)
+        self.assertTrue((tracker.state_table.age[tracker.state_table.lookup(ids)] == 2).all())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import storage
+from utils.config import STORAGE_GENERATION_FILE
+import database
+
+class TestStorageGenerations(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        storage.use_generation_file(os.path.join(self.tmp_dir, "storage_generation.json"))
+        self.snapshots = os.path.join(self.tmp_dir, "snapshots")
+        self.db_file = os.path.join(self.tmp_dir, "violations.json")
+        self.original_db = database.DB_FILE
+        database.DB_FILE = self.db_file
+
+    def tearDown(self):
+        database.DB_FILE = self.original_db
+        storage.use_generation_file(STORAGE_GENERATION_FILE)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_generation_zero_is_legacy_layout(self):
+        """Without a pointer file the original flat layout is used"""
+        self.assertEqual(storage.get_generation(), 0)
+        self.assertEqual(storage.generation_dir(self.snapshots), self.snapshots)
+        self.assertEqual(storage.partition_file(self.db_file), self.db_file)
+
+    def test_advance_switches_writers(self):
+        """After advancing, the DB reads an empty partition and the pointer survives a reload"""
+        database.save_violation({"id": 1})
+        self.assertEqual(len(database.get_all_violations()), 1)
+
+        self.assertEqual(storage.advance_generation(), 1)
+        self.assertEqual(database.get_all_violations(), [])
+        self.assertEqual(storage.generation_dir(self.snapshots), os.path.join(self.snapshots, "g0001"))
+
+        storage.use_generation_file(storage.GENERATION_FILE) # forget the cached value
+        self.assertEqual(storage.get_generation(), 1)
+
+    def test_purge_keeps_current_generation(self):
+        """Purge removes legacy files, older generation dirs and DB partitions only"""
+        os.makedirs(os.path.join(self.snapshots, "g0001"))
+        os.makedirs(os.path.join(self.snapshots, "g0002"))
+        for path in (os.path.join(self.snapshots, "old.jpg"), os.path.join(self.snapshots, "g0002", "new.jpg")):
+            open(path, 'w').close()
+        for gen in (0, 1, 2):
+            with open(storage.partition_file(self.db_file, gen), 'w') as f:
+                json.dump([], f)
+
+        removed = storage.purge_generations([self.snapshots], [self.db_file], keep=2)
+        self.assertEqual(removed, 4)
+        self.assertEqual(os.listdir(self.snapshots), ["g0002"])
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["snapshots", "violations.g0002.json"])
+
+if __name__ == '__main__':
+    unittest.main()
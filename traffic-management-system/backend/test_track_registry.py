@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+sys.modules['ultralytics'] = MagicMock() # Mock YOLO library
+
+from track_registry import TrackRegistry
+from speed_calculation import SpeedTracker
+from red_light_detector import RedLightDetector
+
+class TestTrackRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = TrackRegistry(ttl_frames=8)
+        self.speed_tracker = self.registry.subscribe(SpeedTracker())
+        self.red_light = self.registry.subscribe(RedLightDetector(stop_line_y=500))
+
+    def _frame(self, frame_index, track_ids):
+        for track_id in track_ids:
+            self.speed_tracker.calculate_speed(track_id, (frame_index, 0))
+            self.red_light.detect(track_id, (0, 0, 10, 10), "GREEN")
+        # Batch path uses its own ID range so both state stores are exercised
+        batch_ids = [t + 1000 for t in track_ids]
+        self.speed_tracker.calculate_speeds(batch_ids, [(frame_index, 0)] * len(track_ids))
+        return self.registry.update(frame_index, track_ids + batch_ids)
+
+    def test_stale_tracks_evicted_everywhere(self):
+        """Tracks unseen for ttl_frames are removed from every subscriber"""
+        self._frame(1, [1, 2])
+        for i in range(2, 20):
+            self._frame(i, [2])
+
+        self.assertNotIn(1, self.speed_tracker.previous_positions)
+        self.assertNotIn(1, self.speed_tracker.track_ages)
+        self.assertNotIn(1, self.red_light.vehicle_states)
+        self.assertEqual(self.speed_tracker.get_last_speed(1001), 0)
+        self.assertIn(2, self.red_light.vehicle_states)
+        self.assertEqual(self.registry.get_stats(), {"live": 2, "evicted": 2})
+
+    def test_state_stays_bounded(self):
+        """Continuous churn of new IDs keeps state proportional to live tracks"""
+        next_id = 0
+        live = []
+        for frame_index in range(1, 2000):
+            if frame_index % 5 == 0:
+                # New vehicle enters, oldest leaves (5 in view)
+                live = live[-4:] + [next_id]
+                next_id += 1
+            self._frame(frame_index, live)
+
+        self.assertLessEqual(len(self.speed_tracker.previous_positions), 10)
+        self.assertLessEqual(len(self.red_light.vehicle_states), 10)
+        self.assertLessEqual(len(self.speed_tracker.state_table), 10)
+        self.assertEqual(self.speed_tracker.state_table.capacity, 64) # Slots are reused, never grown
+        self.assertGreater(self.registry.get_stats()["evicted"], 700)
+
+    def test_clear(self):
+        self._frame(1, [5, 6])
+        self.registry.clear()
+        self.assertEqual(self.speed_tracker.previous_positions, {})
+        self.assertEqual(self.registry.get_stats()["live"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from traffic_light import VisionTrafficLight
+
+ROI = (100, 20, 140, 120)
+LAMP_COLORS = {"RED": (0, 0, 255), "YELLOW": (0, 220, 255), "GREEN": (80, 255, 0)}
+
+def make_frame(lit=None):
+    """Dark signal head in ROI; `lit` lamp drawn as a bright square."""
+    frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+    x1, y1, x2, y2 = ROI
+    frame[y1:y2, x1:x2] = 30
+    if lit:
+        cy = {"RED": 35, "YELLOW": 70, "GREEN": 105}[lit]
+        frame[cy - 10:cy + 10, x1 + 10:x2 - 10] = LAMP_COLORS[lit]
+    return frame
+
+class TestVisionTrafficLight(unittest.TestCase):
+    def setUp(self):
+        self.light = VisionTrafficLight(ROI, every_n_frames=5, confirm_samples=2, stale_samples=3)
+
+    def test_classify_colors(self):
+        for color in LAMP_COLORS:
+            self.assertEqual(self.light.classify(make_frame(color)), color)
+        self.assertIsNone(self.light.classify(make_frame()))
+
+    def test_hysteresis_and_sampling(self):
+        # Samples at frames 0, 5, 10, ...: RED confirmed on the second agreeing sample
+        self.light.update(make_frame("RED"), 0)
+        self.assertIsNone(self.light.state)
+        self.light.update(make_frame("RED"), 5)
+        self.assertEqual(self.light.get_state(), "RED")
+        # Non-sampled frames keep the cached state
+        self.assertEqual(self.light.update(make_frame("GREEN"), 6), "RED")
+        self.assertEqual(self.light.samples, 2)
+        # A single GREEN sample (glare) does not switch; two do
+        self.assertEqual(self.light.update(make_frame("GREEN"), 10), "RED")
+        self.assertEqual(self.light.update(make_frame("RED"), 15), "RED")
+        self.assertEqual(self.light.update(make_frame("GREEN"), 20), "RED")
+        self.assertEqual(self.light.update(make_frame("GREEN"), 25), "GREEN")
+
+    def test_falls_back_to_simulated_when_unreadable(self):
+        for frame_index in (0, 5):
+            self.light.update(make_frame("GREEN"), frame_index)
+        self.assertEqual(self.light.state, "GREEN")
+        for frame_index in (10, 15, 20):
+            self.light.update(make_frame(), frame_index)
+        self.assertIsNone(self.light.state)
+        self.assertIn(self.light.get_state(), ("GREEN", "YELLOW", "RED"))
+
+if __name__ == '__main__':
+    unittest.main()
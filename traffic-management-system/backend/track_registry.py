@@ -0,0 +1,64 @@
+from utils.config import TRACK_TTL_FRAMES
+
+class TrackRegistry:
+    """
+    Central track lifecycle manager for one camera pipeline.
+
+    Components that keep per-track state subscribe here and implement
+    forget_tracks(track_ids). Tracks not seen for ttl_frames are evicted from
+    every subscriber in one pass, so state stays bounded by the number of
+    vehicles currently in view rather than every vehicle ever seen.
+    """
+    def __init__(self, ttl_frames=TRACK_TTL_FRAMES):
+        self.ttl_frames = ttl_frames
+        self.subscribers = []
+        self.last_seen = {} # {track_id: frame_index}
+        self.evicted_total = 0
+        self.last_sweep = 0
+
+    def subscribe(self, component):
+        """Registers a component exposing forget_tracks(track_ids)."""
+        self.subscribers.append(component)
+        return component
+
+    def update(self, frame_index, track_ids):
+        """
+        Marks track_ids as seen at frame_index and evicts stale tracks.
+        Returns:
+            list: IDs evicted during this call.
+        """
+        for track_id in track_ids:
+            self.last_seen[track_id] = frame_index
+
+        # Sweep at most a few times per TTL window (keeps the per-frame cost flat)
+        if frame_index - self.last_sweep < max(1, self.ttl_frames // 4):
+            return []
+        self.last_sweep = frame_index
+
+        cutoff = frame_index - self.ttl_frames
+        stale = [t for t, seen in self.last_seen.items() if seen < cutoff]
+        if stale:
+            self.evict(stale)
+        return stale
+
+    def evict(self, track_ids):
+        """Removes the tracks from the registry and from every subscriber."""
+        for track_id in track_ids:
+            self.last_seen.pop(track_id, None)
+        for component in self.subscribers:
+            try:
+                component.forget_tracks(track_ids)
+            except Exception as e:
+                print(f"[TRACKS] Eviction failed in {type(component).__name__}: {e}")
+        self.evicted_total += len(track_ids)
+
+    def clear(self):
+        """Evicts every known track (e.g. on system reset)."""
+        self.evict(list(self.last_seen))
+
+    def get_stats(self):
+        """Returns live/evicted track counts for this pipeline."""
+        return {
+            "live": len(self.last_seen),
+            "evicted": self.evicted_total
+        }
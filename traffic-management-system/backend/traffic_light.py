@@ -1,6 +1,8 @@
 
 import time
 import cv2
+from utils.config import (TRAFFIC_LIGHT_EVERY_N_FRAMES, TRAFFIC_LIGHT_CONFIRM_SAMPLES,
+                          TRAFFIC_LIGHT_MIN_LIT_FRACTION, TRAFFIC_LIGHT_STALE_SAMPLES)
 
 class TrafficLight:
     def __init__(self, cycle_start_offset=0):
@@ -28,6 +30,10 @@ class TrafficLight:
         else:
             return "RED"
 
+    def update(self, frame, frame_index):
+        """Simulated cycle: nothing to read from the frame. Returns: the current state."""
+        return self.get_state()
+
     def draw(self, frame):
         """
         Draws the traffic light indicator on the frame.
@@ -71,3 +77,86 @@ class TrafficLight:
         cv2.circle(frame, (cx, cy_g), radius, g_color, -1)
         
         return frame
+
+class VisionTrafficLight(TrafficLight):
+    """
+    Reads the signal state from the camera image instead of the fixed cycle.
+
+    The configured ROI (the signal head, in frame pixels) is classified every
+    `every_n_frames` frames with HSV color masks; a new color is only accepted after
+    `confirm_samples` consecutive readings agree, so a flickering LED or a passing
+    headlight does not toggle the state. Between samples get_state() is a cached value.
+    Until the first confirmed reading (or when the head stays unreadable for
+    `stale_samples` samples) the simulated cycle is used as a fallback.
+    """
+    # (hue ranges, saturation/value floors) per lamp color; OpenCV hue is 0-179
+    HSV_RANGES = {
+        "RED": [((0, 100, 150), (10, 255, 255)), ((170, 100, 150), (179, 255, 255))],
+        "YELLOW": [((15, 100, 150), (35, 255, 255))],
+        "GREEN": [((40, 80, 150), (95, 255, 255))],
+    }
+
+    def __init__(self, roi, every_n_frames=TRAFFIC_LIGHT_EVERY_N_FRAMES, confirm_samples=TRAFFIC_LIGHT_CONFIRM_SAMPLES,
+                 min_lit_fraction=TRAFFIC_LIGHT_MIN_LIT_FRACTION, stale_samples=TRAFFIC_LIGHT_STALE_SAMPLES,
+                 cycle_start_offset=0):
+        super().__init__(cycle_start_offset)
+        self.roi = tuple(int(v) for v in roi)
+        self.every_n_frames = max(1, int(every_n_frames))
+        self.confirm_samples = max(1, int(confirm_samples))
+        self.min_lit_fraction = min_lit_fraction
+        self.stale_samples = stale_samples
+        self.state = None       # confirmed state, None -> simulated fallback
+        self.candidate = None   # reading waiting for confirmation
+        self.candidate_count = 0
+        self.unreadable = 0     # consecutive samples without a lit lamp
+        self.samples = 0
+
+    def classify(self, frame):
+        """
+        Dominant lit lamp color in the ROI.
+        Returns: 'RED', 'YELLOW', 'GREEN', or None if no color covers min_lit_fraction of the ROI.
+        """
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = max(0, self.roi[0]), max(0, self.roi[1]), min(w, self.roi[2]), min(h, self.roi[3])
+        if x2 <= x1 or y2 <= y1:
+            return None
+        hsv = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+        area = float((x2 - x1) * (y2 - y1))
+        best, best_fraction = None, self.min_lit_fraction
+        for color, ranges in self.HSV_RANGES.items():
+            lit = sum(cv2.countNonZero(cv2.inRange(hsv, lower, upper)) for lower, upper in ranges)
+            if lit / area >= best_fraction:
+                best, best_fraction = color, lit / area
+        return best
+
+    def update(self, frame, frame_index):
+        """Samples the signal head every every_n_frames frames. Returns: the current state."""
+        if frame_index % self.every_n_frames == 0:
+            self.samples += 1
+            reading = self.classify(frame)
+            if reading is None:
+                self.unreadable += 1
+                if self.state is not None and self.unreadable >= self.stale_samples:
+                    print(f"[SIGNAL] Signal head unreadable for {self.unreadable} samples, using simulated cycle")
+                    self.state = None
+            else:
+                self.unreadable = 0
+                # Hysteresis: accept a change only after confirm_samples agreeing readings
+                if reading == self.candidate:
+                    self.candidate_count += 1
+                else:
+                    self.candidate, self.candidate_count = reading, 1
+                if reading != self.state and self.candidate_count >= self.confirm_samples:
+                    self.state = reading
+        return self.get_state()
+
+    def get_state(self):
+        """Returns the last confirmed reading, or the simulated state when there is none."""
+        return self.state if self.state is not None else super().get_state()
+
+    def draw(self, frame):
+        """Draws the indicator plus the sampled ROI (gray while on the simulated fallback)."""
+        x1, y1, x2, y2 = self.roi
+        color = (255, 255, 255) if self.state is not None else (128, 128, 128)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 1)
+        return super().draw(frame)
@@ -0,0 +1,170 @@
+# utils/camera_config.py
+import copy
+import json
+import os
+import cv2
+import numpy as np
+from utils.config import (CAMERA_CONFIG_FILE, LANE_1_LIMIT, LANE_2_LIMIT, LANE_DIVIDER_X, STOP_LINE_Y,
+                          CASCADE_ENABLED, ENFORCE_WITHOUT_VIEWERS, frame_width, frame_height)
+from utils.geometry import points_in_polygon
+
+# Built-in layout matching the original single-divider logic (cx < LANE_DIVIDER_X -> Lane 1).
+# cameras.json entries are merged over this (top-level keys replace the default ones), e.g.
+# {
+#     "junction.mp4": {
+#         "frame_size": [1920, 1080],
+#         "lanes": [{"name": "Lane 1", "label": "L1", "polygon": [[0, 400], [900, 400], [900, 1080], [0, 1080]], "limit": 40}],
+#         "stop_line_y": 500,
+#         "stop_zones": [{"name": "North", "line": [[200, 520], [900, 460]], "direction": [0, 1]}],
+#         "road_roi": [[0, 380], [1920, 380], [1920, 1080], [0, 1080]],
+#         "cascade": true,
+#         "traffic_light": {"roi": [1700, 40, 1760, 200], "every_n_frames": 5, "confirm_samples": 2},
+#         "enforce": true,
+#         "calibration": {"source_points": [[350, 450], [930, 450], [1280, 720], [0, 720]], "real_width": 10, "real_height": 20}
+#     }
+# }
+DEFAULT_CAMERA = {
+    "frame_size": [frame_width, frame_height],
+    "lanes": [
+        # fillPoly includes edge pixels, so Lane 1 ends one column before the divider
+        {"name": "Lane 1", "label": "L1", "limit": LANE_1_LIMIT,
+         "polygon": [[0, 0], [LANE_DIVIDER_X - 1, 0], [LANE_DIVIDER_X - 1, frame_height], [0, frame_height]]},
+        {"name": "Lane 2", "label": "L2", "limit": LANE_2_LIMIT,
+         "polygon": [[LANE_DIVIDER_X, 0], [frame_width, 0], [frame_width, frame_height], [LANE_DIVIDER_X, frame_height]]},
+    ],
+    "stop_line_y": STOP_LINE_Y,
+    "stop_zones": None,   # None -> single horizontal line at stop_line_y
+    "calibration": None,  # None -> flat meters-per-pixel speed model
+    "road_roi": None,     # None -> run vehicle inference on the whole frame
+    "cascade": CASCADE_ENABLED, # Multi-scale detection (full-res tiles for small/uncertain objects)
+    "traffic_light": None, # None -> simulated signal cycle; {"roi": [...]} -> read the signal head from the image
+    "enforce": ENFORCE_WITHOUT_VIEWERS, # keep processing (and fining) while nobody watches the stream
+}
+
+class CameraConfig:
+    """
+    Per-camera settings, precompiled once.
+    Lane polygons are rasterized into a label map (one uint8 per pixel), so lane
+    membership for any number of tracks is a single array index.
+    """
+    def __init__(self, name, settings):
+        self.name = name
+        self.frame_size = tuple(settings["frame_size"])
+        self.lanes = settings["lanes"]
+        self.stop_line_y = settings.get("stop_line_y", STOP_LINE_Y)
+        self.stop_zones = settings.get("stop_zones")
+        self.calibration = settings.get("calibration")
+        self.road_roi = settings.get("road_roi")
+        self.cascade = bool(settings.get("cascade", CASCADE_ENABLED))
+        self.traffic_light = settings.get("traffic_light")
+        self.enforce = bool(settings.get("enforce", ENFORCE_WITHOUT_VIEWERS))
+
+        self.lane_names = [lane["name"] for lane in self.lanes]
+        self.lane_labels = [lane.get("label", f"L{i + 1}") for i, lane in enumerate(self.lanes)]
+        self.lane_limits = [lane.get("limit") for lane in self.lanes]
+        self.lane_polygons = [np.asarray(lane["polygon"], dtype=np.int32) for lane in self.lanes]
+
+        # Label map: 0 = outside every lane, i + 1 = lane i (earlier lanes win on overlap)
+        w, h = self.frame_size
+        self.lane_map = np.zeros((h, w), dtype=np.uint8)
+        for i in reversed(range(len(self.lanes))):
+            cv2.fillPoly(self.lane_map, [self.lane_polygons[i].reshape(-1, 1, 2)], i + 1)
+
+        # Road ROI: vehicle inference runs on its bounding box only
+        self.roi_polygon = None
+        if self.road_roi:
+            self.roi_polygon = np.asarray(self.road_roi, dtype=np.float64)
+            x1, y1 = np.floor(self.roi_polygon.min(axis=0)).astype(int)
+            x2, y2 = np.ceil(self.roi_polygon.max(axis=0)).astype(int) + 1
+            self.roi_box = (int(x1), int(y1), int(x2), int(y2))
+
+    def lane_indices(self, points):
+        """
+        Vectorized lane lookup.
+        points: (N, 2) array-like of (x, y); coordinates outside the frame are clamped.
+        Returns: (N,) int array of lane indices, -1 where no lane covers the point.
+        """
+        pts = np.asarray(points).reshape(-1, 2)
+        if pts.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64)
+        h, w = self.lane_map.shape
+        x = np.clip(pts[:, 0].astype(np.int64), 0, w - 1)
+        y = np.clip(pts[:, 1].astype(np.int64), 0, h - 1)
+        return self.lane_map[y, x].astype(np.int64) - 1
+
+    def lane_index(self, point):
+        """Scalar convenience wrapper around lane_indices."""
+        return int(self.lane_indices([point])[0])
+
+    def lane_info(self, lane_index):
+        """Returns (lane_name, limit); ("N/A", None) when outside every lane."""
+        if lane_index < 0:
+            return "N/A", None
+        return self.lane_names[lane_index], self.lane_limits[lane_index]
+
+    def roi_bounds(self, width, height):
+        """
+        Bounding box of the road ROI, clipped to a width x height frame.
+        Returns: (x1, y1, x2, y2) slice bounds; the whole frame when no ROI is configured.
+        """
+        if self.roi_polygon is None:
+            return 0, 0, width, height
+        x1, y1, x2, y2 = self.roi_box
+        return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+    def in_roi(self, points):
+        """
+        Vectorized road ROI test.
+        Returns: (N,) bool array, True where the point lies inside the ROI polygon (all True without an ROI).
+        """
+        pts = np.asarray(points).reshape(-1, 2)
+        if self.roi_polygon is None:
+            return np.ones(pts.shape[0], dtype=bool)
+        return points_in_polygon(pts, self.roi_polygon)
+
+    def draw_lanes(self, frame):
+        """Draws lane outlines, "<label> (<limit>)" captions and the road ROI outline."""
+        if self.roi_polygon is not None:
+            cv2.polylines(frame, [self.roi_polygon.astype(np.int32).reshape(-1, 1, 2)], True, (128, 128, 128), 1)
+        for polygon, label, limit in zip(self.lane_polygons, self.lane_labels, self.lane_limits):
+            cv2.polylines(frame, [polygon.reshape(-1, 1, 2)], True, (255, 255, 0), 2)
+            x, y = polygon[:, 0].min(), polygon[:, 1].min()
+            cv2.putText(frame, f"{label} ({limit})", (int(x) + 100, int(y) + 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+
+# Registry: file contents loaded once, compiled configs cached per camera name
+_camera_settings = None
+_compiled = {}
+
+def load_camera_settings(path=CAMERA_CONFIG_FILE):
+    """Reads the per-camera settings file (missing/invalid file -> defaults only)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"[CONFIG] Could not read {path}: {e}. Using default camera layout.")
+        return {}
+
+def get_camera_config(name):
+    """
+    Returns the compiled CameraConfig for a camera/video name.
+    Unknown names (and None) get the default layout.
+    """
+    global _camera_settings
+    if _camera_settings is None:
+        _camera_settings = load_camera_settings()
+
+    key = name if name in _camera_settings else None
+    if key not in _compiled:
+        settings = copy.deepcopy(DEFAULT_CAMERA)
+        if key is not None:
+            settings.update(_camera_settings[key])
+        _compiled[key] = CameraConfig(key or "default", settings)
+    return _compiled[key]
+
+def reload_camera_configs():
+    """Drops cached configs so the next lookup re-reads CAMERA_CONFIG_FILE."""
+    global _camera_settings
+    _camera_settings = None
+    _compiled.clear()
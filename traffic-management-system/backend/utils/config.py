@@ -1,5 +1,6 @@
 # utils/config.py
 import os
+import platform
 
 # Base Directories
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # traffic-management-system/backend
@@ -26,3 +27,145 @@ SOURCE_POINTS = [(350, 450), (930, 450), (1280, 720), (0, 720)]
 REAL_WIDTH = 10  # meters (approx road width for 3 lanes)
 REAL_HEIGHT = 20 # meters (approx length of the road section in view)
 
+# Default Lane Layout (used for cameras without their own entry in CAMERA_CONFIG_FILE)
+LANE_1_LIMIT = 4   # km/h
+LANE_2_LIMIT = 5   # km/h
+LANE_DIVIDER_X = 640 # Approx middle of 1280 width
+STOP_LINE_Y = 500  # Default virtual stop line (downward traffic)
+
+# Per-camera configuration (lanes, limits, stop zones, homography calibration)
+# keyed by video filename. Loaded once by utils.camera_config; see that module for the format.
+CAMERA_CONFIG_FILE = os.path.join(PROJECT_ROOT, "cameras.json")
+
+# Track Lifecycle
+# Per-track detector state is evicted once a track has not been seen for this many frames.
+TRACK_TTL_FRAMES = 150 # ~5 seconds at 30 FPS
+
+# Evidence Clips (pre-event ring buffer kept per camera)
+# The buffer holds JPEG-encoded frames; on a violation the buffer plus the
+# post-event frames are written as a short clip next to the snapshot.
+CLIP_PRE_SECONDS = 4     # seconds of video kept before the event
+CLIP_POST_SECONDS = 2    # seconds recorded after the event
+CLIP_FPS = 10            # clip frame rate (source frames are sampled down to this)
+CLIP_WIDTH = 640         # clip width in pixels (height keeps aspect ratio)
+CLIP_JPEG_QUALITY = 70
+CLIP_MAX_BUFFER_MB = 16  # hard memory cap per camera (buffer + pending clips)
+
+# Inference Cache (opt-in, for re-processing the same recorded clips)
+# Vehicle tracks and helmet/plate model outputs are stored on disk keyed by video
+# content hash, frame index and model/config fingerprint; see inference_cache.py.
+INFERENCE_CACHE_ENABLED = os.environ.get("TMS_INFERENCE_CACHE", "0") == "1"
+INFERENCE_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "inference")
+
+# Startup: load and warm the vehicle/helmet/plate models in a background thread when the
+# server starts, so the first client does not wait for model loading and the first slow inference.
+MODEL_PRELOAD_ENABLED = os.environ.get("TMS_PRELOAD_MODELS", "1") == "1"
+
+# Multi-scale Detection Cascade (per camera: "cascade": true in cameras.json)
+# Coarse pass on the downscaled frame; boxes that are small or below the detection
+# confidence get a second look on full-resolution tiles, merged with NMS before tracking.
+CASCADE_ENABLED = False      # default for cameras without their own setting
+CASCADE_LOW_CONF = 0.25      # coarse-pass threshold (candidates for the fine pass)
+CASCADE_SMALL_HEIGHT = 48    # px in the original frame; shorter boxes are re-checked at full resolution
+CASCADE_TILE_SIZE = 640      # full-resolution tile edge (px)
+CASCADE_MAX_TILES = 4        # upper bound on fine-pass tiles per detection frame
+CASCADE_NMS_IOU = 0.5
+
+# Evidence Storage Generations
+# Snapshots, clips, challans and the violation DB are written into the current generation
+# (see utils/storage.py). Clearing history switches to a new generation and deletes the
+# old one in the background, so the request returns immediately.
+STORAGE_GENERATION_FILE = os.path.join(PROJECT_ROOT, "storage_generation.json")
+
+# Traffic Analytics Rollups (per camera, per lane; served at /api/analytics/<camera>)
+# Fixed-size ring buffers of minute and hour buckets, updated as vehicles are tracked.
+ANALYTICS_MINUTE_BUCKETS = 60   # last hour at minute resolution
+ANALYTICS_HOUR_BUCKETS = 48     # last two days at hour resolution
+ANALYTICS_SPEED_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 120]  # km/h bin edges; last bin is open-ended
+VEHICLE_CLASS_NAMES = {1: "bicycle", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
+VIOLATION_TYPES = ["Overspeed", "Red Light", "No Helmet"]
+
+# Latest-frame Endpoint (/api/frame/<camera>/latest.jpg?width=N, dashboard thumbnails)
+# Requested widths snap to these sizes, so at most len(THUMBNAIL_WIDTHS) variants are cached per camera.
+THUMBNAIL_WIDTHS = [160, 320, 480, 640]
+THUMBNAIL_JPEG_QUALITY = 75
+
+# Track Re-identification (reid.py)
+# A new tracker ID is merged into a recently lost track of the same class when its
+# color histogram and the lost track's predicted position agree, so per-track state
+# (speed history, plate, helmet status, "already fined") carries over.
+REID_ENABLED = True
+REID_MAX_LOST_FRAMES = 60     # lost tracks are candidates for this many frames (< TRACK_TTL_FRAMES)
+REID_MAX_DISTANCE = 1.0       # max gap between predicted and new box center, in lost-box diagonals
+REID_MIN_SIMILARITY = 0.6     # min HS color histogram correlation
+REID_HIST_REFRESH_FRAMES = 15 # appearance of a live track is re-sampled at most this often
+
+# Plate Crop Store (plate_store.py)
+# Plate crops are JPEG-encoded by a background writer and appended to rolling pack files
+# (plates/pack_NNNNNN.bin) with a JSONL index (pack_NNNNNN.idx: key -> offset, length).
+PLATE_PACK_MAX_MB = 64     # start a new pack file after this size
+PLATE_QUEUE_SIZE = 256     # crops waiting for the writer; further crops are dropped (counted)
+PLATE_JPEG_QUALITY = 90
+
+# Helmet Classifier
+# Pick the variant with benchmarks/sweep_helmet.py (latency/accuracy Pareto table); its --export
+# step copies the chosen weights to models/ and prints the two settings below.
+HELMET_MODEL_FILE = "helmet_classifier.pt"  # file in models/ (.pt, or an exported .onnx / .torchscript)
+HELMET_INPUT_SIZE = None                    # classifier input size in px; None = the model's training size
+
+# Vision Traffic Light (cameras.json "traffic_light": {"roi": [x1, y1, x2, y2]})
+# The signal head ROI is classified with HSV color masks instead of the simulated cycle.
+TRAFFIC_LIGHT_EVERY_N_FRAMES = 5     # sample the ROI every N frames, cached in between
+TRAFFIC_LIGHT_CONFIRM_SAMPLES = 2    # consecutive agreeing samples before the state changes
+TRAFFIC_LIGHT_MIN_LIT_FRACTION = 0.03 # share of ROI pixels of one lamp color to count as lit
+TRAFFIC_LIGHT_STALE_SAMPLES = 30     # unreadable samples before falling back to the simulated cycle
+
+# Mosaic Stream (/video_feed/mosaic?cameras=a.mp4,b.mp4&width=&height=&fps=)
+# The latest frames of the selected cameras are tiled and encoded once per tick, shared by all viewers.
+MOSAIC_WIDTH = 1280
+MOSAIC_HEIGHT = 720
+MOSAIC_FPS = 10
+MOSAIC_MAX_WIDTH = 3840      # upper bound for requested width/height
+MOSAIC_MAX_FPS = 30
+MOSAIC_JPEG_QUALITY = 70
+
+# Camera Pipelines (camera_pipeline.py)
+# One pipeline per camera, shared by its viewers. Without viewers (and without enforcement
+# duty) it is suspended: no decode or inference until the next viewer attaches.
+PACE_TO_SOURCE_FPS = True         # file sources play at their own FPS instead of as fast as possible
+ENFORCE_WITHOUT_VIEWERS = False   # default of the per-camera "enforce" setting
+PIPELINE_IDLE_CLOSE_SECONDS = 300 # suspended this long -> capture released (next viewer reopens it)
+PIPELINE_RETRY_SECONDS = 5        # wait before reopening a source that failed or could not be opened
+MAX_READ_FAILURES = 30            # consecutive failed reads -> source closed (reopened after PIPELINE_RETRY_SECONDS)
+
+# Cluster Mode (cluster.py, cluster_transport.py)
+# standalone: this process runs the pipelines and the UI (default).
+# worker: runs pipelines for the cameras the coordinator assigns, no UI.
+# coordinator: owns the violation store and the UI; runs no pipelines itself.
+CLUSTER_ROLE = os.environ.get("TMS_ROLE", "standalone")
+CLUSTER_WORKER_ID = os.environ.get("TMS_WORKER_ID", f"{platform.node()}-{os.getpid()}")
+CLUSTER_TRANSPORT = os.environ.get("TMS_CLUSTER_TRANSPORT", "sqlite:///" + os.path.join(PROJECT_ROOT, "cluster.db"))
+CLUSTER_HEARTBEAT_SECONDS = 1.0 # worker heartbeat / coordinator re-assignment period
+CLUSTER_WORKER_TIMEOUT = 5.0    # no heartbeat for this long -> the worker's cameras move elsewhere
+CLUSTER_FRAME_FPS = 5           # latest frames sent to the coordinator per camera and second
+CLUSTER_FRAME_WIDTH = 640       # ... downscaled to this width (a THUMBNAIL_WIDTHS entry)
+CLUSTER_EVENT_BATCH = 100       # violation events stored per coordinator poll
+CLUSTER_CLIP_WAIT_SECONDS = 10  # a violation waits this long for its evidence clip before it is sent without it
+
+# CPU Core Budget (utils/cpu_budget.py)
+# Running camera pipelines get disjoint core slices (thread affinity) and torch/OpenCV
+# intra-op threads are capped at the slice size, instead of every stream using every core.
+CPU_BUDGET_ENABLED = os.environ.get("TMS_CPU_BUDGET", "1") == "1"
+CPU_RESERVED_CORES = 1   # kept for Flask, JPEG encoding and writer threads (when more cores exist)
+
+# Inference Scheduling under Overload (inference_scheduler.py)
+# Per-track helmet/plate calls of a frame run by priority within the frame budget
+# (1 / source FPS, or SKIP_FRAMES intervals on detection frames, which carry the
+# tracker): critical ones (violation being confirmed, approaching the stop line on RED,
+# near the speed limit) always run; high/routine ones are deferred while the frame is
+# over budget and, past their deadline, run anyway (high) or are shed (routine).
+SCHEDULER_ENABLED = os.environ.get("TMS_SCHEDULER", "1") == "1"
+SCHEDULER_BUDGET_FRACTION = 0.8     # share of the frame interval available before deferring (rest: draw/encode)
+SCHEDULER_DEADLINE_FRAMES = {"high": 6, "routine": 15} # frames a request may be deferred
+SCHEDULER_SPEED_MARGIN = 0.9        # tracks at >= 90% of their lane limit are critical
+SCHEDULER_STOP_LINE_MARGIN = 150    # px before a stop line/zone that counts as approaching it
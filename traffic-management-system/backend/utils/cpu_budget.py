@@ -0,0 +1,119 @@
+# utils/cpu_budget.py
+import os
+import sys
+import threading
+from utils.config import CPU_BUDGET_ENABLED, CPU_RESERVED_CORES
+from utils import metrics
+
+def available_cores():
+    """CPUs this process may run on (affinity mask, else cpu_count)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def plan(cores, owners, reserved=CPU_RESERVED_CORES):
+    """
+    Splits cores between running pipelines.
+    reserved cores (Flask, JPEG encode, writer threads) are kept out of the split when at
+    least one core is left for inference. Every owner gets a disjoint, contiguous slice;
+    with more owners than cores, owners share single cores round-robin.
+    Returns: ({owner: [cores]}, shared cores, intra-op threads per inference call)
+    """
+    reserved = reserved if len(cores) > reserved else 0
+    shared, usable = cores[:reserved], cores[reserved:]
+    owners = sorted(owners)
+    if not owners:
+        return {}, shared, len(usable)
+    if len(owners) >= len(usable):
+        return {owner: [usable[i % len(usable)]] for i, owner in enumerate(owners)}, shared, 1
+    per_owner, extra = divmod(len(usable), len(owners))
+    slices, start = {}, 0
+    for i, owner in enumerate(owners):
+        size = per_owner + (1 if i < extra else 0)
+        slices[owner] = usable[start:start + size]
+        start += size
+    # One process-wide intra-op setting (torch/OpenCV keep a single value): the smallest slice
+    return slices, shared, per_owner
+
+class CpuBudget:
+    """
+    Core budget for camera pipelines and the model backends they call.
+
+    Without it every stream's torch/OpenMP/OpenCV pool sizes itself to all cores, so
+    8 streams run 8x more compute threads than there are cores. Here each running
+    pipeline thread is pinned to its own slice of cores (OpenMP workers it spawns
+    inherit the mask) and intra-op threads are capped at the slice size. The plan is
+    recomputed when pipelines start or suspend; pipelines compare `version` once per
+    frame and re-apply when it changed.
+    """
+    def __init__(self, cores=None, reserved=CPU_RESERVED_CORES):
+        self.cores = list(cores) if cores is not None else available_cores()
+        self.reserved = reserved
+        self.owners = set()
+        self.version = 0
+        self.slices, self.shared, self.intra_op_threads = plan(self.cores, (), reserved)
+        self.lock = threading.Lock()
+
+    def _replan(self):
+        self.slices, self.shared, self.intra_op_threads = plan(self.cores, self.owners, self.reserved)
+        self.version += 1
+        for owner, cores in self.slices.items():
+            metrics.CPU_BUDGET_CORES.labels(owner).set(len(cores))
+
+    def register(self, owner):
+        with self.lock:
+            if owner not in self.owners:
+                self.owners.add(owner)
+                self._replan()
+
+    def unregister(self, owner):
+        with self.lock:
+            if owner in self.owners:
+                self.owners.discard(owner)
+                metrics.CPU_BUDGET_CORES.labels(owner).set(0)
+                self._replan()
+
+    def apply(self, owner):
+        """
+        Pins the calling thread to the owner's cores and caps intra-op threads.
+        Returns: the plan version applied.
+        """
+        with self.lock:
+            cores, threads, version = self.slices.get(owner, self.cores), self.intra_op_threads, self.version
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores) # 0 = calling thread on Linux
+        set_intra_op_threads(threads)
+        return version
+
+    def allocation(self):
+        """Returns: the current plan (exposed at /api/resources)."""
+        with self.lock:
+            return {"version": self.version, "cores": self.cores, "shared_cores": self.shared,
+                    "intra_op_threads": self.intra_op_threads,
+                    "pipelines": {owner: cores for owner, cores in sorted(self.slices.items())}}
+
+def set_intra_op_threads(threads):
+    """Caps torch and OpenCV worker pools (torch is not imported here; before its import the env vars apply)."""
+    threads = max(1, int(threads))
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+    else:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+    import cv2
+    cv2.setNumThreads(threads)
+
+_budget = None
+_budget_lock = threading.Lock()
+
+def get_cpu_budget():
+    """Returns: the process-wide CpuBudget, or None when CPU_BUDGET_ENABLED is off."""
+    global _budget
+    if not CPU_BUDGET_ENABLED:
+        return None
+    with _budget_lock:
+        if _budget is None:
+            _budget = CpuBudget()
+        return _budget
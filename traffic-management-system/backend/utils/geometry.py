@@ -0,0 +1,28 @@
+# utils/geometry.py
+import numpy as np
+
+def points_in_polygon(points, polygon):
+    """
+    Vectorized point-in-polygon test (even-odd / crossing number rule).
+    points: (N, 2) array-like of (x, y)
+    polygon: (M, 2) array-like of vertices (closed implicitly)
+    Returns: (N,) bool array
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    poly = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if pts.shape[0] == 0 or poly.shape[0] < 3:
+        return np.zeros(pts.shape[0], dtype=bool)
+
+    x = pts[:, 0:1]
+    y = pts[:, 1:2]
+    x1 = poly[:, 0][None, :]
+    y1 = poly[:, 1][None, :]
+    x2 = np.roll(poly[:, 0], -1)[None, :]
+    y2 = np.roll(poly[:, 1], -1)[None, :]
+
+    # Edges that straddle the horizontal ray through each point
+    straddles = (y1 > y) != (y2 > y)
+    dy = np.where(straddles, y2 - y1, 1.0)
+    x_cross = x1 + (x2 - x1) * (y - y1) / dy
+    hits = straddles & (x < x_cross)
+    return (np.count_nonzero(hits, axis=1) % 2) == 1
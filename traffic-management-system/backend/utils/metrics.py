@@ -0,0 +1,210 @@
+# utils/metrics.py
+import threading
+import time
+from bisect import bisect_left
+
+# Default latency buckets (seconds): 0.5 ms .. 2.5 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Timer:
+    """Context manager that observes elapsed wall time into a histogram child."""
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+class _CounterChild:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+class Metric:
+    """Base class: one named metric with a fixed set of label names."""
+    TYPE = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.children = {} # {label_values_tuple: child}
+        self.lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Returns the child for these label values (created on first use)."""
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+        for values, child in list(self.children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.children = {}
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, values, child):
+        with child.lock:
+            counts = list(child.counts)
+            total, count = child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.bounds + (float("inf"),), counts):
+            cumulative += n
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self.register(Counter(name, help_text, label_names))
+
+    def gauge(self, name, help_text, label_names=()):
+        return self.register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# --- Pipeline metrics (shared by app.py and the detectors) ---
+FRAMES_TOTAL = REGISTRY.counter("tms_frames_total", "Frames processed per camera.", ["camera"])
+FRAMES_DROPPED = REGISTRY.counter("tms_frames_dropped_total", "Frames dropped or failed to decode.", ["camera", "reason"])
+CAMERA_FPS = REGISTRY.gauge("tms_camera_fps", "Processed frames per second (1 s window).", ["camera"])
+STAGE_LATENCY = REGISTRY.histogram("tms_stage_latency_seconds", "Per-stage processing latency.", ["camera", "stage"])
+INFERENCE_CALLS = REGISTRY.counter("tms_inference_calls_total", "Model inference calls.", ["model"])
+QUEUE_DEPTH = REGISTRY.gauge("tms_queue_depth", "Items waiting in internal queues.", ["camera", "queue"])
+LIVE_TRACKS = REGISTRY.gauge("tms_live_tracks", "Tracks currently held in per-track state.", ["camera"])
+VIOLATIONS_TOTAL = REGISTRY.counter("tms_violations_total", "Violations detected.", ["camera", "type"])
+CHALLAN_RENDER = REGISTRY.histogram("tms_challan_render_seconds", "E-challan PDF render time.")
+MODEL_LOAD = REGISTRY.gauge("tms_model_load_seconds", "Model load / warmup time.", ["model", "phase"])
+TIME_TO_FIRST_FRAME = REGISTRY.gauge("tms_time_to_first_frame_seconds", "Stream open to first encoded frame.", ["camera"])
+REID_MERGES = REGISTRY.counter("tms_reid_merges_total", "Tracker IDs merged into a recently lost track.", ["camera"])
+CPU_BUDGET_CORES = REGISTRY.gauge("tms_cpu_budget_cores", "CPU cores assigned to a camera pipeline.", ["camera"])
+PIPELINE_VIEWERS = REGISTRY.gauge("tms_pipeline_viewers", "Viewers attached to a camera pipeline (0 = suspended unless enforcing).", ["camera"])
+INFERENCE_SCHEDULED = REGISTRY.counter("tms_inference_scheduled_total", "Per-track model calls by priority class and outcome (run/deferred/shed).", ["camera", "priority", "outcome"])
+PLATE_CROPS_DROPPED = REGISTRY.counter("tms_plate_crops_dropped_total", "Plate crops not stored by the plate store.", ["reason"])
+PLATE_STORE_QUEUE = REGISTRY.gauge("tms_plate_store_queue_depth", "Plate crops waiting for the plate store writer.")
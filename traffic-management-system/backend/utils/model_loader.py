@@ -0,0 +1,71 @@
+# utils/model_loader.py
+import os
+import threading
+import time
+import numpy as np
+from utils import metrics
+
+# Warm models loaded at startup, each handed out once: {path: model}
+_preloaded = {}
+# Preloads in progress: {path: threading.Event}, set when that model is ready (or failed)
+_pending = {}
+_lock = threading.Lock()
+
+def load_model(path):
+    """
+    Constructs a YOLO model.
+    ultralytics (and torch) are imported on first use, so importing the detector
+    modules, CLI tools and tests does not pay for them.
+    """
+    from ultralytics import YOLO
+    start = time.perf_counter()
+    model = YOLO(path)
+    metrics.MODEL_LOAD.labels(os.path.basename(path), "load").set(round(time.perf_counter() - start, 3))
+    return model
+
+def get_model(path):
+    """
+    Returns the preloaded warm model for this path if one is waiting (blocks while
+    its preload is still running), otherwise loads a new instance.
+    Each preloaded model is handed out once, since tracker state lives on the instance.
+    """
+    event = _pending.get(path)
+    if event is not None:
+        event.wait()
+    with _lock:
+        model = _preloaded.pop(path, None)
+    return model if model is not None else load_model(path)
+
+def _warmup(path, model, input_shape):
+    """Runs one dummy inference so lazy weight fusing / allocation happens before the first frame."""
+    start = time.perf_counter()
+    model(np.zeros(input_shape, dtype=np.uint8), verbose=False)
+    metrics.MODEL_LOAD.labels(os.path.basename(path), "warmup").set(round(time.perf_counter() - start, 3))
+
+def _preload(specs):
+    for path, input_shape in specs:
+        try:
+            model = load_model(path)
+            _warmup(path, model, input_shape)
+            with _lock:
+                _preloaded[path] = model
+            print(f"[STARTUP] Preloaded and warmed {path}")
+        except Exception as e:
+            print(f"[STARTUP] Preload of {path} failed ({e}); it will be loaded on first use.")
+        finally:
+            _pending.pop(path).set()
+
+def preload_models(specs, background=True):
+    """
+    Loads and warms models ahead of the first request.
+    specs: list of (model_path, warmup_input_shape), loaded in order.
+    Returns: the preload thread (None when run in the foreground).
+    """
+    for path, _ in specs:
+        _pending[path] = threading.Event()
+    if not background:
+        _preload(specs)
+        return None
+    thread = threading.Thread(target=_preload, args=(specs,), daemon=True, name="model-preload")
+    thread.start()
+    return thread
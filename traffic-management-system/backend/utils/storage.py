@@ -0,0 +1,118 @@
+# utils/storage.py
+import json
+import os
+import re
+import shutil
+import threading
+from utils.config import STORAGE_GENERATION_FILE
+
+# Evidence (snapshots, clips, challans) and the violation DB are written into the
+# current *generation*. Clearing history switches to a fresh generation (one small
+# file write) and deletes the old ones in the background.
+#
+# Layout for generation N >= 1:   <root>/gNNNN/<files>   and   violations.gNNNN.json
+# Generation 0 is the original flat layout (<root>/<files>, violations.json), so
+# existing data stays readable until the first clear.
+
+GENERATION_FILE = STORAGE_GENERATION_FILE
+_generation = None
+_lock = threading.Lock()
+_GEN_DIR = re.compile(r"^g(\d{4,})$")
+
+def get_generation():
+    """Returns the current storage generation (read from GENERATION_FILE once)."""
+    global _generation
+    if _generation is None:
+        try:
+            with open(GENERATION_FILE, 'r') as f:
+                _generation = int(json.load(f)["generation"])
+        except (IOError, ValueError, KeyError, TypeError):
+            _generation = 0
+    return _generation
+
+def use_generation_file(path):
+    """Switches to another generation pointer file (benchmarks, tests)."""
+    global GENERATION_FILE, _generation
+    with _lock:
+        GENERATION_FILE = path
+        _generation = None
+
+def generation_dir(root, generation=None):
+    """Directory for files of `root` (e.g. the snapshot dir) in a generation (default: current)."""
+    generation = get_generation() if generation is None else generation
+    return root if generation == 0 else os.path.join(root, f"g{generation:04d}")
+
+def partition_file(path, generation=None):
+    """Per-generation variant of a file path (violations.json -> violations.g0003.json)."""
+    generation = get_generation() if generation is None else generation
+    if generation == 0:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}.g{generation:04d}{ext}"
+
+def advance_generation():
+    """
+    Atomically switches writers to a fresh generation.
+    Returns: the new generation number.
+    """
+    global _generation
+    with _lock:
+        new_generation = get_generation() + 1
+        tmp_path = GENERATION_FILE + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"generation": new_generation}, f)
+        os.replace(tmp_path, GENERATION_FILE)
+        _generation = new_generation
+    return new_generation
+
+def purge_generations(roots, partitioned_files, keep):
+    """
+    Deletes every generation except `keep` (also leftovers of interrupted purges).
+    roots: evidence directories (generation 0 = files directly inside them)
+    partitioned_files: base paths passed to partition_file (e.g. the DB file)
+    Returns: number of files/directories removed.
+    """
+    removed = 0
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            match = _GEN_DIR.match(name)
+            try:
+                if match and os.path.isdir(path):
+                    if int(match.group(1)) != keep:
+                        shutil.rmtree(path)
+                        removed += 1
+                elif keep != 0 and os.path.isfile(path):
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                print(f"[STORAGE] Error deleting {path}: {e}")
+
+    for base in partitioned_files:
+        stem, ext = os.path.splitext(os.path.basename(base))
+        pattern = re.compile(rf"^{re.escape(stem)}\.g(\d{{4,}}){re.escape(ext)}$")
+        folder = os.path.dirname(base) or "."
+        for name in os.listdir(folder):
+            match = pattern.match(name)
+            stale = (match and int(match.group(1)) != keep) or (name == os.path.basename(base) and keep != 0)
+            if stale:
+                try:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"[STORAGE] Error deleting {name}: {e}")
+    return removed
+
+def purge_in_background(roots, partitioned_files, keep=None):
+    """Runs purge_generations in a daemon thread. Returns: the thread."""
+    keep = get_generation() if keep is None else keep
+
+    def run():
+        removed = purge_generations(roots, partitioned_files, keep)
+        print(f"[STORAGE] Purged {removed} entries from old generations (keeping g{keep:04d}).")
+
+    thread = threading.Thread(target=run, daemon=True, name="storage-purge")
+    thread.start()
+    return thread
@@ -1,15 +1,18 @@
+import threading
 
-import time
+# Global reset epoch, incremented every time the history is cleared.
+# Running pipelines compare it once per frame with the epoch they last saw and,
+# when it changed, drop their per-track state (violated IDs, counters, history).
+_reset_epoch = 0
+_lock = threading.Lock()
 
-# Global state to track when the last system reset occurred.
-# This allows running threads (like detectors) to know if they should reset their local counters.
-_last_reset_time = 0.0
+def advance_reset_epoch():
+    """Starts a new reset epoch. Returns: the new epoch."""
+    global _reset_epoch
+    with _lock:
+        _reset_epoch += 1
+        return _reset_epoch
 
-def set_reset_time():
-    """Updates the reset time to now."""
-    global _last_reset_time
-    _last_reset_time = time.time()
-
-def get_last_reset_time():
-    """Returns the timestamp of the last reset."""
-    return _last_reset_time
+def get_reset_epoch():
+    """Returns the current reset epoch."""
+    return _reset_epoch
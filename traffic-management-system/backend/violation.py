@@ -1,51 +1,53 @@
 import cv2
 import os
 import math
-from ultralytics import YOLO
 from utils.config import PROJECT_ROOT, MODEL_PATH, VIDEO_SOURCE, VEHICLE_CLASSES
+from utils.config import LANE_1_LIMIT, LANE_2_LIMIT, LANE_DIVIDER_X # Default lane layout
+from utils.camera_config import get_camera_config
 from speed_calculation import SpeedTracker
 from snapshot import capture_snapshot
 from challan import generate_challan
 from database import save_violation
 import datetime
 
-# Constants
-# Constants
-LANE_1_LIMIT = 4   # km/h
-LANE_2_LIMIT = 5   # km/h
-LANE_DIVIDER_X = 640 # Approx middle of 1280 width
-
 class ViolationDetector:
-    def __init__(self):
+    def __init__(self, clip_recorder=None, camera_config=None):
         self.violated_vehicles = set() # Store IDs of vehicles that have already triggered a violation
         self.overspeed_counter = {} # To track how long a vehicle has been overspeeding (if needed for future logic)
-        self.last_check_time = 0 # Initialize last check time for system reset logic
-
-    def check_violation(self, track_id, speed, position, frame, bbox, plate=None):
+        self.clip_recorder = clip_recorder # Optional: evidence clip ring buffer for this camera
+        # Lane layout + limits (precompiled lane lookup map); defaults to the LANE_DIVIDER_X layout
+        self.camera_config = camera_config or get_camera_config(None)
+
+    def forget_tracks(self, track_ids):
+        """Drops per-track state for tracks that left the scene (called by TrackRegistry)."""
+        for track_id in track_ids:
+            self.overspeed_counter.pop(track_id, None)
+            self.violated_vehicles.discard(track_id)
+
+    def reset(self):
+        """Drops all per-track state (history cleared; see system_state reset epoch)."""
+        self.violated_vehicles.clear()
+        self.overspeed_counter.clear()
+        print("[SPEED] Detector state reset due to system clear.")
+
+    def check_violation(self, track_id, speed, position, frame, bbox, plate=None, lane_index=None):
         """
         Checks if vehicle is overspeeding in its respective lane.
+        lane_index: Optional lane already looked up for this track (see CameraConfig.lane_indices),
+                    so a frame's tracks can be assigned to lanes in one vectorized call.
         """
-        # Check for system reset
-        from utils import system_state
-        import time
-        if getattr(self, 'last_check_time', 0) < system_state.get_last_reset_time():
-            self.violated_vehicles.clear()
-            self.overspeed_counter.clear()
-            self.last_check_time = time.time()
-            print("[SPEED] Detector state reset due to system clear.")
-            
         # Determine Lane First
-        cx, cy = position
-        if cx < LANE_DIVIDER_X:
-            lane = "Lane 1"
-            limit = LANE_1_LIMIT
-        else:
-            lane = "Lane 2"
-            limit = LANE_2_LIMIT
+        if lane_index is None:
+            lane_index = self.camera_config.lane_index(position)
+        lane, limit = self.camera_config.lane_info(lane_index)
             
         # Already handled?
         if track_id in self.violated_vehicles:
             return True, lane, limit # Return True so visual kept RED
+
+        # Outside every configured lane: nothing to enforce
+        if limit is None:
+            return False, lane, limit
         
         is_violation = False
         
@@ -68,6 +70,8 @@ class ViolationDetector:
                 
                 # Capture Snapshot
                 snapshot_path = capture_snapshot(frame, track_id, speed, bbox)
+                if self.clip_recorder:
+                    self.clip_recorder.trigger(snapshot_path)
                 
                 # Generate E-Challan
                 if snapshot_path:
@@ -96,6 +100,7 @@ def main():
         print(f"Error: Model not found at {MODEL_PATH}")
         return
 
+    from ultralytics import YOLO
     print(f"Loading YOLOv8 model from: {MODEL_PATH}")
     model = YOLO(MODEL_PATH)
 
@@ -111,7 +116,7 @@ def main():
     violation_detector = ViolationDetector()
 
     print(f"Checking violations on video: {video_path}...")
-    print(f"Lane 1 Limit: {LANE_1_LIMIT} km/h | Lane 2 Limit: {LANE_2_LIMIT} km/h")
+    print(" | ".join(f"{n} Limit: {l} km/h" for n, l in zip(violation_detector.camera_config.lane_names, violation_detector.camera_config.lane_limits)))
     print("Press 'q' to exit.")
 
     while True:
@@ -125,10 +130,8 @@ def main():
         
         annotated_frame = frame.copy()
         
-        # Draw Lane Divider
-        cv2.line(annotated_frame, (LANE_DIVIDER_X, 0), (LANE_DIVIDER_X, 720), (255, 255, 0), 2)
-        cv2.putText(annotated_frame, f"Lane 1 (Limit: {LANE_1_LIMIT})", (100, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-        cv2.putText(annotated_frame, f"Lane 2 (Limit: {LANE_2_LIMIT})", (740, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+        # Draw Lanes
+        violation_detector.camera_config.draw_lanes(annotated_frame)
 
         if results[0].boxes.id is not None:
             boxes = results[0].boxes.xyxy.cpu().numpy()
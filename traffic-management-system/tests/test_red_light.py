@@ -59,5 +59,78 @@ class TestRedLightLogic(unittest.TestCase):
         self.assertEqual(status, "VIOLATION") # Still marked as violation
         self.assertFalse(is_new) # But NOT new
 
+class TestStopZones(unittest.TestCase):
+    def setUp(self):
+        self.detector = RedLightDetector(approaches=[
+            # Angled line from (0, 400) to (400, 600), traffic moving down
+            {'name': 'North', 'line': [(0, 400), (400, 600)], 'direction': (0, 1)},
+            # Stop box on the right, traffic moving left into it
+            {'name': 'East', 'polygon': [(800, 100), (1000, 100), (1000, 300), (800, 300)], 'direction': (-1, 0)},
+        ])
+
+    @staticmethod
+    def _box(cx, cy):
+        return (cx - 10, cy - 10, cx + 10, cy + 10)
+
+    def test_angled_line_crossing(self):
+        # At x=200 the line is at y=500
+        self.detector.detect(1, self._box(200, 480), "RED")
+        status, is_new = self.detector.detect(1, self._box(200, 520), "RED")
+        self.assertEqual(status, "VIOLATION")
+        self.assertTrue(is_new)
+
+    def test_wrong_direction_is_safe(self):
+        self.detector.detect(2, self._box(200, 520), "RED")
+        status, is_new = self.detector.detect(2, self._box(200, 480), "RED")
+        self.assertEqual(status, "SAFE")
+
+    def test_outside_segment_is_safe(self):
+        # x=600 is beyond the segment end (x=400)
+        self.detector.detect(3, self._box(600, 680), "RED")
+        status, _ = self.detector.detect(3, self._box(600, 720), "RED")
+        self.assertEqual(status, "SAFE")
+
+    def test_polygon_entry_with_direction(self):
+        self.detector.detect(4, self._box(1050, 200), "RED")
+        status, is_new = self.detector.detect(4, self._box(980, 200), "RED")
+        self.assertEqual((status, is_new), ("VIOLATION", True))
+
+        # Leaving the box towards the right is not a crossing
+        self.detector.detect(5, self._box(990, 250), "RED")
+        status, _ = self.detector.detect(5, self._box(1050, 250), "RED")
+        self.assertEqual(status, "SAFE")
+
+    def test_detect_frame_batch(self):
+        ids = [10, 11, 12]
+        before = [self._box(200, 480), self._box(1050, 200), self._box(50, 100)]
+        after = [self._box(200, 520), self._box(980, 200), self._box(50, 110)]
+        self.detector.detect_frame(ids, before, "RED")
+        results = self.detector.detect_frame(ids, after, "RED")
+        self.assertEqual(results[10], ("VIOLATION", True))
+        self.assertEqual(results[11], ("VIOLATION", True))
+        self.assertEqual(results[12], ("SAFE", False))
+
+    def test_horizontal_default_matches_legacy(self):
+        """detect_frame over many tracks equals the old per-track y-crossing rule"""
+        import random
+        random.seed(1)
+        detector = RedLightDetector(stop_line_y=500)
+        prev_y = {}
+        for _ in range(30):
+            ids = list(range(20))
+            boxes = []
+            for t in ids:
+                cy = random.randint(440, 560)
+                boxes.append((random.randint(0, 1200), cy - 20, random.randint(0, 1200), cy + 20))
+            results = detector.detect_frame(ids, boxes, "RED")
+            for t, box in zip(ids, boxes):
+                cy = (box[1] + box[3]) // 2
+                expected_new = t in prev_y and prev_y[t] is not None and prev_y[t] < 500 <= cy
+                if results[t][1]:
+                    self.assertTrue(expected_new)
+                if expected_new:
+                    self.assertEqual(results[t], ("VIOLATION", True))
+                prev_y[t] = None if results[t][0] == "VIOLATION" else cy
+
 if __name__ == '__main__':
     unittest.main()
@@ -41,7 +41,11 @@ def verify_clear_history():
         return
 
     # 3. Verify Effects
+    # Old files are deleted in the background after the request returns, so allow a few seconds
     print("[VERIFY] Checking filesystem and database...")
+    deadline = time.time() + 5
+    while time.time() < deadline and (os.path.exists("challans/dummy.pdf") or os.path.exists("snapshots/dummy.jpg")):
+        time.sleep(0.2)
     
     # Check Files
     if os.path.exists("challans/dummy.pdf"):
@@ -54,14 +58,13 @@ def verify_clear_history():
     else:
         print("[PASS] Snapshot file deleted.")
 
-    # Check Database
+    # Check Database (the API reads the current storage generation)
     try:
-        with open("violations.json", "r") as f:
-            data = json.load(f)
-            if len(data) == 0:
-                print("[PASS] Violations DB is empty.")
-            else:
-                print(f"[FAIL] Violations DB not empty: {data}")
+        data = requests.get(f"{BASE_URL}/api/violations").json()
+        if len(data) == 0:
+            print("[PASS] Violations DB is empty.")
+        else:
+            print(f"[FAIL] Violations DB not empty: {data}")
     except Exception as e:
         print(f"[FAIL] Error reading DB: {e}")
 